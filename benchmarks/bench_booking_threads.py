@@ -0,0 +1,100 @@
+"""
+Benchmark booking throughput as the number of threads grows
+
+Run with: python -m benchmarks.bench_booking_threads --bookings 20000
+
+Compares the lock-striped engine against a single global lock (one stripe).
+--storage picks what a booking commits to: "memory" (registry only), "json"
+(fsynced journal line plus batched snapshots) or "sqlite" (one WAL
+transaction). With durable storage, threads block in I/O without holding
+every lock, which is where striping pays off.
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_persistence import build_registry, write_dataset
+from gudlft.booking import BookingEngine, BookingError
+from gudlft.registry import Registry
+from gudlft.storage import JsonStorage, SqliteStorage, Storage
+
+
+def make_storage(kind, n_clubs, n_competitions, tmp):
+    """Return a loaded storage of this kind over a synthetic dataset"""
+    seed = build_registry(n_clubs, n_competitions)
+    if kind == "memory":
+        return Storage(seed)
+    clubs_path, competitions_path = write_dataset(seed, tmp)
+    if kind == "json":
+        storage = JsonStorage(
+            Registry(), clubs_path, competitions_path, journal_path=f"{tmp}/bookings.journal"
+        )
+    else:
+        storage = SqliteStorage(
+            Registry(),
+            f"{tmp}/gudlft.db",
+            pool_size=16,
+            seed_clubs_path=clubs_path,
+            seed_competitions_path=competitions_path,
+        )
+    storage.load()
+    return storage
+
+
+def run(threads, bookings, stripes, kind, n_clubs, n_competitions):
+    """Return bookings per second for one configuration"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = make_storage(kind, n_clubs, n_competitions, tmp)
+        registry = storage.registry
+        engine = BookingEngine(registry, storage=storage, stripes=stripes)
+        per_thread = bookings // threads
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(seed):
+            rng = random.Random(seed)
+            barrier.wait()
+            for _ in range(per_thread):
+                try:
+                    engine.book(
+                        rng.choice(registry.clubs), rng.choice(registry.competitions), 1
+                    )
+                except BookingError:
+                    pass
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for thread in pool:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        storage.close()
+    return per_thread * threads / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--clubs", type=int, default=1000)
+    parser.add_argument("--competitions", type=int, default=50)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument(
+        "--storage", choices=["memory", "json", "sqlite"], default="memory"
+    )
+    args = parser.parse_args()
+
+    print(f"{'threads':>7} {'global lock':>14} {'64 stripes':>14}  (bookings/s)")
+    for threads in args.threads:
+        rates = [
+            run(threads, args.bookings, stripes, args.storage, args.clubs, args.competitions)
+            for stripes in (1, 64)
+        ]
+        print(f"{threads:>7} {rates[0]:>14.0f} {rates[1]:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark bytes on the wire and page time with and without compression
+
+Run with: python -m benchmarks.bench_compression --clubs 10000 --kbps 512
+
+The app is loaded in-process on a generated dataset and each page is fetched
+through the test client as the largest page a club can ask for (--per-page).
+For every encoding the table gives the response size, the median server time
+(a cold one, where the body is compressed, and a warm one, where a
+version-keyed page comes from the compressed cache), and the time to send
+the body over a --kbps link. "identity" is the server with COMPRESSION off.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_routes import load_server
+from benchmarks.generate import club_email, competition_name, generate
+from gudlft import compression
+from gudlft.compression import Compressor
+
+ENCODINGS = ("identity", "gzip", "br")
+
+
+def pages(per_page):
+    """Return {name: path} of the pages to fetch, all after logging in"""
+    return {
+        "index": f"/?per_page={per_page}",
+        "summary": f"/summary?per_page={per_page}",
+        "booking": f"/book/{competition_name(0)}",
+        "api_points": f"/api/points?per_page={per_page}",
+    }
+
+
+def compressor_for(encoding, brotli):
+    """Return the server's compressor for `encoding`, None for identity"""
+    if encoding == "identity":
+        return None
+    compression.brotli = brotli if encoding == "br" else None
+    return Compressor()
+
+
+def measure(server, client, path, encoding, iterations):
+    """Return (bytes, p50 ms of the first request of a version, warm p50 ms)"""
+    cold, warm = [], []
+    for _ in range(iterations):
+        # A new registry version, as after a booking: the caches miss.
+        server.registry.version += 1
+        for timings in (cold, warm):
+            started = time.perf_counter()
+            response = client.get(path, headers={"Accept-Encoding": encoding})
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 200, (path, response.status_code)
+    return len(response.data), statistics.median(cold) * 1000, statistics.median(warm) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clubs", type=int, default=10000)
+    parser.add_argument("--competitions", type=int, default=200)
+    parser.add_argument("--per-page", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--kbps", type=float, default=512, help="client link speed")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(tmp, args.clubs, args.competitions, past_ratio=0)
+        server = load_server(tmp)
+        server.app.config["MAX_PAGE_SIZE"] = max(args.per_page, 1)
+        brotli = compression.brotli
+        client = server.app.test_client()
+        client.post("/showSummary", data={"email": club_email(0)})
+
+        print(
+            f"{'page':<11} {'encoding':<9} {'bytes':>8} {'cold ms':>8}"
+            f" {'warm ms':>8} {'link ms':>8} {'total ms':>9}"
+        )
+        for name, path in pages(args.per_page).items():
+            for encoding in ENCODINGS:
+                if encoding == "br" and brotli is None:
+                    continue
+                server.compressor = compressor_for(encoding, brotli)
+                size, cold, warm = measure(server, client, path, encoding, args.iterations)
+                link = size * 8 / args.kbps
+                print(
+                    f"{name:<11} {encoding:<9} {size:>8} {cold:>8.2f}"
+                    f" {warm:>8.2f} {link:>8.1f} {warm + link:>9.1f}"
+                )
+        compression.brotli = brotli
+
+
+if __name__ == "__main__":
+    main()
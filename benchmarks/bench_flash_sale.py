@@ -0,0 +1,104 @@
+"""
+Benchmark tail latency of a flash sale, synchronous path against the pipeline
+
+Run with: python -m benchmarks.bench_flash_sale --threads 64 --bookings 20
+
+Every thread is a secretary released at the same instant on one hot
+competition, booking one place at a time for a random club. The "sync" mode
+calls BookingEngine.book() from each thread, as purchasePlaces does by
+default; the "pipeline" mode goes through BookingPipeline, which coalesces
+the burst into micro-batches applied by a single writer. Latency is measured
+per booking, from the call until its result is known.
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_booking_threads import make_storage
+from gudlft.booking import BookingEngine, BookingError
+from gudlft.pipeline import BookingPipeline
+
+MODES = ("sync", "pipeline")
+
+
+def percentile(samples, fraction):
+    """Return the sample below which `fraction` of the sorted samples fall"""
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def run(mode, kind, threads, bookings, n_clubs, max_batch):
+    """Return (sorted latencies in seconds, elapsed seconds, rejected) for one mode"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = make_storage(kind, n_clubs, 1, tmp)
+        registry = storage.registry
+        engine = BookingEngine(registry, storage=storage)
+        pipeline = BookingPipeline(engine, max_batch=max_batch) if mode == "pipeline" else None
+        book = pipeline.book if pipeline is not None else engine.book
+        competition = registry.competitions[0]
+        latencies, rejected = [], [0]
+        barrier = threading.Barrier(threads + 1)
+
+        def secretary(seed):
+            rng = random.Random(seed)
+            own = []
+            barrier.wait()
+            for _ in range(bookings):
+                club = rng.choice(registry.clubs)
+                started = time.perf_counter()
+                try:
+                    book(club, competition, 1)
+                except BookingError:
+                    rejected[0] += 1
+                own.append(time.perf_counter() - started)
+            latencies.extend(own)
+
+        pool = [threading.Thread(target=secretary, args=(i,)) for i in range(threads)]
+        for thread in pool:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if pipeline is not None:
+            pipeline.close()
+        storage.close()
+    return sorted(latencies), elapsed, rejected[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--bookings", type=int, default=20, help="per thread")
+    parser.add_argument("--clubs", type=int, default=1000)
+    parser.add_argument("--storage", choices=("memory", "json", "sqlite"), default="json")
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<10} {'bookings/s':>10} {'p50 ms':>8} {'p95 ms':>8}"
+        f" {'p99 ms':>8} {'max ms':>8} {'rejected':>9}"
+    )
+    for mode in MODES:
+        latencies, elapsed, rejected = run(
+            mode, args.storage, args.threads, args.bookings, args.clubs, args.max_batch
+        )
+        cells = [
+            statistics.median(latencies),
+            percentile(latencies, 0.95),
+            percentile(latencies, 0.99),
+            latencies[-1],
+        ]
+        print(
+            f"{mode:<10} {len(latencies) / elapsed:>10.0f} "
+            + " ".join(f"{c * 1000:>8.2f}" for c in cells)
+            + f" {rejected:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark the booking ledger against scanning the booking history
+
+Run with: python -m benchmarks.bench_ledger --bookings 100000 1000000 3000000
+
+For each history size a journal archive of that many bookings is written,
+then:
+
+- rebuild: seconds to rebuild the ledger from the whole archive, what the
+  JSON storage does at startup when there is no ledger snapshot yet
+- snapshot: seconds to load the ledger snapshot (one row per pair) that
+  each flush writes, what startup costs afterwards
+- ledger check: microseconds per cap check, one dict lookup
+- scan check: microseconds per cap check summing the club's bookings in the
+  competition from the in-memory history, as a fix without the ledger would
+
+The ledger check stays flat as the history grows; the scan grows with it.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from gudlft.journal import BookingJournal
+from gudlft.jsonstream import RecordReader
+from gudlft.ledger import BookingLedger
+from gudlft.persistence import write_data_file
+
+
+def write_history(path, bookings, n_clubs, n_competitions, seed):
+    """Write `bookings` archived journal events for random pairs"""
+    rng = random.Random(seed)
+    with open(path, "w") as archive:
+        for seq in range(1, bookings + 1):
+            event = {
+                "seq": seq,
+                "timestamp": "2026-01-01 10:00:00",
+                "competition": f"Competition {rng.randrange(n_competitions)}",
+                "club": f"Club {rng.randrange(n_clubs)}",
+                "places": 1,
+                "numberOfPlaces": 0,
+                "points": 0,
+            }
+            archive.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+
+def run(bookings, n_clubs, n_competitions, checks, scans, seed):
+    """Return (rebuild s, snapshot s, ledger check us, scan check us) for one size"""
+    rng = random.Random(seed + 1)
+    pairs = [
+        (f"Club {rng.randrange(n_clubs)}", f"Competition {rng.randrange(n_competitions)}")
+        for _ in range(checks)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        journal_path = os.path.join(tmp, "bookings.journal")
+        write_history(f"{journal_path}.archive", bookings, n_clubs, n_competitions, seed)
+        journal = BookingJournal(journal_path, fsync=False)
+        started = time.perf_counter()
+        ledger = BookingLedger()
+        ledger.rebuild((e["club"], e["competition"], e["places"]) for e in journal.history())
+        rebuild = time.perf_counter() - started
+        history = [(e["club"], e["competition"], e["places"]) for e in journal.history()]
+        journal.close()
+
+        snapshot_path = f"{journal_path}.ledger"
+        write_data_file(snapshot_path, "bookings", ledger.records(), bookings)
+        started = time.perf_counter()
+        reader = RecordReader(snapshot_path, "bookings")
+        BookingLedger().rebuild((r["club"], r["competition"], r["places"]) for r in reader)
+        snapshot = time.perf_counter() - started
+
+    booked = ledger.booked
+    started = time.perf_counter()
+    for club, competition in pairs:
+        booked(club, competition)
+    ledger_us = (time.perf_counter() - started) / checks * 1e6
+
+    started = time.perf_counter()
+    for club, competition in pairs[:scans]:
+        sum(p for c, k, p in history if c == club and k == competition)
+    scan_us = (time.perf_counter() - started) / scans * 1e6
+    return rebuild, snapshot, ledger_us, scan_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--bookings", type=int, nargs="+", default=[100000, 1000000, 3000000]
+    )
+    parser.add_argument("--clubs", type=int, default=10000)
+    parser.add_argument("--competitions", type=int, default=1000)
+    parser.add_argument("--checks", type=int, default=100000)
+    parser.add_argument("--scans", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'bookings':>10} {'rebuild (s)':>12} {'snapshot (s)':>13}"
+        f" {'ledger (us)':>12} {'scan (us)':>12}"
+    )
+    for bookings in args.bookings:
+        rebuild, snapshot, ledger_us, scan_us = run(
+            bookings, args.clubs, args.competitions, args.checks, args.scans, args.seed
+        )
+        print(
+            f"{bookings:>10} {rebuild:>12.2f} {snapshot:>13.2f}"
+            f" {ledger_us:>12.3f} {scan_us:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark startup time and peak memory of the data file loaders
+
+Run with: python -m benchmarks.bench_loading --clubs 1000000 --competitions 1000
+
+A dataset is generated in both formats, then each loader fills a Registry
+in a fresh interpreter so its peak RSS (ru_maxrss) is measured alone:
+
+- json.load: the previous loader, which parses the whole document first
+- stream: the incremental reader on clubs.json/competitions.json
+- stream-ndjson: the incremental reader on the NDJSON variant
+
+"baseline" is an interpreter that imports everything and loads nothing;
+subtract it to get the memory the data itself costs.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import generate
+
+LOADERS = ("baseline", "json.load", "stream", "stream-ndjson")
+
+
+def legacy_read(path, key, record_type):
+    """The loader before streaming: json.load, then build the records"""
+    with open(path) as data:
+        document = json.load(data)
+    return [record_type.from_dict(r) for r in document[key]], document.get("journalSeq", 0)
+
+
+def child(loader, directory):
+    """Load the dataset with `loader`; print seconds and peak RSS (MB) as JSON"""
+    from gudlft.models import Club, Competition
+    from gudlft.registry import Registry
+    from gudlft.storage import read_clubs, read_competitions
+
+    registry = Registry()
+    started = time.perf_counter()
+    if loader == "json.load":
+        clubs = legacy_read(os.path.join(directory, "clubs.json"), "clubs", Club)
+        competitions = legacy_read(
+            os.path.join(directory, "competitions.json"), "competitions", Competition
+        )
+    elif loader != "baseline":
+        ext = "ndjson" if loader == "stream-ndjson" else "json"
+        clubs = read_clubs(os.path.join(directory, f"clubs.{ext}"))
+        competitions = read_competitions(os.path.join(directory, f"competitions.{ext}"))
+    if loader != "baseline":
+        registry.set_competitions(*competitions)
+        registry.set_clubs(*clubs)
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    scale = 1 / 1024 if sys.platform != "darwin" else 1 / 1024**2
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak, "clubs": len(registry.clubs)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clubs", type=int, default=1000000)
+    parser.add_argument("--competitions", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", nargs=2, metavar=("LOADER", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("json", "ndjson"):
+            for path in generate(tmp, args.clubs, args.competitions, args.seed, fmt=fmt):
+                print(f"{os.path.basename(path)}: {os.path.getsize(path) / 1e6:.1f} MB")
+        print(f"{'loader':<15} {'seconds':>9} {'peak RSS MB':>12}")
+        for loader in LOADERS:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_loading", "--child", loader, tmp],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output)
+            print(f"{loader:<15} {result['seconds']:>9.2f} {result['peak_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark memory per record and booking-path latency: dicts of strings vs models
+
+Run with: python -m benchmarks.bench_models --records 100000
+
+The "dict" representation is what json.load returns (every field a string);
+the booking path then converts points, places and the date on each call and
+writes strings back. The "model" representation parses once at load time.
+"""
+
+import argparse
+import timeit
+import tracemalloc
+from datetime import datetime
+
+from gudlft.models import DATE_FORMAT, Club, Competition
+
+
+def club_dicts(n):
+    """Return n clubs as json.load would"""
+    return [
+        {"name": f"Club {i}", "email": f"club{i}@example.com", "points": "1000000"}
+        for i in range(n)
+    ]
+
+
+def competition_dicts(n):
+    """Return n competitions as json.load would"""
+    return [
+        {"name": f"Competition {i}", "date": "2099-01-01 10:00:00", "numberOfPlaces": "1000000"}
+        for i in range(n)
+    ]
+
+
+def measure_bytes(build):
+    """Return the bytes allocated by build() and still alive afterwards"""
+    tracemalloc.start()
+    records = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current
+
+
+def book_dict(club, competition, places, now):
+    club_points = int(club["points"])
+    available_places = int(competition["numberOfPlaces"])
+    competition_date = datetime.strptime(competition["date"], DATE_FORMAT)
+    if competition_date < now or places > available_places or places > club_points:
+        return False
+    competition["numberOfPlaces"] = str(available_places - places)
+    club["points"] = str(club_points - places)
+    return True
+
+
+def book_model(club, competition, places, now):
+    if competition.date < now or places > competition.number_of_places or places > club.points:
+        return False
+    competition.number_of_places -= places
+    club.points -= places
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--bookings", type=int, default=100000)
+    args = parser.parse_args()
+    n = args.records
+
+    rows = [
+        ("club dict", lambda: club_dicts(n)),
+        ("club model", lambda: [Club.from_dict(c) for c in club_dicts(n)]),
+        ("competition dict", lambda: competition_dicts(n)),
+        ("competition model", lambda: [Competition.from_dict(c) for c in competition_dicts(n)]),
+    ]
+    print(f"Memory per record ({n} records)")
+    for label, build in rows:
+        print(f"  {label:<18} {measure_bytes(build) / n:>8.0f} bytes")
+
+    now = datetime.now()
+    club, competition = club_dicts(1)[0], competition_dicts(1)[0]
+    club_model, competition_model = Club.from_dict(club), Competition.from_dict(competition)
+    timings = [
+        ("dict", timeit.timeit(lambda: book_dict(club, competition, 1, now), number=args.bookings)),
+        (
+            "model",
+            timeit.timeit(
+                lambda: book_model(club_model, competition_model, 1, now), number=args.bookings
+            ),
+        ),
+    ]
+    print(f"Booking path latency ({args.bookings} bookings)")
+    for label, seconds in timings:
+        print(f"  {label:<18} {seconds / args.bookings * 1e6:>8.2f} us/booking")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark booking throughput with and without batched persistence
+
+Run with: python -m benchmarks.bench_persistence --clubs 10000 --bookings 500
+
+Each booking mutates one club and one competition in the registry and marks
+the writer dirty, exactly like purchasePlaces. The "write-through" case
+rewrites both JSON files on every booking (batch size 1); the other cases
+group-commit. The "journal" case appends one fsynced line per booking and
+only snapshots the JSON files once per batch.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from gudlft.journal import BookingJournal
+from gudlft.models import Club, Competition
+from gudlft.persistence import BatchedWriter, atomic_write_json
+from gudlft.registry import Registry
+
+
+def build_registry(n_clubs, n_competitions):
+    """Create a registry filled with synthetic clubs and competitions"""
+    registry = Registry()
+    registry.set_clubs(
+        [Club(f"Club {i}", f"club{i}@example.com", 1000000) for i in range(n_clubs)]
+    )
+    registry.set_competitions(
+        [
+            Competition(f"Competition {i}", datetime(2099, 1, 1, 10), 1000000)
+            for i in range(n_competitions)
+        ]
+    )
+    return registry
+
+
+def write_dataset(registry, directory):
+    """Write the registry as clubs.json/competitions.json; return both paths"""
+    clubs_path = f"{directory}/clubs.json"
+    competitions_path = f"{directory}/competitions.json"
+    atomic_write_json(clubs_path, {"clubs": [c.to_dict() for c in registry.clubs]})
+    atomic_write_json(
+        competitions_path,
+        {"competitions": [c.to_dict() for c in registry.competitions]},
+    )
+    return clubs_path, competitions_path
+
+
+def run(registry, bookings, flush_interval, batch_size, use_journal=False):
+    """Return bookings per second for one writer configuration"""
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = BookingJournal(f"{tmp}/bookings.journal") if use_journal else None
+        writer = BatchedWriter(
+            registry,
+            f"{tmp}/clubs.json",
+            f"{tmp}/competitions.json",
+            flush_interval=flush_interval,
+            batch_size=batch_size,
+            journal=journal,
+        ).start()
+        start = time.perf_counter()
+        for _ in range(bookings):
+            club = rng.choice(registry.clubs)
+            competition = rng.choice(registry.competitions)
+            club.points -= 1
+            competition.number_of_places -= 1
+            if journal is not None:
+                journal.append(
+                    competition.name,
+                    club.name,
+                    1,
+                    competition.number_of_places,
+                    club.points,
+                )
+            writer.mark_dirty()
+        elapsed = time.perf_counter() - start
+        writer.close()
+        if journal is not None:
+            journal.close()
+        return bookings / elapsed, writer.flush_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clubs", type=int, default=10000)
+    parser.add_argument("--competitions", type=int, default=100)
+    parser.add_argument("--bookings", type=int, default=500)
+    args = parser.parse_args()
+
+    registry = build_registry(args.clubs, args.competitions)
+    cases = [
+        ("write-through (batch=1)", 0, 1, False),
+        ("sync batch=10", 0, 10, False),
+        ("sync batch=100", 0, 100, False),
+        ("background 1s, batch=1000", 1.0, 1000, False),
+        ("journal + snapshot/1000", 0, 1000, True),
+    ]
+    print(f"{args.clubs} clubs, {args.competitions} competitions, {args.bookings} bookings")
+    for label, interval, batch, use_journal in cases:
+        rate, flushes = run(registry, args.bookings, interval, batch, use_journal)
+        print(f"{label:<28} {rate:>12.0f} bookings/s  ({flushes} flushes)")
+
+
+if __name__ == "__main__":
+    main()
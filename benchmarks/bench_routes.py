@@ -0,0 +1,215 @@
+"""
+In-process route microbenchmarks with a baseline file and regression gate
+
+Run with:
+    python -m benchmarks.bench_routes --clubs 10000           # measure
+    python -m benchmarks.bench_routes --clubs 10000 --save    # record the baseline
+    python -m benchmarks.bench_routes --clubs 10000 --check   # fail on regression
+
+A dataset of the requested size is generated (benchmarks.generate) and the
+app is loaded on it with persistence off. Each route is then timed through
+the Flask test client, so neither a live server nor Locust is needed.
+Results are keyed by dataset size in benchmarks/baseline.json. --check
+exits with status 1 when a route's throughput drops, or its p95 latency
+grows, by more than --threshold compared with the baseline.
+
+Baselines are machine-specific: record them on the machine that checks them.
+"""
+
+import argparse
+import json
+import os
+import random
+import secrets
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.generate import club_email, club_name, generate
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def load_server(directory):
+    """Import the app configured on the dataset in `directory`"""
+    os.environ.update(
+        GUDLFT_STORAGE="json",
+        GUDLFT_PERSISTENCE="false",
+        GUDLFT_SECRET_KEY=secrets.token_hex(16),
+        GUDLFT_CLUBS_FILE=os.path.join(directory, "clubs.json"),
+        GUDLFT_COMPETITIONS_FILE=os.path.join(directory, "competitions.json"),
+    )
+    import server
+
+    server.app.config.update(TESTING=True, WARMUP="eager")
+    server.createApp()
+    return server
+
+
+def scenarios(server, n_clubs, rng):
+    """Return {name: (request function, accepted status codes)}"""
+    client = server.app.test_client()
+    registry = server.registry
+    registry.advance_clock(datetime.now())
+    open_competitions = [
+        c.name for c in registry.competitions_page(0, 1000, open_only=True)[0]
+    ]
+    last_page = max(1, -(-n_clubs // server.app.config["PAGE_SIZE"]))
+
+    def club():
+        return rng.randrange(n_clubs)
+
+    # Booking pages need a logged-in club: spread them over a pool of sessions.
+    members = []
+    for _ in range(min(n_clubs, 50)):
+        member = server.app.test_client()
+        member.post("/showSummary", data={"email": club_email(club())})
+        members.append(member)
+
+    def booking():
+        return {
+            "club": club_name(club()),
+            "competition": rng.choice(open_competitions),
+            "places": 1,
+        }
+
+    def purchase():
+        return {"competition": rng.choice(open_competitions), "places": 1}
+
+    # The bulk endpoint is for admins only.
+    server.app.config["ADMIN_TOKEN"] = "benchmark"
+    admin = {"Authorization": "Bearer benchmark"}
+    etag = client.get("/api/points").headers["ETag"]
+    return {
+        "index": (lambda: client.get("/"), {200}),
+        "index_last_page": (lambda: client.get(f"/?page={last_page}"), {200}),
+        "index_search": (lambda: client.get(f"/?q=Club {club() // 100:05d}"), {200}),
+        "show_summary": (
+            lambda: client.post("/showSummary", data={"email": club_email(club())}),
+            {200},
+        ),
+        "book_page": (
+            lambda: rng.choice(members).get(f"/book/{rng.choice(open_competitions)}"),
+            {200},
+        ),
+        "api_points": (
+            lambda: client.get(f"/api/points?page={rng.randint(1, last_page)}"),
+            {200},
+        ),
+        "api_points_304": (
+            lambda: client.get("/api/points", headers={"If-None-Match": etag}),
+            {304},
+        ),
+        "api_competitions": (lambda: client.get("/api/competitions"), {200}),
+        "purchase_places": (
+            lambda: rng.choice(members).post("/purchasePlaces", data=purchase()),
+            {200},
+        ),
+        "bulk_booking_50": (
+            lambda: client.post(
+                "/api/bookings", json=[booking() for _ in range(50)], headers=admin
+            ),
+            {200},
+        ),
+    }
+
+
+def measure(request, accepted, iterations, warmup):
+    """Return ops/s, p50 and p95 (ms) for one scenario"""
+    for _ in range(warmup):
+        request()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = request()
+        timings.append(time.perf_counter() - start)
+        if response.status_code not in accepted:
+            raise RuntimeError(f"Unexpected status {response.status_code}")
+    quantiles = statistics.quantiles(timings, n=20)
+    return {
+        "ops_per_sec": round(len(timings) / sum(timings), 1),
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(quantiles[18] * 1000, 3),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regression messages, empty if every route is within bounds"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {result['ops_per_sec']} ops/s < baseline {base['ops_per_sec']}"
+            )
+        if result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']} ms > baseline {base['p95_ms']}"
+            )
+    return regressions
+
+
+def load_baselines(path):
+    """Return the recorded baselines, keyed by dataset"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clubs", type=int, default=10000)
+    parser.add_argument("--competitions", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--only", nargs="+", help="run only these scenarios")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--save", action="store_true", help="record results as baseline")
+    mode.add_argument("--check", action="store_true", help="fail on regression")
+    args = parser.parse_args()
+
+    dataset = f"{args.clubs}x{args.competitions}"
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(tmp, args.clubs, args.competitions, args.seed)
+        started = time.perf_counter()
+        server = load_server(tmp)
+        print(f"dataset {dataset}: loaded in {time.perf_counter() - started:.2f}s")
+
+    rng = random.Random(args.seed)
+    results = {}
+    print(f"{'scenario':<20} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, (request, accepted) in scenarios(server, args.clubs, rng).items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = measure(request, accepted, args.iterations, args.warmup)
+        r = results[name]
+        print(f"{name:<20} {r['ops_per_sec']:>10} {r['p50_ms']:>9} {r['p95_ms']:>9}")
+
+    baselines = load_baselines(args.baseline)
+    if args.save:
+        baselines[dataset] = {**baselines.get(dataset, {}), **results}
+        with open(args.baseline, "w") as out:
+            json.dump(baselines, out, indent=4, sort_keys=True)
+            out.write("\n")
+        print(f"baseline saved to {args.baseline}")
+    elif args.check:
+        if dataset not in baselines:
+            sys.exit(f"no baseline for {dataset}; record one with --save")
+        regressions = compare(results, baselines[dataset], args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regression beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark idle /events subscribers against gunicorn worker classes
+
+Run with: python -m benchmarks.bench_sse --subscribers 2000 --worker-class gevent gthread
+
+Starts `gunicorn "server:createApp()"` (see gunicorn.conf.py) with one worker
+of each class in turn, then opens --subscribers /events connections that
+stay idle. With them held open, it times --requests ordinary requests
+(/api/points) and makes one booking, then counts the subscribers that were
+served the stream and those that received the booking event. A worker that
+gives each subscriber a thread stops answering once its threads are taken.
+"""
+
+import argparse
+import http.client
+import os
+import secrets
+import selectors
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from benchmarks.bench_persistence import build_registry, write_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(worker_class, port, directory):
+    """Start one gunicorn worker of `worker_class`; wait until it answers"""
+    env = dict(
+        os.environ,
+        GUNICORN_WORKERS="1",
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUDLFT_SECRET_KEY=secrets.token_hex(16),
+        GUDLFT_STORAGE="sqlite",
+        GUDLFT_SQLITE_FILE=f"{directory}/gudlft.db",
+        GUDLFT_CLUBS_FILE=f"{directory}/clubs.json",
+        GUDLFT_COMPETITIONS_FILE=f"{directory}/competitions.json",
+    )
+    process = subprocess.Popen(
+        ["gunicorn", "server:createApp()"], cwd=ROOT, env=env, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/ready")
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("gunicorn did not start")
+
+
+def subscribe(port, count):
+    """Open `count` /events connections; return their sockets"""
+    sockets = []
+    for _ in range(count):
+        sock = socket.create_connection(("127.0.0.1", port))
+        sock.sendall(b"GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        sock.setblocking(False)
+        sockets.append(sock)
+    return sockets
+
+
+def received(sockets, marker, timeout):
+    """Return how many sockets received `marker` within `timeout` seconds"""
+    selector = selectors.DefaultSelector()
+    buffers = {}
+    for sock in sockets:
+        selector.register(sock, selectors.EVENT_READ)
+        buffers[sock] = b""
+    found = 0
+    deadline = time.monotonic() + timeout
+    while buffers and time.monotonic() < deadline:
+        for key, _ in selector.select(max(0, deadline - time.monotonic())):
+            sock = key.fileobj
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                data = b""
+            buffers[sock] += data
+            if marker in buffers[sock] or not data:
+                found += marker in buffers[sock]
+                selector.unregister(sock)
+                del buffers[sock]
+    selector.close()
+    return found
+
+
+def timed_requests(port, count, timeout):
+    """Return the latencies (s) of `count` GETs, None for those that timed out"""
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+            conn.request("GET", "/api/points")
+            conn.getresponse().read()
+            latencies.append(time.perf_counter() - started)
+        except OSError:
+            latencies.append(None)
+    return latencies
+
+
+def book(port, timeout):
+    """Log in as the first club and book one place; return True if it went through"""
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+        conn.request("POST", "/showSummary", urlencode({"email": "club0@example.com"}), headers)
+        response = conn.getresponse()
+        response.read()
+        cookie = response.getheader("Set-Cookie").split(";", 1)[0]
+        form = urlencode({"competition": "Competition 0", "places": 1})
+        conn.request("POST", "/purchasePlaces", form, dict(headers, Cookie=cookie))
+        return b"Great-booking complete!" in conn.getresponse().read()
+    except OSError:
+        return False
+
+
+def run(worker_class, args):
+    """Return (streams opened, p50 ms, timeouts, booked, events received)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_dataset(build_registry(100, 5), tmp)
+        server = start_server(worker_class, args.port, tmp)
+        sockets = []
+        try:
+            sockets = subscribe(args.port, args.subscribers)
+            opened = received(sockets, b"retry:", args.timeout)
+            latencies = timed_requests(args.port, args.requests, args.timeout)
+            booked = book(args.port, args.timeout)
+            events = received(sockets, b"event: booking", args.timeout) if booked else 0
+        finally:
+            for sock in sockets:
+                sock.close()
+            server.terminate()
+            server.wait()
+    answered = [latency for latency in latencies if latency is not None]
+    p50 = statistics.median(answered) * 1000 if answered else None
+    return opened, p50, len(latencies) - len(answered), booked, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--worker-class", nargs="+", default=["gevent", "gthread"])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=5078)
+    args = parser.parse_args()
+
+    print(f"{args.subscribers} idle subscribers, one worker")
+    print(
+        f"{'worker':<8} {'streams':>8} {'p50 ms':>8} {'timeouts':>9}"
+        f" {'booked':>7} {'events':>8}"
+    )
+    for worker_class in args.worker_class:
+        opened, p50, timeouts, booked, events = run(worker_class, args)
+        p50 = f"{p50:.2f}" if p50 is not None else "-"
+        print(
+            f"{worker_class:<8} {opened:>8} {p50:>8} {timeouts:>9}"
+            f" {str(booked):>7} {events:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark import time and time-to-first-request for each warm-up mode
+
+Run with: python -m benchmarks.bench_startup --clubs 1000000 --competitions 1000
+
+Each mode runs in a fresh interpreter on a generated dataset:
+
+- import: `import server` alone, which no longer reads the data
+- eager: createApp() loads before returning, as the import used to
+- lazy: the first request pays for the load
+- background: createApp() starts the warm-up thread and returns
+
+Times are seconds since the interpreter was launched: until the import
+is done, until createApp() returns (the process can accept connections),
+and until the first GET / has answered.
+"""
+
+import argparse
+import json
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import generate
+
+MODES = ("import", "eager", "lazy", "background")
+
+
+def child(mode, started):
+    """Run one startup in this interpreter; print timings as JSON"""
+    import server
+
+    result = {"import": time.time() - started}
+    if mode != "import":
+        server.app.config["WARMUP"] = mode
+        client = server.createApp().test_client()
+        result["app"] = time.time() - started
+        assert client.get("/").status_code == 200
+        result["first_request"] = time.time() - started
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clubs", type=int, default=1000000)
+    parser.add_argument("--competitions", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--started", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.started)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clubs_path, competitions_path = generate(
+            tmp, args.clubs, args.competitions, args.seed
+        )
+        env = dict(
+            os.environ,
+            GUDLFT_PERSISTENCE="false",
+            GUDLFT_SECRET_KEY=secrets.token_hex(16),
+            GUDLFT_STORAGE="json",
+            GUDLFT_CLUBS_FILE=clubs_path,
+            GUDLFT_COMPETITIONS_FILE=competitions_path,
+        )
+        print(f"{'mode':<12} {'import':>8} {'app':>8} {'first request':>14}")
+        for mode in MODES:
+            command = [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode]
+            output = subprocess.run(
+                command + ["--started", repr(time.time())],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output)
+            columns = [result.get(key) for key in ("import", "app", "first_request")]
+            cells = [f"{c:.2f}" if c is not None else "-" for c in columns]
+            print(f"{mode:<12} {cells[0]:>8} {cells[1]:>8} {cells[2]:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark cold-start first-request latency per template
+
+Run with: python -m benchmarks.bench_templates --repeat 5
+
+Each mode starts fresh interpreters over a small generated dataset, creates
+the app, then times the first request rendering each page template, and a
+second one for reference:
+
+- lazy: no bytecode cache, no precompile (how Flask behaves by default)
+- bytecode: templates compiled on first use, loaded from a warm bytecode cache
+- precompile: every template compiled by createApp(), no bytecode cache
+- both: createApp() precompiles from a warm bytecode cache (the default)
+
+"startup" is how long createApp() took, i.e. what precompiling moved out of
+the requests. Times are medians over --repeat interpreters, in milliseconds.
+"""
+
+import argparse
+import json
+import os
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import club_email, competition_name, generate
+
+# (template, method, path, form) of a request that renders it first; the
+# login comes before the booking page, which needs a logged-in club
+PAGES = (
+    ("welcome.html", "POST", "/showSummary", {"email": club_email(0)}),
+    ("booking.html", "GET", f"/book/{competition_name(0)}", None),
+    ("index.html", "GET", "/", None),
+)
+
+# mode: (bytecode cache, precompile)
+MODES = {
+    "lazy": (False, False),
+    "bytecode": (True, False),
+    "precompile": (False, True),
+    "both": (True, True),
+}
+
+
+def child():
+    """Start the app in this interpreter; print startup and request times as JSON"""
+    import server
+
+    started = time.perf_counter()
+    client = server.createApp().test_client()
+    result = {"startup": time.perf_counter() - started}
+    for template, method, path, form in PAGES:
+        timings = []
+        for _ in range(2):
+            started = time.perf_counter()
+            response = client.open(path, method=method, data=form)
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 200, (path, response.status_code)
+        result[template] = timings
+    print(json.dumps(result))
+
+
+def run(env, repeat):
+    """Return median {startup, template: (first, second)} over `repeat` runs"""
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_templates", "--child"],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output))
+    summary = {"startup": statistics.median(r["startup"] for r in results)}
+    for template, *_ in PAGES:
+        summary[template] = tuple(
+            statistics.median(r[template][i] for r in results) for i in range(2)
+        )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clubs_path, competitions_path = generate(
+            os.path.join(tmp, "data"), 100, 10, past_ratio=0
+        )
+        base = dict(
+            os.environ,
+            GUDLFT_PERSISTENCE="false",
+            GUDLFT_SECRET_KEY=secrets.token_hex(16),
+            GUDLFT_STORAGE="json",
+            GUDLFT_WARMUP="eager",
+            GUDLFT_METRICS="false",
+            GUDLFT_CLUBS_FILE=clubs_path,
+            GUDLFT_COMPETITIONS_FILE=competitions_path,
+            GUDLFT_TEMPLATE_CACHE_DIR=os.path.join(tmp, "jinja"),
+        )
+        # Fill the bytecode cache, as the first process after a deploy does.
+        run(dict(base, GUDLFT_TEMPLATE_CACHE="true"), 1)
+
+        header = " ".join(f"{template:>22}" for template, *_ in PAGES)
+        print(f"{'mode':<11} {'startup':>8} {header}")
+        for mode, (cache, precompile) in MODES.items():
+            env = dict(
+                base,
+                GUDLFT_TEMPLATE_CACHE=str(cache).lower(),
+                GUDLFT_PRECOMPILE_TEMPLATES=str(precompile).lower(),
+            )
+            summary = run(env, args.repeat)
+            cells = " ".join(
+                f"{summary[t][0] * 1000:>10.2f} (then {summary[t][1] * 1000:>4.2f})"
+                for t, *_ in PAGES
+            )
+            print(f"{mode:<11} {summary['startup'] * 1000:>8.2f} {cells}")
+
+
+if __name__ == "__main__":
+    main()
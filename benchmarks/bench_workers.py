@@ -0,0 +1,146 @@
+"""
+Benchmark throughput as gunicorn workers are added
+
+Run with: python -m benchmarks.bench_workers --workers 1 2 4 --duration 10
+
+Starts `gunicorn "server:createApp()"` (see gunicorn.conf.py) on a synthetic dataset in
+the SQLite storage and drives it from --clients load processes. Each request
+either logs in as a random club and books one place (--book-ratio) or reads
+a points board page. The
+competitions only hold --places places each, so workers race for the last
+ones; after every run the database is checked for overselling and each
+"booking complete" response is matched with a booking row.
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import secrets
+import sqlite3
+import subprocess
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from benchmarks.bench_persistence import build_registry, write_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(workers, port, directory):
+    """Start gunicorn on the dataset in `directory` and wait until it answers"""
+    env = dict(
+        os.environ,
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUDLFT_SECRET_KEY=secrets.token_hex(16),
+        GUDLFT_STORAGE="sqlite",
+        GUDLFT_SQLITE_FILE=f"{directory}/gudlft.db",
+        GUDLFT_CLUBS_FILE=f"{directory}/clubs.json",
+        GUDLFT_COMPETITIONS_FILE=f"{directory}/competitions.json",
+    )
+    process = subprocess.Popen(
+        ["gunicorn", "server:createApp()"], cwd=ROOT, env=env, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/ready")
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("gunicorn did not start")
+
+
+def client(port, duration, book_ratio, clubs, competitions, seed):
+    """Send requests for `duration` seconds; return (requests, bookings made)"""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    requests = booked = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        if rng.random() < book_ratio:
+            # Log in as a random club, then book with its session cookie.
+            login = urlencode({"email": rng.choice(clubs)})
+            conn.request("POST", "/showSummary", login, headers)
+            response = conn.getresponse()
+            response.read()
+            cookie = response.getheader("Set-Cookie").split(";", 1)[0]
+            form = {"competition": rng.choice(competitions), "places": 1}
+            conn.request(
+                "POST", "/purchasePlaces", urlencode(form), dict(headers, Cookie=cookie)
+            )
+            booked += b"Great-booking complete!" in conn.getresponse().read()
+        else:
+            conn.request("GET", f"/api/points?page={rng.randint(1, 20)}")
+            conn.getresponse().read()
+        requests += 1
+    return requests, booked
+
+
+def check(database, initial_places, booked):
+    """Return True if the database agrees with what the clients were told"""
+    conn = sqlite3.connect(database)
+    rows, places = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(places), 0) FROM bookings"
+    ).fetchone()
+    remaining, lowest = conn.execute(
+        "SELECT SUM(number_of_places), MIN(number_of_places) FROM competitions"
+    ).fetchone()
+    conn.close()
+    return rows == booked and initial_places - remaining == places and lowest >= 0
+
+
+def run(workers, args, port):
+    """Return (requests/s, bookings, consistent) for one worker count"""
+    registry = build_registry(args.clubs, args.competitions)
+    for competition in registry.competitions:
+        competition.number_of_places = args.places
+    clubs = [club.email for club in registry.clubs]
+    competitions = [competition.name for competition in registry.competitions]
+    with tempfile.TemporaryDirectory() as tmp:
+        write_dataset(registry, tmp)
+        server = start_server(workers, port, tmp)
+        try:
+            jobs = [
+                (port, args.duration, args.book_ratio, clubs, competitions, seed)
+                for seed in range(args.clients)
+            ]
+            with multiprocessing.Pool(args.clients) as pool:
+                results = pool.starmap(client, jobs)
+        finally:
+            server.terminate()
+            server.wait()
+        requests = sum(r for r, _ in results)
+        booked = sum(b for _, b in results)
+        consistent = check(f"{tmp}/gudlft.db", args.places * args.competitions, booked)
+    return requests / args.duration, booked, consistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--book-ratio", type=float, default=0.5)
+    parser.add_argument("--clubs", type=int, default=1000)
+    parser.add_argument("--competitions", type=int, default=20)
+    parser.add_argument("--places", type=int, default=500)
+    parser.add_argument("--port", type=int, default=5077)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores, {args.clients} client processes")
+    print(f"{'workers':>7} {'requests/s':>12} {'bookings':>10}  consistent")
+    for workers in args.workers:
+        rate, booked, consistent = run(workers, args, args.port)
+        print(f"{workers:>7} {rate:>12.0f} {booked:>10}  {consistent}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare two headless Locust runs, row by row, from their CSV stats files
+
+Run with: python -m benchmarks.compare_locust old_stats.csv new_stats.csv
+
+Both files are the *_stats.csv written by `locust --headless --csv PREFIX`.
+Rows are matched on (Type, Name), so request groups and the BOOKING outcome
+rows from locustfile.py line up between builds. For each row the request
+count, throughput, median and p95 are printed with the relative change.
+With --threshold, the command exits with status 1 when a row's p95 grows,
+or its throughput drops, by more than that fraction.
+"""
+
+import argparse
+import csv
+import sys
+
+
+def read_stats(path):
+    """Return {(type, name): row} from a Locust *_stats.csv file"""
+    with open(path, newline="") as stats:
+        return {
+            (row["Type"], row["Name"]): row
+            for row in csv.DictReader(stats)
+            if row["Name"] != "Aggregated"
+        }
+
+
+def _number(row, column):
+    value = row.get(column) or "0"
+    return 0.0 if value == "N/A" else float(value)
+
+
+def _change(old, new):
+    if not old:
+        return "    n/a"
+    return f"{(new - old) / old:+7.1%}"
+
+
+def compare(old, new, threshold=None):
+    """Return (report lines, regression messages) for two stats tables"""
+    lines = [
+        f"{'type':<8} {'name':<36} {'count':>8} {'req/s':>8} {'':>7} "
+        f"{'median':>8} {'':>7} {'p95':>8} {'':>7}"
+    ]
+    regressions = []
+    for key in sorted(set(old) | set(new)):
+        kind, name = key
+        if key not in old or key not in new:
+            lines.append(f"{kind:<8} {name:<36} only in {'new' if key in new else 'old'} run")
+            continue
+        before, after = old[key], new[key]
+        rps = _number(before, "Requests/s"), _number(after, "Requests/s")
+        median = (
+            _number(before, "Median Response Time"),
+            _number(after, "Median Response Time"),
+        )
+        p95 = _number(before, "95%"), _number(after, "95%")
+        lines.append(
+            f"{kind:<8} {name:<36} {int(_number(after, 'Request Count')):>8} "
+            f"{rps[1]:>8.2f} {_change(*rps)} {median[1]:>8.0f} {_change(*median)} "
+            f"{p95[1]:>8.0f} {_change(*p95)}"
+        )
+        if threshold is None:
+            continue
+        if p95[0] and p95[1] > p95[0] * (1 + threshold):
+            regressions.append(f"{kind} {name}: p95 {p95[1]:.0f} ms > {p95[0]:.0f} ms")
+        if rps[0] and rps[1] < rps[0] * (1 - threshold):
+            regressions.append(f"{kind} {name}: {rps[1]:.2f} req/s < {rps[0]:.2f}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, help="fail on regression beyond this")
+    args = parser.parse_args()
+
+    lines, regressions = compare(read_stats(args.old), read_stats(args.new), args.threshold)
+    print("\n".join(lines))
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Generate synthetic clubs.json/competitions.json files of any size
+
+Run with: python -m benchmarks.generate --clubs 100000 --competitions 1000 --out /tmp/data
+
+--format ndjson writes clubs.ndjson/competitions.ndjson, one record per line.
+
+Files use the same layout and string-typed fields as the repository's data,
+so the server loads them unchanged (GUDLFT_CLUBS_FILE/GUDLFT_COMPETITIONS_FILE).
+Records are written one at a time, so a million clubs never sit in memory.
+The same --seed always produces the same files.
+"""
+
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+from gudlft.jsonstream import is_ndjson
+from gudlft.models import DATE_FORMAT
+
+FIRST_DATE = datetime(2099, 1, 1, 9)
+
+
+def club_name(i):
+    """Return the name of the i-th generated club"""
+    return f"Club {i:07d}"
+
+
+def club_email(i):
+    """Return the email of the i-th generated club"""
+    return f"club{i}@example.com"
+
+
+def competition_name(i):
+    """Return the name of the i-th generated competition"""
+    return f"Competition {i:05d}"
+
+
+def _write_array(path, key, records):
+    with open(path, "w") as out:
+        if is_ndjson(path):
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+            return
+        out.write(f'{{"{key}": [\n')
+        for i, record in enumerate(records):
+            if i:
+                out.write(",\n")
+            out.write(json.dumps(record))
+        out.write("\n]}\n")
+
+
+def generate(
+    directory,
+    clubs,
+    competitions,
+    seed=0,
+    points=(1, 1000),
+    places=(10, 1000),
+    past_ratio=0.1,
+    fmt="json",
+):
+    """Write clubs.json and competitions.json into `directory`; return both paths
+
+    With fmt="ndjson" the files are clubs.ndjson and competitions.ndjson.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    clubs_path = os.path.join(directory, f"clubs.{fmt}")
+    competitions_path = os.path.join(directory, f"competitions.{fmt}")
+    _write_array(
+        clubs_path,
+        "clubs",
+        (
+            {
+                "name": club_name(i),
+                "email": club_email(i),
+                "points": str(rng.randint(*points)),
+            }
+            for i in range(clubs)
+        ),
+    )
+
+    def competition(i):
+        if rng.random() < past_ratio:
+            date = datetime(2020, 1, 1, 9) + timedelta(days=rng.randrange(365))
+        else:
+            date = FIRST_DATE + timedelta(hours=rng.randrange(24 * 365 * 5))
+        return {
+            "name": competition_name(i),
+            "date": date.strftime(DATE_FORMAT),
+            "numberOfPlaces": str(rng.randint(*places)),
+        }
+
+    _write_array(
+        competitions_path, "competitions", (competition(i) for i in range(competitions))
+    )
+    return clubs_path, competitions_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clubs", type=int, default=10000)
+    parser.add_argument("--competitions", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--past-ratio", type=float, default=0.1)
+    parser.add_argument("--format", choices=("json", "ndjson"), default="json")
+    parser.add_argument("--out", default="benchmark-data")
+    args = parser.parse_args()
+    paths = generate(
+        args.out,
+        args.clubs,
+        args.competitions,
+        args.seed,
+        past_ratio=args.past_ratio,
+        fmt=args.format,
+    )
+    for path in paths:
+        print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Core building blocks of the GUDLFT booking platform
+"""
@@ -0,0 +1,59 @@
+"""
+Fingerprinted URLs for the static folder
+
+Pages link their stylesheet as /static/<file>?v=<digest>, where the digest
+is a hash of the file's content. A response whose v matches the current
+digest can be cached by browsers and proxies for a year without being
+revalidated: an edited file gets a new digest, hence a new URL, on the next
+page rendered. Requests without v, or with an outdated one, keep Flask's
+default short-lived caching.
+
+Digests are computed once per file and process, so static files are meant
+to change with a deploy (which restarts the workers), not while serving.
+"""
+
+import hashlib
+import os
+import threading
+
+from flask import url_for
+
+# What "cached forever" means for a fingerprinted URL, in seconds
+ONE_YEAR = 365 * 24 * 3600
+
+
+class StaticAssets:
+    """Content digests of the files in a static folder"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def digest(self, filename):
+        """Return a short hash of `filename`'s content, or None if it is missing"""
+        digest = self._digests.get(filename)
+        if digest is None:
+            try:
+                with open(os.path.join(self.folder, filename), "rb") as asset:
+                    digest = hashlib.sha256(asset.read()).hexdigest()[:12]
+            except OSError:
+                return None
+            with self._lock:
+                self._digests[filename] = digest
+        return digest
+
+    def url(self, filename):
+        """Return the fingerprinted URL of `filename`, for templates"""
+        return url_for("static", filename=filename, v=self.digest(filename))
+
+    def cache_forever(self, response, filename, version):
+        """Give `response` long-lived cache headers if `version` is current"""
+        if response.status_code != 200 or version is None:
+            return
+        if version != self.digest(filename):
+            return
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = ONE_YEAR
+        response.cache_control.immutable = True
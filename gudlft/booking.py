@@ -0,0 +1,197 @@
+"""
+Thread-safe booking engine with lock striping
+
+A booking reads and writes one competition and one club. Instead of a global
+lock, each record name hashes onto one of a fixed pool of lock stripes and a
+booking holds only the (at most two) stripes it needs. Stripes are always
+acquired in ascending index order, so two bookings can never wait on each
+other in a cycle.
+
+Making the booking durable is delegated to a storage backend
+(gudlft.storage), which runs while the stripes are held.
+
+Records are looked up again by name once the stripes are held: a hot reload
+(gudlft.reload) may have replaced the ones a request resolved earlier. The
+reload itself holds every stripe while it swaps the data in.
+
+The 12-place cap counts every place a club already booked in the competition,
+read from the storage's BookingLedger (gudlft.ledger) in constant time.
+"""
+
+import contextlib
+import threading
+from datetime import datetime
+
+from gudlft.errors import BookingError
+from gudlft.ledger import MAX_PLACES_PER_COMPETITION
+from gudlft.metrics import noop
+from gudlft.storage.base import Storage
+
+__all__ = ["MAX_PLACES_PER_COMPETITION", "BookingEngine", "BookingError"]
+
+
+class BookingEngine:
+    """Validates and applies bookings against the registry"""
+
+    def __init__(self, registry, storage=None, broker=None, stripes=64, lap=noop):
+        self.registry = registry
+        self.storage = storage if storage is not None else Storage(registry)
+        self.broker = broker
+        # Phase clock of the current request (see gudlft.metrics)
+        self.lap = lap
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self.storage.pause_bookings = self.exclusive
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        """Hold every stripe: no booking runs until the block exits"""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def _current(self, club, competition):
+        """Return the registry's current records for this pair"""
+        current_club = self.registry.club_by_name(club.name)
+        current_competition = self.registry.competition_by_name(competition.name)
+        if current_club is None or current_competition is None:
+            raise BookingError("This club or competition no longer exists.")
+        return current_club, current_competition
+
+    def _stripes_for(self, competition, club):
+        """Return the stripe locks guarding this pair, in acquisition order"""
+        return self._stripes_for_many([(club, competition, 0)])
+
+    def _stripes_for_many(self, bookings):
+        """Return the stripe locks guarding every pair, in acquisition order"""
+        count = len(self._locks)
+        indexes = set()
+        for club, competition, _ in bookings:
+            indexes.add(hash(("competition", competition.name)) % count)
+            indexes.add(hash(("club", club.name)) % count)
+        return [self._locks[i] for i in sorted(indexes)]
+
+    def book(self, club, competition, places, now=None):
+        """Book `places` for `club`; raise BookingError if a rule is broken"""
+        locks = self._stripes_for(competition, club)
+        for lock in locks:
+            lock.acquire()
+        self.lap("lock")
+        try:
+            club, competition = self._current(club, competition)
+            self._validate(
+                competition,
+                places,
+                now or datetime.now(),
+                competition.number_of_places,
+                club.points,
+                self.storage.ledger.booked(club.name, competition.name),
+            )
+            self.lap("validate")
+            self.storage.commit_booking(club, competition, places)
+            # Publish while still holding the stripes so per-record event
+            # order matches the order the changes were applied in.
+            self._publish(club, competition)
+            self.lap("mutate")
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        self.storage.after_commit()
+
+    def book_many(self, bookings, atomic=False, now=None):
+        """Book (club, competition, places) tuples under one lock acquisition
+
+        Each booking is checked against the effect of those before it, and
+        all accepted bookings reach the storage in a single commit. Returns
+        one BookingError or None per booking. Best-effort mode applies every
+        booking that passes; with `atomic`, one failure leaves all unapplied.
+        """
+        locks = self._stripes_for_many(bookings)
+        for lock in locks:
+            lock.acquire()
+        self.lap("lock")
+        try:
+            errors, resolved = [], []
+            for club, competition, places in bookings:
+                try:
+                    club, competition = self._current(club, competition)
+                    errors.append(None)
+                except BookingError as error:
+                    errors.append(error)
+                resolved.append((club, competition, places))
+            bookings = resolved
+            errors = self._validate_many(bookings, now or datetime.now(), errors)
+            self.lap("validate")
+            if atomic and any(errors):
+                return errors
+            accepted = [b for b, error in zip(bookings, errors) if error is None]
+            conflicts = iter(self.storage.commit_bookings(accepted, atomic))
+            errors = [error or next(conflicts) for error in errors]
+            if atomic and any(errors):
+                return errors
+            for (club, competition, _), error in zip(bookings, errors):
+                if error is None:
+                    self._publish(club, competition)
+            self.lap("mutate")
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        self.storage.after_commit(errors.count(None))
+        return errors
+
+    def _validate_many(self, bookings, now, errors):
+        places_left, points_left, booked = {}, {}, {}
+        ledger = self.storage.ledger
+        for i, (club, competition, places) in enumerate(bookings):
+            if errors[i] is not None:
+                continue
+            pair = (club.name, competition.name)
+            left = places_left.get(competition.name, competition.number_of_places)
+            points = points_left.get(club.name, club.points)
+            already = booked.get(pair)
+            if already is None:
+                already = ledger.booked(*pair)
+            try:
+                self._validate(competition, places, now, left, points, already)
+            except BookingError as error:
+                errors[i] = error
+                continue
+            places_left[competition.name] = left - places
+            points_left[club.name] = points - places
+            booked[pair] = already + places
+        return errors
+
+    def _validate(self, competition, places, now, places_left, points_left, booked=0):
+        if places < 1:
+            # A negative booking would hand out points and places.
+            raise BookingError("Places must be a positive integer.")
+        if competition.date < now:
+            raise BookingError("You cannot book places for a past competition.")
+        if places > places_left:
+            raise BookingError(
+                f"Not enough places available! Only {places_left} places remaining."
+            )
+        if booked + places > MAX_PLACES_PER_COMPETITION:
+            message = (
+                f"You cannot book more than {MAX_PLACES_PER_COMPETITION} places per competition."
+            )
+            if booked:
+                message += f" You have already booked {booked}."
+            raise BookingError(message)
+        if places > points_left:
+            raise BookingError(f"You don't have enough points! You have {points_left} points.")
+
+    def _publish(self, club, competition):
+        if self.broker is not None:
+            self.broker.publish(
+                "booking",
+                {
+                    "competition": competition.name,
+                    "numberOfPlaces": competition.number_of_places,
+                    "club": club.name,
+                    "points": club.points,
+                },
+            )
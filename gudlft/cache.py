@@ -0,0 +1,46 @@
+"""
+Cache of rendered template fragments
+
+Fragments such as the club points table only change when the registry does,
+so they are cached in rendered form under a key that includes the registry
+version. A booking bumps the version, the next request misses and re-renders,
+and stale entries age out of the bounded LRU.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """Bounded, thread-safe LRU of rendered fragments"""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        """Return the fragment cached under `key`, calling render() on a miss"""
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+        # Render outside the lock: a concurrent miss renders twice, which is
+        # cheaper than making every reader wait on one render.
+        fragment = render()
+        with self._lock:
+            self._entries[key] = fragment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        """Drop every cached fragment"""
+        with self._lock:
+            self._entries.clear()
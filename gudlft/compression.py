@@ -0,0 +1,94 @@
+"""
+Compression of large text responses
+
+The pages and API listings are verbose text that compresses several times
+over, and for clubs on slow links the transfer, not the server, dominates
+the page time. Compressor encodes a response body with brotli when the
+client accepts it and the optional brotli package is installed, with gzip
+otherwise. Bodies below a size threshold are sent as they are: the headers
+would eat most of the saving.
+
+Compressing costs more CPU than rendering a cached page, so responses that
+are fully determined by a version key (the registry version and the query)
+are compressed once per encoding and kept in a FragmentCache. A booking
+bumps the version and the stale entries age out of the LRU.
+
+Streamed responses (the event stream) and files sent straight from disk
+(static assets) are never compressed here.
+"""
+
+import gzip
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+from gudlft.cache import FragmentCache
+
+# Media types worth compressing, besides text/*
+COMPRESSIBLE_TYPES = {"application/json", "application/javascript"}
+
+
+def compressible(response):
+    """Return True if `response`'s body can be encoded here"""
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return False
+    if "Content-Encoding" in response.headers:
+        return False
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def encoded_etags(etag, codings=("br", "gzip")):
+    """Return `etag` and the variants that Compressor.compress() sends for it"""
+    return [etag] + [f"{etag}-{coding}" for coding in codings]
+
+
+class Compressor:
+    """Encodes response bodies of at least `min_size` bytes with brotli or gzip"""
+
+    def __init__(self, min_size=1024, cache_size=128, gzip_level=6, brotli_quality=5):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.codings = ("br", "gzip") if brotli is not None else ("gzip",)
+        self.cache = FragmentCache(cache_size)
+
+    def negotiate(self, accept_encodings):
+        """Return the best coding the client accepts, or None to send it as is"""
+        return accept_encodings.best_match(self.codings)
+
+    def encode(self, body, coding):
+        """Return `body` encoded with `coding`"""
+        if coding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def compress(self, response, accept_encodings, key=None):
+        """Encode `response` in place if it is worth it and the client agrees
+
+        `key` identifies a response that only changes with it, such as
+        (name, registry version, query): its encoded body is cached under it.
+        """
+        if not compressible(response):
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        # The body depends on Accept-Encoding from here, encoded or not.
+        response.vary.add("Accept-Encoding")
+        coding = self.negotiate(accept_encodings)
+        if coding is None:
+            return response
+        if key is None:
+            encoded = self.encode(body, coding)
+        else:
+            encoded = self.cache.get_or_render((key, coding), lambda: self.encode(body, coding))
+        response.set_data(encoded)
+        response.headers["Content-Encoding"] = coding
+        etag, weak = response.get_etag()
+        if etag is not None:
+            # Another representation: it must not validate as the identity one.
+            response.set_etag(f"{etag}-{coding}", weak)
+        return response
@@ -0,0 +1,7 @@
+"""
+Exceptions shared by the booking engine and the storage backends
+"""
+
+
+class BookingError(Exception):
+    """Raised when a booking breaks a business rule; the message is user-facing"""
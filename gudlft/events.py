@@ -0,0 +1,149 @@
+"""
+Server-sent events broker for live places and points updates
+
+Every committed booking is published once into a bounded ring buffer shared by
+all subscribers. Subscribers keep only a cursor (the last event id they sent)
+and sleep on a single condition variable, so publishing is O(1) whatever the
+audience and idle subscribers cost no queue and no dedicated thread of their
+own; under a gevent worker each one is just a parked greenlet.
+
+Worker processes sharing the SQLite storage do not see each other's
+bookings, so there each broker is fed by a StorageFeed instead of the
+booking engine: it polls the database and publishes every booking committed
+by any worker, numbered by the database revision. Event ids are then the
+same on every worker, and a client can resume on any of them.
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class EventBroker:
+    """Fan-out of booking events through a shared, bounded history"""
+
+    def __init__(self, history=1024):
+        self.history = history
+        self._events = deque(maxlen=history)
+        self._last_id = 0
+        self._condition = threading.Condition()
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def after_fork(self):
+        """Replace the condition, which a thread may have held during fork()"""
+        self._condition = threading.Condition()
+
+    def publish(self, event, data, event_id=None):
+        """Append one event for every subscriber and return its id
+
+        Ids count up from 1 unless `event_id` is given, e.g. a database
+        revision; events of one revision may share it.
+        """
+        payload = json.dumps(data, separators=(",", ":"))
+        with self._condition:
+            self._last_id = self._last_id + 1 if event_id is None else event_id
+            self._events.append((self._last_id, event, payload))
+            self._condition.notify_all()
+            return self._last_id
+
+    def events_after(self, last_id):
+        """Return buffered events newer than `last_id`, oldest first"""
+        with self._condition:
+            return [entry for entry in self._events if entry[0] > last_id]
+
+    def wait(self, last_id, timeout):
+        """Block until an event newer than `last_id` exists or `timeout` expires"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_id > last_id, timeout)
+            return [entry for entry in self._events if entry[0] > last_id]
+
+    def stream(self, last_id=None, heartbeat=15.0, retry_ms=3000):
+        """Yield SSE-formatted chunks, resuming after `last_id` when given"""
+        cursor = self._last_id if last_id is None else last_id
+        yield f"retry: {retry_ms}\n\n"
+        while True:
+            entries = self.wait(cursor, heartbeat)
+            if not entries:
+                # Comment lines keep proxies from closing idle connections.
+                yield ": keepalive\n\n"
+                continue
+            for event_id, event, payload in entries:
+                yield f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"
+            cursor = entries[-1][0]
+
+
+class StorageFeed:
+    """Publishes into a broker the bookings every process commits to a storage
+
+    `storage.booking_changes(revision)` returns the current revision and
+    (revision, club, points, competition, numberOfPlaces) for each
+    (club, competition) pair booked since `revision`. A background thread
+    polls it every `interval` seconds.
+    """
+
+    def __init__(self, storage, broker, interval=0.5):
+        self.storage = storage
+        self.broker = broker
+        self.interval = interval
+        self.revision = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Publish the latest changes, then keep polling in a thread; return self"""
+        with self._start_lock:
+            if self._thread is None:
+                # Start with what the history can hold, so that clients
+                # reconnecting from another worker find their missed events.
+                self.revision = 0
+                self.poll()
+                self._thread = threading.Thread(
+                    target=self._run, name="gudlft-feed", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def poll(self):
+        """Publish the bookings committed since the last poll; return how many"""
+        revision, changes = self.storage.booking_changes(
+            self.revision, limit=self.broker.history
+        )
+        for event_id, club, points, competition, places in changes:
+            self.broker.publish(
+                "booking",
+                {
+                    "competition": competition,
+                    "numberOfPlaces": places,
+                    "club": club,
+                    "points": points,
+                },
+                event_id=event_id,
+            )
+        self.revision = revision
+        return len(changes)
+
+    def after_fork(self):
+        """Forget the polling thread, which does not survive fork()"""
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Polling the storage for bookings failed, will retry")
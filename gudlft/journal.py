@@ -0,0 +1,193 @@
+"""
+Append-only journal of booking events
+
+Every committed booking appends one JSON line holding the competition, the
+club, the places booked, a timestamp and the resulting numberOfPlaces,
+points and places "booked" by the club in the competition so far.
+Appending a line is far cheaper than rewriting the data files, so the
+journal makes each booking durable while the BatchedWriter only snapshots
+the registry periodically.
+
+Snapshots record the last sequence number they include as "journalSeq";
+compaction then moves the covered events to an archive file, which keeps the
+active journal (and startup replay) short while preserving the audit trail.
+Events carry absolute values, so replaying one twice is harmless. The
+booking ledger is snapshotted every few data snapshots, and compaction
+keeps the events after its last one; without a ledger snapshot, it is
+rebuilt from the archive plus the journal, which hold every booking ever
+made.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+from gudlft.persistence import fsync_directory
+
+logger = logging.getLogger(__name__)
+
+
+class BookingJournal:
+    """NDJSON booking log with sequence numbers, replay and compaction"""
+
+    def __init__(self, path, fsync=True, after_seq=0):
+        """Open the journal at `path`, numbering new events after every known one
+
+        Compaction can leave the active journal empty, so the next sequence
+        number also accounts for the archive and for `after_seq`, the
+        highest journalSeq of the loaded snapshots: reusing a number the
+        snapshots already cover would make replay skip the new event.
+        """
+        self.path = path
+        self.archive_path = f"{path}.archive"
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.last_seq = max(after_seq, self._archived_seq())
+        for event in self.read():
+            self.last_seq = max(self.last_seq, event["seq"])
+        self._synced_seq = self.last_seq
+        self._file = open(path, "a")
+
+    def append(self, competition, club, places, numberOfPlaces, points, booked=None):
+        """Durably record one booking and return its sequence number"""
+        return self.append_many(
+            [(competition, club, places, numberOfPlaces, points, booked)]
+        )
+
+    def append_many(self, bookings):
+        """Durably record (competition, club, places, numberOfPlaces, points, booked)
+
+        `booked`, the club's total in the competition, may be left out. All
+        lines are written before a single fsync; returns the last sequence
+        number.
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            seq = self.last_seq
+            for competition, club, places, numberOfPlaces, points, *booked in bookings:
+                seq += 1
+                event = {
+                    "seq": seq,
+                    "timestamp": timestamp,
+                    "competition": competition,
+                    "club": club,
+                    "places": places,
+                    "numberOfPlaces": numberOfPlaces,
+                    "points": points,
+                }
+                if booked and booked[0] is not None:
+                    event["booked"] = booked[0]
+                self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+            self._file.flush()
+            self.last_seq = seq
+        if self.fsync:
+            self._sync(seq)
+        return seq
+
+    def _sync(self, seq):
+        """Group commit: one fsync makes every line written so far durable"""
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            target = self.last_seq
+            os.fsync(self._file.fileno())
+            self._synced_seq = target
+
+    def _archived_seq(self):
+        """Return the sequence number of the last archived event, 0 if none"""
+        if not os.path.exists(self.archive_path):
+            return 0
+        with open(self.archive_path, "rb") as archive:
+            archive.seek(0, os.SEEK_END)
+            # Archived events are small: the last complete one is in the tail.
+            archive.seek(max(0, archive.tell() - 65536))
+            lines = archive.read().splitlines()
+        for line in reversed(lines):
+            try:
+                return json.loads(line)["seq"]
+            except (ValueError, KeyError):
+                continue
+        return 0
+
+    def read(self, after_seq=0):
+        """Yield journal events with a sequence number above `after_seq`"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as journal:
+            for line in journal:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Only the last line can be torn by a crash mid-append.
+                    logger.warning("Ignoring truncated journal line in %s", self.path)
+                    break
+                if event["seq"] > after_seq:
+                    yield event
+
+    def history(self):
+        """Yield every event ever journaled, the archived ones first"""
+        last_seq = 0
+        for path in (self.archive_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path) as events:
+                for line in events:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        logger.warning("Ignoring truncated journal line in %s", path)
+                        break
+                    # A crash mid-compaction can leave events in both files.
+                    if event["seq"] > last_seq:
+                        last_seq = event["seq"]
+                        yield event
+
+    def replay(self, registry):
+        """Apply events newer than the loaded snapshots; return how many were applied"""
+        applied = 0
+        after = min(registry.clubs_seq, registry.competitions_seq)
+        for event in self.read(after):
+            competition = registry.competition_by_name(event["competition"])
+            club = registry.club_by_name(event["club"])
+            if competition is not None and event["seq"] > registry.competitions_seq:
+                registry.update_competition(
+                    competition, number_of_places=int(event["numberOfPlaces"])
+                )
+            if club is not None and event["seq"] > registry.clubs_seq:
+                registry.update_club(club, points=int(event["points"]))
+            applied += 1
+        return applied
+
+    def compact(self, upto_seq):
+        """Archive events up to `upto_seq` and keep only the tail in the journal"""
+        with self._sync_lock, self._lock:
+            covered, tail = [], []
+            for event in self.read():
+                (covered if event["seq"] <= upto_seq else tail).append(event)
+            if not covered:
+                return 0
+            with open(self.archive_path, "a") as archive:
+                for event in covered:
+                    archive.write(json.dumps(event, separators=(",", ":")) + "\n")
+                archive.flush()
+                os.fsync(archive.fileno())
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as tmp:
+                for event in tail:
+                    tmp.write(json.dumps(event, separators=(",", ":")) + "\n")
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+            self._file = open(self.path, "a")
+            self._synced_seq = self.last_seq
+            return len(covered)
+
+    def close(self):
+        """Close the append handle"""
+        with self._sync_lock, self._lock:
+            self._file.close()
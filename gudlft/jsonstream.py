@@ -0,0 +1,186 @@
+"""
+Incremental readers for the clubs/competitions data files
+
+json.load() reads the whole file into one string, parses it into one big
+list of dicts, and only then are compact records built: at a few million
+clubs the dicts alone are several times the size of the records. The
+reader here pulls the file in fixed-size chunks and decodes the records of
+the array one at a time (JSONDecoder.raw_decode), so each dict is garbage
+as soon as its record is built. Other top-level keys (journalSeq) are kept
+in `meta`, whichever side of the array they appear on.
+
+Files ending in .ndjson or .jsonl hold one JSON object per line instead.
+A line with a "journalSeq" key is metadata; every other line is a record.
+"""
+
+import json
+import re
+
+CHUNK_SIZE = 1 << 20
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+_separator = re.compile(r"[ \t\n\r]*,[ \t\n\r]*")
+
+
+def is_ndjson(path):
+    """Return True if `path` names a newline-delimited data file"""
+    return str(path).endswith(NDJSON_SUFFIXES)
+
+
+class RecordReader:
+    """Iterates the records of one data file; `meta` is complete once exhausted
+
+    `progress(records, bytes_read)` is called every `progress_every` records
+    and once at the end.
+    """
+
+    def __init__(self, path, key, progress=None, progress_every=100000, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.key = key
+        self.progress = progress
+        self.progress_every = progress_every
+        self.chunk_size = chunk_size
+        self.meta = {}
+        self.count = 0
+        self.bytes_read = 0
+
+    def __iter__(self):
+        records = self._ndjson() if is_ndjson(self.path) else self._json()
+        for record in records:
+            yield record
+            self.count += 1
+            if self.progress is not None and self.count % self.progress_every == 0:
+                self.progress(self.count, self.bytes_read)
+        if self.progress is not None:
+            self.progress(self.count, self.bytes_read)
+
+    def _ndjson(self):
+        decode = _decoder.raw_decode
+        with open(self.path) as lines:
+            for line in lines:
+                self.bytes_read += len(line)
+                try:
+                    record = decode(line)[0]
+                except json.JSONDecodeError:
+                    # Blank lines and leading whitespace take the slow path.
+                    if line.isspace():
+                        continue
+                    record = json.loads(line)
+                if "journalSeq" in record:
+                    self.meta.update(record)
+                else:
+                    yield record
+
+    def _json(self):
+        with open(self.path) as data:
+            parser = _Parser(data, self)
+            parser.expect("{")
+            found = False
+            if not parser.accept("}"):
+                while True:
+                    name = parser.value()
+                    parser.expect(":")
+                    if name == self.key:
+                        found = True
+                        yield from parser.array()
+                    else:
+                        self.meta[name] = parser.value()
+                    if parser.accept("}"):
+                        break
+                    parser.expect(",")
+            if not found:
+                raise KeyError(self.key)
+
+
+class _Parser:
+    """Just enough of a pull parser to walk one top-level object"""
+
+    def __init__(self, data, reader):
+        self.data = data
+        self.reader = reader
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Read one more chunk; return False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.data.read(self.reader.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.reader.bytes_read += len(chunk)
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            self.pos = _whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def accept(self, char):
+        """Consume `char` if it is the next token"""
+        self._skip_whitespace()
+        if self.buffer.startswith(char, self.pos):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, char):
+        if not self.accept(char):
+            raise self._error(f"Expecting '{char}'")
+
+    def value(self):
+        """Decode the next JSON value"""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number may continue in the next chunk.
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def array(self):
+        """Yield the values of the array starting at the next token"""
+        self.expect("[")
+        if self.accept("]"):
+            return
+        decode = _decoder.raw_decode
+        separator = _separator.match
+        # Hot loop: one raw_decode and one regex match per element.
+        while True:
+            buffer, pos = self.buffer, self.pos
+            try:
+                value, end = decode(buffer, pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            if end == len(buffer) and self._fill():
+                continue
+            match = separator(buffer, end)
+            if match is not None and match.end() < len(buffer):
+                self.pos = match.end()
+                yield value
+                continue
+            # Last element, or a separator cut by the end of the chunk
+            self.pos = end
+            yield value
+            if self.accept("]"):
+                return
+            self.expect(",")
+            self._skip_whitespace()
+
+    def _error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
@@ -0,0 +1,59 @@
+"""
+Running totals of the places each club booked in each competition
+
+The per-competition cap applies to everything a club ever booked there, not
+to one request. Summing the booking history on every request would cost
+O(history); the ledger keeps one counter per (club, competition) pair
+instead, so the check is a single dict lookup.
+
+Storage backends add to the ledger in commit_bookings(), while the engine
+holds the stripes of both the club and the competition: every update of a
+pair is serialized by those locks. At startup the backend rebuilds the
+totals from what it persisted: the SQLite booking_totals table, or for the
+JSON files a ledger snapshot plus the journal events written after it.
+"""
+
+MAX_PLACES_PER_COMPETITION = 12
+
+
+class BookingLedger:
+    """Places booked per (club name, competition name)"""
+
+    def __init__(self):
+        self._totals = {}
+
+    def __len__(self):
+        return len(self._totals)
+
+    def booked(self, club_name, competition_name):
+        """Return the places `club_name` booked in `competition_name` so far"""
+        return self._totals.get((club_name, competition_name), 0)
+
+    def add(self, club_name, competition_name, places):
+        """Record a committed booking; return the pair's new total"""
+        pair = (club_name, competition_name)
+        total = self._totals.get(pair, 0) + places
+        self._totals[pair] = total
+        return total
+
+    def set(self, club_name, competition_name, total):
+        """Overwrite a pair's total with the one the backend holds"""
+        self._totals[(club_name, competition_name)] = total
+
+    def records(self):
+        """Return the totals as dicts, e.g. to snapshot them"""
+        # dict() copies in one step, so concurrent bookings cannot break it.
+        return [
+            {"club": club, "competition": competition, "places": places}
+            for (club, competition), places in dict(self._totals).items()
+        ]
+
+    def rebuild(self, bookings):
+        """Replace every total with the sums of (club, competition, places) bookings"""
+        totals = {}
+        get = totals.get
+        for club_name, competition_name, places in bookings:
+            pair = (club_name, competition_name)
+            totals[pair] = get(pair, 0) + places
+        self._totals = totals
+        return len(totals)
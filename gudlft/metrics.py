@@ -0,0 +1,170 @@
+"""
+Per-route and per-phase request latency histograms in Prometheus text format
+
+A request timer starts when a request comes in. Code along the request path
+calls lap(phase) at the end of each phase (lookup, validate, mutate,
+render...), which charges the time since the previous lap to that phase.
+When the request ends, each phase total and the whole request duration are
+recorded in fixed-bucket histograms. Recording is a bisect and a few
+additions under a per-histogram lock.
+
+With metrics switched off the server never creates a LatencyMetrics, and
+lap() is the module-level noop(), so the hot path pays one empty call.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds; an implicit +Inf bucket catches the rest.
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+def noop(phase):
+    """Stand-in for LatencyMetrics.lap() when metrics are off"""
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Record one duration"""
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def cumulative(self):
+        """Return [(upper bound, count of values <= bound)], ending with +Inf"""
+        with self._lock:
+            counts = list(self.counts)
+        total, result = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class RequestTimer:
+    """Phase clock for one request"""
+
+    __slots__ = ("route", "start", "last", "phases")
+
+    def __init__(self, route):
+        self.route = route
+        self.start = self.last = time.perf_counter()
+        self.phases = {}
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+
+class LatencyMetrics:
+    """Request and phase histograms keyed by route, with a per-thread timer"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._requests = {}
+        self._phases = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def after_fork(self):
+        """Start a new thread-local, e.g. one made per greenlet once gevent patched"""
+        self._local = threading.local()
+
+    def start(self, route):
+        """Start timing a request to `route` on this thread"""
+        self._local.timer = RequestTimer(route or "unmatched")
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to `phase`"""
+        timer = getattr(self._local, "timer", None)
+        if timer is not None:
+            timer.lap(phase)
+
+    def finish(self):
+        """Record the request started on this thread"""
+        timer = getattr(self._local, "timer", None)
+        if timer is None:
+            return
+        self._local.timer = None
+        self._histogram(self._requests, timer.route).observe(
+            time.perf_counter() - timer.start
+        )
+        for phase, seconds in timer.phases.items():
+            self._histogram(self._phases, (timer.route, phase)).observe(seconds)
+
+    def render(self):
+        """Return every histogram in the Prometheus text exposition format"""
+        # New routes are added under the lock: copy both tables under it too.
+        with self._lock:
+            requests, phases = dict(self._requests), dict(self._phases)
+        lines = []
+        self._render_family(
+            lines,
+            "gudlft_request_duration_seconds",
+            "Time to handle a request, by route",
+            {(route,): h for route, h in requests.items()},
+            ("route",),
+        )
+        self._render_family(
+            lines,
+            "gudlft_request_phase_seconds",
+            "Time spent in each phase of a request, by route",
+            phases,
+            ("route", "phase"),
+        )
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_family(lines, name, help_text, histograms, label_names):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key in sorted(histograms):
+            histogram = histograms[key]
+            labels = ",".join(
+                f'{label}="{_escape(value)}"' for label, value in zip(label_names, key)
+            )
+            for bound, count in histogram.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,69 @@
+"""
+Compact club and competition records
+
+The JSON files store every field as a string. Records parse them once at load
+time into native ints and datetimes so the booking path and the templates never
+convert again, and use __slots__ to keep tens of thousands of them small.
+to_dict() gives back the exact JSON representation.
+"""
+
+from datetime import datetime
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class Club:
+    """A club secretary account and its points balance"""
+
+    __slots__ = ("name", "email", "points")
+
+    def __init__(self, name, email, points):
+        self.name = name
+        self.email = email
+        self.points = points
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a club from its clubs.json representation"""
+        return cls(data["name"], data["email"], int(data["points"]))
+
+    def to_dict(self):
+        """Return the clubs.json representation"""
+        return {"name": self.name, "email": self.email, "points": str(self.points)}
+
+    def __repr__(self):
+        return f"Club(name={self.name!r}, email={self.email!r}, points={self.points})"
+
+
+class Competition:
+    """A dated competition and its remaining places"""
+
+    __slots__ = ("name", "date", "number_of_places")
+
+    def __init__(self, name, date, number_of_places):
+        self.name = name
+        self.date = date
+        self.number_of_places = number_of_places
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a competition from its competitions.json representation"""
+        return cls(
+            data["name"],
+            datetime.strptime(data["date"], DATE_FORMAT),
+            int(data["numberOfPlaces"]),
+        )
+
+    def to_dict(self):
+        """Return the competitions.json representation"""
+        return {
+            "name": self.name,
+            "date": self.date.strftime(DATE_FORMAT),
+            "numberOfPlaces": str(self.number_of_places),
+        }
+
+    def __repr__(self):
+        return (
+            f"Competition(name={self.name!r}, date={self.date!r}, "
+            f"number_of_places={self.number_of_places})"
+        )
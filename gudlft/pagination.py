@@ -0,0 +1,44 @@
+"""
+Page objects and query-string parsing for paginated listings
+"""
+
+
+class Page:
+    """One page of a sorted listing plus what is needed to link to its neighbours"""
+
+    def __init__(self, items, number, per_page, total, params=None):
+        self.items = items
+        self.number = number
+        self.per_page = per_page
+        self.total = total
+        # Listing parameters (search prefix, sort order) to repeat in page links
+        self.params = params or {}
+
+    @property
+    def pages(self):
+        return max(1, -(-self.total // self.per_page))
+
+    @property
+    def has_prev(self):
+        return self.number > 1
+
+    @property
+    def has_next(self):
+        return self.number < self.pages
+
+    @property
+    def cache_key(self):
+        return (self.number, self.per_page, tuple(sorted(self.params.items())))
+
+
+def page_args(values, default_per_page=50, max_per_page=200):
+    """Read a 1-based `page` and a clamped `per_page` from request values"""
+    try:
+        number = max(1, int(values.get("page", 1)))
+    except (TypeError, ValueError):
+        number = 1
+    try:
+        per_page = int(values.get("per_page", default_per_page))
+    except (TypeError, ValueError):
+        per_page = default_per_page
+    return number, min(max(1, per_page), max_per_page)
@@ -0,0 +1,245 @@
+"""
+Write-behind persistence of the registry to the JSON data files
+
+Bookings only mark the registry dirty; a flusher group-commits the pending
+changes by rewriting clubs.json and competitions.json once per batch. Each
+file is written to a temporary sibling, fsynced, then atomically renamed over
+the original so a crash never leaves a truncated data file behind.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from gudlft.jsonstream import is_ndjson
+
+logger = logging.getLogger(__name__)
+
+# The number bookings change in each file's records
+NUMBER_FIELDS = {"clubs": "points", "competitions": "numberOfPlaces"}
+
+
+def atomic_write_json(path, payload):
+    """Durably replace `path` with the JSON encoding of `payload`"""
+    return _atomic_write(path, lambda tmp: json.dump(payload, tmp, indent=4))
+
+
+def atomic_write_ndjson(path, records, meta=None):
+    """Durably replace `path` with one JSON line per record, `meta` first"""
+
+    def write(tmp):
+        if meta:
+            tmp.write(json.dumps(meta) + "\n")
+        for record in records:
+            tmp.write(json.dumps(record) + "\n")
+
+    return _atomic_write(path, write)
+
+
+def write_data_file(path, key, records, journal_seq=None):
+    """Rewrite a clubs/competitions file in the format its name implies
+
+    Returns the file's signature (see gudlft.reload.file_signature).
+    """
+    meta = {} if journal_seq is None else {"journalSeq": journal_seq}
+    if is_ndjson(path):
+        return atomic_write_ndjson(path, records, meta)
+    return atomic_write_json(path, {key: list(records), **meta})
+
+
+def _atomic_write(path, write):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "w") as tmp:
+            write(tmp)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+            # The rename keeps the inode and mtime: this is the new file's identity.
+            stat = os.fstat(tmp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    fsync_directory(directory)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def fsync_directory(directory):
+    """Persist the rename itself; not supported on every platform"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _noting(dicts, values, field):
+    """Pass `dicts` through, noting each record's `field` as written"""
+    for data in dicts:
+        values[data["name"]] = int(data[field])
+        yield data
+
+
+class BatchedWriter:
+    """Group-commits registry changes to clubs.json and competitions.json
+
+    With a positive `flush_interval` a background thread flushes pending
+    changes at most that many seconds after they happen, or as soon as
+    `batch_size` changes are pending. With `flush_interval=0` there is no
+    thread and the caller flushes synchronously whenever the batch is full.
+
+    When a journal is attached each flush is a snapshot: the files record the
+    journal sequence they include and the journal is compacted up to it. A
+    BookingLedger given with `ledger_path` is snapshotted the same way, but
+    only every `ledger_every` flushes: it holds a line per (club,
+    competition) pair, far more than the bookings of one batch. Compaction
+    then stops at `ledger_seq`, the sequence of the last ledger snapshot,
+    so the journal keeps every event a restart replays on top of it.
+
+    With a gudlft.reload.FileTracker, each write is recorded in it, and a
+    flush is postponed while a file edited on disk waits to be reloaded.
+    """
+
+    def __init__(
+        self,
+        registry,
+        clubs_path,
+        competitions_path,
+        flush_interval=1.0,
+        batch_size=100,
+        journal=None,
+        tracker=None,
+        ledger=None,
+        ledger_path=None,
+        ledger_every=10,
+        ledger_seq=None,
+    ):
+        self.registry = registry
+        self.journal = journal
+        self.tracker = tracker
+        self.ledger = ledger
+        self.ledger_path = ledger_path
+        self.ledger_every = max(1, ledger_every)
+        # journalSeq of the ledger snapshot on disk, None if there is none
+        self.ledger_seq = ledger_seq
+        self._ledger_flushes = 0
+        self.clubs_path = clubs_path
+        self.competitions_path = competitions_path
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.flush_count = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def pending(self):
+        """Number of changes not yet written to disk"""
+        return self._pending
+
+    def start(self):
+        """Start the background flusher when an interval is configured"""
+        if self.flush_interval > 0 and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="gudlft-flusher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def mark_dirty(self, count=1):
+        """Record `count` changes, flushing or waking the flusher if due"""
+        with self._lock:
+            self._pending += count
+            due = self._pending >= self.batch_size
+        if not due:
+            return
+        if self._thread is None:
+            self.flush()
+        else:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write every pending change to disk; return True if anything was written"""
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = 0
+            if not pending:
+                return False
+            try:
+                written = self._write_tracked() if self.tracker else self._write()
+            except BaseException:
+                with self._lock:
+                    self._pending += pending
+                raise
+            if written is False:
+                with self._lock:
+                    self._pending += pending
+                return False
+            self.flush_count += 1
+            return True
+
+    def close(self):
+        """Stop the flusher and write whatever is still pending"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _write(self, values=None):
+        # Read the journal position first: every event up to it is already
+        # applied to the registry, so the snapshot covers at least that much.
+        seq = self.journal.last_seq if self.journal is not None else None
+        signatures = {}
+        files = (
+            (self.competitions_path, "competitions", self.registry.competitions),
+            (self.clubs_path, "clubs", self.registry.clubs),
+        )
+        for path, key, records in files:
+            dicts = (record.to_dict() for record in list(records))
+            if values is not None:
+                dicts = _noting(dicts, values.setdefault(path, {}), NUMBER_FIELDS[key])
+            signatures[path] = write_data_file(path, key, dicts, seq)
+        if seq is not None:
+            compact_seq = seq
+            if self.ledger is not None:
+                self._ledger_flushes += 1
+                if self.ledger_seq is None or self._ledger_flushes >= self.ledger_every:
+                    write_data_file(self.ledger_path, "bookings", self.ledger.records(), seq)
+                    self.ledger_seq = seq
+                    self._ledger_flushes = 0
+                compact_seq = min(seq, self.ledger_seq)
+            self.journal.compact(compact_seq)
+        return signatures
+
+    def _write_tracked(self):
+        """Write unless a data file was edited and not reloaded yet; return False if not"""
+        with self.tracker.lock:
+            if self.tracker.changed():
+                logger.info("Data files edited on disk; writing after the reload")
+                return False
+            values = {}
+            for path, signature in self._write(values).items():
+                self.tracker.record(path, signature, values[path])
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing data files failed, will retry")
@@ -0,0 +1,119 @@
+"""
+Opt-in sampling profiler for a fraction of requests
+
+A request is picked with probability `sample_rate` when it starts. While a
+picked request runs, a background thread wakes up every `interval` seconds,
+reads the current stack of the thread serving it (sys._current_frames) and
+counts it under the request's route. Stacks are kept in collapsed form
+("outer;...;inner count" lines), which flame graph tools read directly.
+
+A request that is not picked costs one random() call. The sampler thread
+sleeps on an event while no picked request is running.
+
+Requests must run on threads of their own: under gevent, greenlets share
+one thread whose stack sys._current_frames cannot tell apart, so
+gunicorn.conf.py refuses to profile gevent workers.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfiler:
+    """Samples the stacks of randomly picked requests, aggregated per route"""
+
+    def __init__(self, sample_rate, interval=0.005, max_stacks=10000):
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.sampled_requests = 0
+        self._active = {}
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._busy = threading.Event()
+        self._thread = None
+
+    def start(self, route):
+        """Maybe pick the request starting on this thread; return True if picked"""
+        if random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            self._active[threading.get_ident()] = route or "unmatched"
+            self.sampled_requests += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+        self._busy.set()
+        return True
+
+    def stop(self):
+        """End the picked request on this thread, if any"""
+        if not self._active:
+            return
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+            if not self._active:
+                self._busy.clear()
+
+    def _run(self):
+        while True:
+            self._busy.wait()
+            self.sample()
+            time.sleep(self.interval)
+
+    def sample(self):
+        """Record the current stack of every picked request"""
+        me = threading.get_ident()
+        with self._lock:
+            active = dict(self._active)
+        frames = sys._current_frames()
+        for thread_id, route in active.items():
+            frame = frames.get(thread_id)
+            if frame is None or thread_id == me:
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            stack = ";".join(reversed(names))
+            with self._lock:
+                stacks = self._stacks.setdefault(route, Counter())
+                # Bound memory: once full, only already-seen stacks are counted.
+                if stack in stacks or len(stacks) < self.max_stacks:
+                    stacks[stack] += 1
+
+    def routes(self):
+        """Return the routes that have samples"""
+        with self._lock:
+            return sorted(self._stacks)
+
+    def collapsed(self, route=None):
+        """Return samples as collapsed stacks, rooted at the route name"""
+        with self._lock:
+            stacks = {
+                name: Counter(counts)
+                for name, counts in self._stacks.items()
+                if route is None or name == route
+            }
+        lines = [
+            f"{name};{stack} {count}"
+            for name in sorted(stacks)
+            for stack, count in stacks[name].most_common()
+        ]
+        return "".join(line + "\n" for line in lines)
+
+    def reset(self):
+        """Drop every sample"""
+        with self._lock:
+            self._stacks = {}
+            self.sampled_requests = 0
@@ -0,0 +1,376 @@
+"""
+In-memory registry of clubs and competitions with hash and sorted indexes
+
+Routes resolve clubs by email or name and competitions by name on every
+request, so the registry keeps dict indexes next to the ordered lists and
+updates both together on every mutation. Every mutation also bumps `version`,
+which caches of rendered or serialized data use as their invalidation key.
+
+Listings (the points board, the competition list) read from sorted indexes,
+so a page costs O(log n + page size) whatever the size of the dataset.
+
+adopt() swaps in a whole set of clubs or competitions built in a staging
+registry, which is how data files are hot reloaded (gudlft.reload).
+
+Each competition also has a precomputed status: past, open or full. Bookings
+update it when they empty a competition, and advance_clock() expires
+competitions from the head of a date-ordered index as their start time passes,
+so listing what can still be booked never scans past or full competitions.
+"""
+
+import threading
+
+from sortedcontainers import SortedKeyList
+
+# Upper bound for prefix range queries on case-folded names
+_PREFIX_END = "\U0010ffff"
+
+PAST = "past"
+OPEN = "open"
+FULL = "full"
+
+
+# Attributes holding each half of the data; adopt() swaps them as a unit.
+_CLUB_STATE = (
+    "clubs",
+    "clubs_seq",
+    "_clubs_by_email",
+    "_clubs_by_name",
+    "_clubs_by_points",
+    "_clubs_sorted_by_name",
+)
+_COMPETITION_STATE = (
+    "competitions",
+    "competitions_seq",
+    "_competitions_by_name",
+    "_competitions_by_date",
+    "_competitions_sorted_by_name",
+    "_upcoming_by_date",
+    "_open_by_date",
+    "_competition_status",
+)
+
+
+def _club_points_key(club):
+    return (-club.points, club.name)
+
+
+def _name_key(record):
+    return (record.name.casefold(), record.name)
+
+
+def _competition_date_key(competition):
+    return (competition.date, competition.name)
+
+
+class Registry:
+    """Ordered clubs/competitions plus lookup and sorted indexes kept in sync"""
+
+    def __init__(self):
+        self.clubs = []
+        self.competitions = []
+        self._clubs_by_email = {}
+        self._clubs_by_name = {}
+        self._competitions_by_name = {}
+        self._clubs_by_points = SortedKeyList(key=_club_points_key)
+        self._clubs_sorted_by_name = SortedKeyList(key=_name_key)
+        self._competitions_by_date = SortedKeyList(key=_competition_date_key)
+        self._competitions_sorted_by_name = SortedKeyList(key=_name_key)
+        # Competitions that have not started yet, and the subset with places left
+        self._upcoming_by_date = SortedKeyList(key=_competition_date_key)
+        self._open_by_date = SortedKeyList(key=_competition_date_key)
+        self._competition_status = {}
+        self.clock = None
+        # Sorted lists are not thread-safe; every read or write goes through this.
+        self._sorted_lock = threading.RLock()
+        # Last journal sequence included in the loaded clubs/competitions
+        self.clubs_seq = 0
+        self.competitions_seq = 0
+        self.version = 0
+        self._version_lock = threading.Lock()
+
+    def _bump_version(self):
+        with self._version_lock:
+            self.version += 1
+
+    # Lookups
+
+    def club_by_email(self, email):
+        """Return the club registered with this email, or None"""
+        return self._clubs_by_email.get(email)
+
+    def club_by_name(self, name):
+        """Return the club with this name, or None"""
+        return self._clubs_by_name.get(name)
+
+    def competition_by_name(self, name):
+        """Return the competition with this name, or None"""
+        return self._competitions_by_name.get(name)
+
+    def competition_status(self, competition):
+        """Return PAST, OPEN or FULL as of the last advance_clock()"""
+        with self._sorted_lock:
+            return self._competition_status[competition.name]
+
+    # Listings
+
+    def clubs_page(self, start, stop, order="points", prefix=None):
+        """Return (clubs[start:stop], total) by points or name, optionally by name prefix
+
+        A prefix search is always in name order, whatever `order` says: the
+        matches are a range of the name index, whereas ordering them by
+        points would sort every match (all clubs for a one-letter prefix).
+        """
+        with self._sorted_lock:
+            if prefix:
+                return self._prefix_page(self._clubs_sorted_by_name, start, stop, prefix, None)
+            if order == "points":
+                index = self._clubs_by_points
+            else:
+                index = self._clubs_sorted_by_name
+            return list(index.islice(start, stop)), len(index)
+
+    def competitions_page(self, start, stop, prefix=None, open_only=False):
+        """Return (competitions[start:stop], total) by date, optionally by name prefix
+
+        With `open_only`, only competitions that can still be booked are listed.
+        """
+        with self._sorted_lock:
+            if prefix:
+                return self._prefix_page(
+                    self._competitions_sorted_by_name,
+                    start,
+                    stop,
+                    prefix,
+                    _competition_date_key,
+                    self._is_open if open_only else None,
+                )
+            index = self._open_by_date if open_only else self._competitions_by_date
+            return list(index.islice(start, stop)), len(index)
+
+    def _is_open(self, competition):
+        return self._competition_status[competition.name] == OPEN
+
+    @staticmethod
+    def _prefix_page(index, start, stop, prefix, order_key, keep=None):
+        folded = prefix.casefold()
+        first = index.bisect_key_left((folded, ""))
+        last = index.bisect_key_left((folded + _PREFIX_END, ""))
+        if order_key is None and keep is None:
+            # Already in name order: slice the match range directly.
+            return list(index.islice(first + start, min(first + stop, last))), last - first
+        # Another order or a filter needs every match; cost is O(matches), not O(n).
+        matches = list(index.islice(first, last))
+        if keep is not None:
+            matches = [record for record in matches if keep(record)]
+        if order_key is not None:
+            matches.sort(key=order_key)
+        return matches[start:stop], len(matches)
+
+    # Competition status
+
+    def advance_clock(self, now):
+        """Mark competitions that started before `now` as past; return how many"""
+        expired = 0
+        with self._sorted_lock:
+            if self.clock is not None and now <= self.clock:
+                return 0
+            self.clock = now
+            # Only the head of the date index can have started since last time.
+            while self._upcoming_by_date and self._upcoming_by_date[0].date < now:
+                competition = self._upcoming_by_date.pop(0)
+                self._open_by_date.discard(competition)
+                self._competition_status[competition.name] = PAST
+                expired += 1
+        if expired:
+            self._bump_version()
+        return expired
+
+    def _index_status(self, competition):
+        if self.clock is not None and competition.date < self.clock:
+            self._competition_status[competition.name] = PAST
+            return
+        self._upcoming_by_date.add(competition)
+        if competition.number_of_places > 0:
+            self._open_by_date.add(competition)
+            self._competition_status[competition.name] = OPEN
+        else:
+            self._competition_status[competition.name] = FULL
+
+    def _unindex_status(self, competition):
+        del self._competition_status[competition.name]
+        self._upcoming_by_date.discard(competition)
+        self._open_by_date.discard(competition)
+
+    # Bulk loading
+
+    def set_clubs(self, clubs, journal_seq=0):
+        """Replace every club, rebuilding the email, name and sorted indexes
+
+        `clubs` may be any iterable, e.g. records streamed from a data file.
+        The sorted indexes are built with one sort each, not one insert per club.
+        """
+        with self._sorted_lock:
+            self.clubs_seq = journal_seq
+            self.clubs = []
+            self._clubs_by_email = {}
+            self._clubs_by_name = {}
+            for club in clubs:
+                if club.email in self._clubs_by_email:
+                    raise ValueError(f"Duplicate club email: {club.email}")
+                if club.name in self._clubs_by_name:
+                    raise ValueError(f"Duplicate club name: {club.name}")
+                self.clubs.append(club)
+                self._clubs_by_email[club.email] = club
+                self._clubs_by_name[club.name] = club
+            self._clubs_by_points.clear()
+            self._clubs_by_points.update(self.clubs)
+            self._clubs_sorted_by_name.clear()
+            self._clubs_sorted_by_name.update(self.clubs)
+        self._bump_version()
+
+    def set_competitions(self, competitions, journal_seq=0):
+        """Replace every competition, rebuilding the name and sorted indexes"""
+        with self._sorted_lock:
+            self.competitions_seq = journal_seq
+            self.competitions = []
+            self._competitions_by_name = {}
+            for competition in competitions:
+                if competition.name in self._competitions_by_name:
+                    raise ValueError(f"Duplicate competition name: {competition.name}")
+                self.competitions.append(competition)
+                self._competitions_by_name[competition.name] = competition
+            self._competitions_by_date.clear()
+            self._competitions_by_date.update(self.competitions)
+            self._competitions_sorted_by_name.clear()
+            self._competitions_sorted_by_name.update(self.competitions)
+            self._upcoming_by_date.clear()
+            self._open_by_date.clear()
+            self._competition_status = {}
+            for competition in self.competitions:
+                self._index_status(competition)
+        self._bump_version()
+
+    def adopt(self, staging, clubs=False, competitions=False):
+        """Atomically take over the clubs and/or competitions of a staging registry
+
+        The staging registry is built off to the side; here its records and
+        indexes replace ours with a single store of the instance dict, so a
+        lookup sees either the old data or the new, never a mix. The locks,
+        clock and version counter stay ours; `staging` must not be used again.
+        """
+        names = (_CLUB_STATE if clubs else ()) + (_COMPETITION_STATE if competitions else ())
+        with self._sorted_lock:
+            if competitions and self.clock is not None:
+                staging.advance_clock(self.clock)
+            state = dict(self.__dict__)
+            for name in names:
+                state[name] = staging.__dict__[name]
+            with self._version_lock:
+                state["version"] = self.version + 1
+                self.__dict__ = state
+
+    # Mutations
+
+    def add_club(self, club):
+        """Register a club, refusing duplicate emails or names"""
+        if club.email in self._clubs_by_email:
+            raise ValueError(f"Duplicate club email: {club.email}")
+        if club.name in self._clubs_by_name:
+            raise ValueError(f"Duplicate club name: {club.name}")
+        self.clubs.append(club)
+        self._clubs_by_email[club.email] = club
+        self._clubs_by_name[club.name] = club
+        with self._sorted_lock:
+            self._clubs_by_points.add(club)
+            self._clubs_sorted_by_name.add(club)
+        self._bump_version()
+
+    def add_competition(self, competition):
+        """Register a competition, refusing duplicate names"""
+        if competition.name in self._competitions_by_name:
+            raise ValueError(f"Duplicate competition name: {competition.name}")
+        self.competitions.append(competition)
+        self._competitions_by_name[competition.name] = competition
+        with self._sorted_lock:
+            self._competitions_by_date.add(competition)
+            self._competitions_sorted_by_name.add(competition)
+            self._index_status(competition)
+        self._bump_version()
+
+    def remove_club(self, club):
+        """Unregister a club and drop it from the indexes"""
+        self.clubs.remove(club)
+        del self._clubs_by_email[club.email]
+        del self._clubs_by_name[club.name]
+        with self._sorted_lock:
+            self._clubs_by_points.remove(club)
+            self._clubs_sorted_by_name.remove(club)
+        self._bump_version()
+
+    def remove_competition(self, competition):
+        """Unregister a competition and drop it from the indexes"""
+        self.competitions.remove(competition)
+        del self._competitions_by_name[competition.name]
+        with self._sorted_lock:
+            self._competitions_by_date.remove(competition)
+            self._competitions_sorted_by_name.remove(competition)
+            self._unindex_status(competition)
+        self._bump_version()
+
+    def update_club(self, club, **fields):
+        """Update club fields, re-keying the indexes if email or name changes"""
+        email = fields.get("email", club.email)
+        name = fields.get("name", club.name)
+        if email != club.email and email in self._clubs_by_email:
+            raise ValueError(f"Duplicate club email: {email}")
+        if name != club.name and name in self._clubs_by_name:
+            raise ValueError(f"Duplicate club name: {name}")
+        # Only re-key what changes: concurrent readers must never miss a club
+        # whose email and name stay the same (e.g. a points update).
+        if email != club.email:
+            del self._clubs_by_email[club.email]
+            self._clubs_by_email[email] = club
+        if name != club.name:
+            del self._clubs_by_name[club.name]
+            self._clubs_by_name[name] = club
+        with self._sorted_lock:
+            # Sorted keys are computed from the fields: remove, update, re-add.
+            renamed = name != club.name
+            self._clubs_by_points.remove(club)
+            if renamed:
+                self._clubs_sorted_by_name.remove(club)
+            for field, value in fields.items():
+                setattr(club, field, value)
+            self._clubs_by_points.add(club)
+            if renamed:
+                self._clubs_sorted_by_name.add(club)
+        self._bump_version()
+
+    def update_competition(self, competition, **fields):
+        """Update competition fields, re-keying the indexes if name or date changes"""
+        name = fields.get("name", competition.name)
+        date = fields.get("date", competition.date)
+        if name != competition.name and name in self._competitions_by_name:
+            raise ValueError(f"Duplicate competition name: {name}")
+        if name != competition.name:
+            del self._competitions_by_name[competition.name]
+            self._competitions_by_name[name] = competition
+        places = fields.get("number_of_places", competition.number_of_places)
+        with self._sorted_lock:
+            rekey = name != competition.name or date != competition.date
+            # Status only moves when places reach or leave zero (or on re-key).
+            restatus = rekey or (places > 0) != (competition.number_of_places > 0)
+            if rekey:
+                self._competitions_by_date.remove(competition)
+                self._competitions_sorted_by_name.remove(competition)
+            if restatus:
+                self._unindex_status(competition)
+            for field, value in fields.items():
+                setattr(competition, field, value)
+            if rekey:
+                self._competitions_by_date.add(competition)
+                self._competitions_sorted_by_name.add(competition)
+            if restatus:
+                self._index_status(competition)
+        self._bump_version()
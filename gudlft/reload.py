@@ -0,0 +1,106 @@
+"""
+Hot reload of the JSON data files, without a restart
+
+A FileTracker remembers, for each data file, the signature (inode, size,
+mtime) and the per-record numbers (points, places) it had when the storage
+last read or wrote it. A DataWatcher thread polls the signatures; a file
+whose signature is not one the storage produced was edited by someone else.
+
+JsonStorage.reload() then re-parses only the edited files into a staging
+Registry and swaps them in with Registry.adopt(), so readers never block and
+never see a half-loaded file. Bookings are not lost: a record's number in
+the file is what the operator edited, and the bookings made since the file
+was read or written are exactly the live number minus the tracked one, so
+the reloaded record gets the edited number minus those bookings.
+
+The snapshot writer takes the tracker's lock and skips its turn while an
+edit is waiting to be reloaded, so it never overwrites an operator's change.
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def file_signature(path):
+    """Return what identifies the current content of `path`, or None if missing"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class FileTracker:
+    """What the storage last read from or wrote to each data file"""
+
+    def __init__(self):
+        # Held by reloads and snapshot writes: they must not interleave.
+        self.lock = threading.RLock()
+        self.signatures = {}
+        self.values = {}
+
+    def record(self, path, signature, values):
+        """Note that `path` now holds `values` ({name: number}) under `signature`"""
+        self.signatures[path] = signature
+        self.values[path] = values
+
+    def changed(self):
+        """Return the tracked files edited by someone else since"""
+        return [
+            path
+            for path, signature in self.signatures.items()
+            if file_signature(path) != signature
+        ]
+
+
+class DataWatcher:
+    """Polls the tracked files and calls `on_change(paths)` when some were edited"""
+
+    def __init__(self, tracker, on_change, interval=2.0):
+        self.tracker = tracker
+        self.on_change = on_change
+        self.interval = interval
+        self.reload_count = 0
+        self._failed = {}
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start polling in a background thread; return self"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="gudlft-watcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def check(self):
+        """Reload the edited files now; return True if a reload happened"""
+        changed = self.tracker.changed()
+        # Do not retry an edit that failed to load until it changes again.
+        changed = [p for p in changed if self._failed.get(p) != file_signature(p)]
+        if not changed:
+            return False
+        signatures = {path: file_signature(path) for path in changed}
+        try:
+            self.on_change(changed)
+        except Exception:
+            logger.exception("Reloading %s failed, keeping the current data", changed)
+            self._failed.update(signatures)
+            return False
+        self.reload_count += 1
+        logger.info("Reloaded %s", ", ".join(changed))
+        return True
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.check()
@@ -0,0 +1,16 @@
+"""
+Pluggable storage backends for clubs, competitions and bookings
+"""
+
+from gudlft.storage.base import Storage
+from gudlft.storage.json_storage import JsonStorage, read_clubs, read_competitions
+from gudlft.storage.sqlite_storage import ConnectionPool, SqliteStorage
+
+__all__ = [
+    "ConnectionPool",
+    "JsonStorage",
+    "SqliteStorage",
+    "Storage",
+    "read_clubs",
+    "read_competitions",
+]
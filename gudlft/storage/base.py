@@ -0,0 +1,62 @@
+"""
+Storage interface between the registry and where the data lives
+"""
+
+import contextlib
+
+from gudlft.ledger import BookingLedger
+
+
+class Storage:
+    """In-memory storage: records are loaded elsewhere and bookings live only in RAM
+
+    Backends override load() to fill the registry and commit_bookings() to
+    make bookings durable. commit_bookings() runs while the engine holds the
+    stripe locks of every club and competition involved, after the in-memory
+    rules passed; it must apply the bookings to the registry itself so each
+    backend controls the ordering between its durable write and the
+    in-memory update, the ledger's running totals included.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.ledger = BookingLedger()
+        # Replaced by the BookingEngine driving this storage: holding it
+        # keeps every booking out, e.g. while reloaded data is swapped in.
+        self.pause_bookings = contextlib.nullcontext
+
+    def load(self):
+        """Fill the registry from the backend"""
+
+    def commit_booking(self, club, competition, places):
+        """Durably apply one validated booking; raise BookingError on conflict"""
+        error = self.commit_bookings([(club, competition, places)], atomic=True)[0]
+        if error is not None:
+            raise error
+
+    def commit_bookings(self, bookings, atomic=False):
+        """Durably apply validated (club, competition, places) bookings in one write
+
+        Returns one BookingError or None per booking. Only a backend shared
+        with other processes can reject a booking the engine accepted; with
+        `atomic`, one rejection leaves every booking unapplied.
+        """
+        for club, competition, places in bookings:
+            self.registry.update_competition(
+                competition, number_of_places=competition.number_of_places - places
+            )
+            self.registry.update_club(club, points=club.points - places)
+            self.ledger.add(club.name, competition.name, places)
+        return [None] * len(bookings)
+
+    def after_commit(self, count=1):
+        """Hook run once the engine released its locks after `count` bookings"""
+
+    def after_fork(self):
+        """Reset per-process resources in a worker forked after load()"""
+
+    def refresh(self):
+        """Pull changes committed by other processes into the registry"""
+
+    def close(self):
+        """Flush and release backend resources"""
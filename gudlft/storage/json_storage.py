@@ -0,0 +1,300 @@
+"""
+JSON files backend: clubs.json/competitions.json snapshots plus a booking journal
+
+The files are read incrementally (gudlft.jsonstream) and may be NDJSON
+(.ndjson/.jsonl); snapshots are written back in the same format. With a
+reload interval, files edited by someone else are hot reloaded
+(gudlft.reload).
+"""
+
+import logging
+import os
+
+from gudlft.journal import BookingJournal
+from gudlft.jsonstream import RecordReader
+from gudlft.models import Club, Competition
+from gudlft.persistence import BatchedWriter
+from gudlft.registry import Registry
+from gudlft.reload import DataWatcher, FileTracker, file_signature
+from gudlft.storage.base import Storage
+
+logger = logging.getLogger(__name__)
+
+
+def read_clubs(path, progress=None):
+    """Return the clubs in a clubs.json file and the journal sequence it includes"""
+    reader = RecordReader(path, "clubs", progress)
+    clubs = [Club.from_dict(club) for club in reader]
+    return clubs, reader.meta.get("journalSeq", 0)
+
+
+def read_competitions(path, progress=None):
+    """Return the competitions in a competitions.json file and its journal sequence"""
+    reader = RecordReader(path, "competitions", progress)
+    competitions = [Competition.from_dict(c) for c in reader]
+    return competitions, reader.meta.get("journalSeq", 0)
+
+
+def log_progress(path):
+    """Return a RecordReader progress callback logging how far `path` is read"""
+    size = os.path.getsize(path)
+
+    def report(records, bytes_read):
+        logger.info(
+            "Loading %s: %d records, %.0f%%",
+            path,
+            records,
+            100 * bytes_read / size if size else 100,
+        )
+
+    return report
+
+
+class JsonStorage(Storage):
+    """Loads the JSON data files, journals bookings and snapshots in batches
+
+    With `persistence=False` the files are only read, which is what the test
+    suite uses so it never rewrites the real data. The files belong to one
+    process: run several workers on SqliteStorage instead.
+    """
+
+    def __init__(
+        self,
+        registry,
+        clubs_path="clubs.json",
+        competitions_path="competitions.json",
+        persistence=True,
+        journal_path="bookings.journal",
+        journal_fsync=True,
+        flush_interval=1.0,
+        batch_size=100,
+        reload_interval=0.0,
+        ledger_every=10,
+    ):
+        super().__init__(registry)
+        self.clubs_path = clubs_path
+        self.competitions_path = competitions_path
+        self.persistence = persistence
+        self.journal_path = journal_path
+        self.ledger_path = f"{journal_path}.ledger"
+        self.ledger_every = ledger_every
+        # journalSeq of the ledger snapshot read at load, None without one
+        self.ledger_seq = None
+        self.journal_fsync = journal_fsync
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.reload_interval = reload_interval
+        self.journal = None
+        self.writer = None
+        self.tracker = FileTracker() if reload_interval > 0 else None
+        self.watcher = None
+        # Bookings committed while a reload builds its staging registry
+        self._reload_log = None
+
+    def load(self):
+        competitions, competitions_seq = self._read(self.competitions_path)
+        clubs, clubs_seq = self._read(self.clubs_path)
+        self.registry.set_competitions(competitions, competitions_seq)
+        self.registry.set_clubs(clubs, clubs_seq)
+        if self.persistence:
+            self.journal = BookingJournal(
+                self.journal_path,
+                self.journal_fsync,
+                after_seq=max(self.registry.clubs_seq, self.registry.competitions_seq),
+            )
+            self.journal.replay(self.registry)
+            self._load_ledger()
+            self._start_writer()
+        if self.tracker is not None:
+            self.watcher = DataWatcher(self.tracker, self.reload, self.reload_interval)
+            self.watcher.start()
+
+    def _load_ledger(self):
+        """Load the ledger snapshot and the journal after it, or the whole history"""
+        if not os.path.exists(self.ledger_path):
+            self.ledger.rebuild(
+                (e["club"], e["competition"], int(e["places"])) for e in self.journal.history()
+            )
+            return
+        reader = RecordReader(self.ledger_path, "bookings", log_progress(self.ledger_path))
+        self.ledger.rebuild((r["club"], r["competition"], r["places"]) for r in reader)
+        self.ledger_seq = reader.meta.get("journalSeq", 0)
+        for event in self.journal.read(self.ledger_seq):
+            if "booked" in event:
+                self.ledger.set(event["club"], event["competition"], event["booked"])
+            else:
+                self.ledger.add(event["club"], event["competition"], int(event["places"]))
+
+    def _read(self, path):
+        """Parse one data file, noting what it holds when reloads are on"""
+        signature = file_signature(path)
+        if path == self.clubs_path:
+            records, seq = read_clubs(path, log_progress(path))
+        else:
+            records, seq = read_competitions(path, log_progress(path))
+        if self.tracker is not None:
+            self.tracker.record(path, signature, self._numbers(path, records))
+        return records, seq
+
+    def _numbers(self, path, records):
+        """Return {name: points or places} for a file's records"""
+        if path == self.clubs_path:
+            return {club.name: club.points for club in records}
+        return {c.name: c.number_of_places for c in records}
+
+    def reload(self, paths):
+        """Swap in the data files edited on disk, keeping the bookings made since
+
+        Only `paths` are parsed. Each reloaded record gets its number from the
+        file minus the bookings made since the file was last read or written.
+        Bookings pause twice: while those are counted, and while the few made
+        during the parse are replayed and the new records swapped in.
+        """
+        clubs = self.clubs_path in paths
+        competitions = self.competitions_path in paths
+        with self.tracker.lock:
+            parsed = {path: self._read_for_reload(path) for path in paths}
+            with self.pause_bookings():
+                booked = {path: self._booked_since_read(path) for path in paths}
+                self._reload_log = []
+            try:
+                staging = Registry()
+                for path, (_, records, _) in parsed.items():
+                    self._rebase(path, records, booked[path])
+                if competitions:
+                    staging.set_competitions(
+                        parsed[self.competitions_path][1], self.registry.competitions_seq
+                    )
+                if clubs:
+                    staging.set_clubs(parsed[self.clubs_path][1], self.registry.clubs_seq)
+                with self.pause_bookings():
+                    for club_name, competition_name, places in self._reload_log:
+                        self._replay(staging, club_name, competition_name, places)
+                    self.registry.adopt(staging, clubs=clubs, competitions=competitions)
+            finally:
+                self._reload_log = None
+            for path, (signature, records, numbers) in parsed.items():
+                self.tracker.record(path, signature, numbers)
+        if self.writer is not None:
+            # Snapshot the merge soon: journal entries from before it hold
+            # absolute values that would undo the edit on replay.
+            self.writer.mark_dirty(self.writer.batch_size)
+
+    def _read_for_reload(self, path):
+        signature = file_signature(path)
+        if path == self.clubs_path:
+            records, _ = read_clubs(path, log_progress(path))
+        else:
+            records, _ = read_competitions(path, log_progress(path))
+        return signature, records, self._numbers(path, records)
+
+    def _booked_since_read(self, path):
+        """Return {name: places or points booked since `path` was read or written}"""
+        if path == self.clubs_path:
+            lookup, attribute = self.registry.club_by_name, "points"
+        else:
+            lookup, attribute = self.registry.competition_by_name, "number_of_places"
+        booked = {}
+        for name, number in self.tracker.values[path].items():
+            record = lookup(name)
+            if record is not None and getattr(record, attribute) != number:
+                booked[name] = number - getattr(record, attribute)
+        return booked
+
+    def _rebase(self, path, records, booked):
+        attribute = "points" if path == self.clubs_path else "number_of_places"
+        for record in records:
+            if record.name in booked:
+                number = getattr(record, attribute) - booked[record.name]
+                if number < 0:
+                    logger.warning(
+                        "%s: %s was edited below what was booked since; set to 0",
+                        path,
+                        record.name,
+                    )
+                    number = 0
+                setattr(record, attribute, number)
+
+    @staticmethod
+    def _replay(staging, club_name, competition_name, places):
+        club = staging.club_by_name(club_name)
+        if club is not None:
+            staging.update_club(club, points=max(0, club.points - places))
+        competition = staging.competition_by_name(competition_name)
+        if competition is not None:
+            staging.update_competition(
+                competition, number_of_places=max(0, competition.number_of_places - places)
+            )
+
+    def _start_writer(self):
+        self.writer = BatchedWriter(
+            self.registry,
+            self.clubs_path,
+            self.competitions_path,
+            flush_interval=self.flush_interval,
+            batch_size=self.batch_size,
+            journal=self.journal,
+            tracker=self.tracker,
+            ledger=self.ledger,
+            ledger_path=self.ledger_path,
+            ledger_every=self.ledger_every,
+            # A worker taking over after fork keeps the parent's snapshot.
+            ledger_seq=self.writer.ledger_seq if self.writer is not None else self.ledger_seq,
+        ).start()
+
+    def after_fork(self):
+        # The flusher thread does not survive fork(); the parent never books,
+        # so the single worker simply takes the files over.
+        if self.writer is not None:
+            self._start_writer()
+        if self.watcher is not None:
+            self.watcher = DataWatcher(self.tracker, self.reload, self.reload_interval)
+            self.watcher.start()
+
+    def commit_bookings(self, bookings, atomic=False):
+        # Registry first, journal second: a snapshot that includes an event's
+        # sequence number must already contain its effect.
+        results = super().commit_bookings(bookings, atomic)
+        if self._reload_log is not None:
+            self._reload_log.extend(
+                (club.name, competition.name, places) for club, competition, places in bookings
+            )
+        if self.journal is not None:
+            self.journal.append_many(
+                [
+                    # Absolute values as of this booking, not the batch's end.
+                    (competition.name, club.name, places, places_left, points_left, booked)
+                    for (club, competition, places), places_left, points_left, booked in zip(
+                        bookings, *self._running_values(bookings)
+                    )
+                ]
+            )
+        return results
+
+    def _running_values(self, bookings):
+        """Return the places, points and booked totals after each booking of a batch"""
+        places_left, points_left, booked = {}, {}, {}
+        after_places, after_points, after_booked = [], [], []
+        for club, competition, places in reversed(bookings):
+            pair = (club.name, competition.name)
+            after_places.append(
+                places_left.setdefault(competition.name, competition.number_of_places)
+            )
+            after_points.append(points_left.setdefault(club.name, club.points))
+            after_booked.append(booked.setdefault(pair, self.ledger.booked(*pair)))
+            places_left[competition.name] += places
+            points_left[club.name] += places
+            booked[pair] -= places
+        return after_places[::-1], after_points[::-1], after_booked[::-1]
+
+    def after_commit(self, count=1):
+        if self.writer is not None:
+            self.writer.mark_dirty(count)
+
+    def close(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.writer is not None:
+            self.writer.close()
+        if self.journal is not None:
+            self.journal.close()
@@ -0,0 +1,389 @@
+"""
+SQLite backend: one indexed database file in WAL mode behind a connection pool
+
+The database is the source of truth, so several worker processes can share
+it. Each booking runs in one IMMEDIATE transaction whose conditional UPDATEs
+only succeed while places and points are still available; the registry is a
+read cache that refresh() brings up to date by fetching only the rows whose
+revision is newer than the last one seen.
+
+booking_totals keeps the places booked per (club, competition): the booking
+transaction's conditional upsert enforces the per-competition cap across
+processes, and the rows feed the ledger at load and on refresh. Their
+revisions also number the live updates of every process (see
+gudlft.events.StorageFeed).
+"""
+
+import contextlib
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+from gudlft.errors import BookingError
+from gudlft.ledger import MAX_PLACES_PER_COMPETITION
+from gudlft.models import DATE_FORMAT, Club, Competition
+from gudlft.storage.base import Storage
+from gudlft.storage.json_storage import read_clubs, read_competitions
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0);
+CREATE TABLE IF NOT EXISTS clubs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL UNIQUE,
+    points INTEGER NOT NULL CHECK (points >= 0),
+    rev INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS competitions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    date TEXT NOT NULL,
+    number_of_places INTEGER NOT NULL CHECK (number_of_places >= 0),
+    rev INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY,
+    competition TEXT NOT NULL,
+    club TEXT NOT NULL,
+    places INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS booking_totals (
+    club TEXT NOT NULL,
+    competition TEXT NOT NULL,
+    places INTEGER NOT NULL,
+    rev INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (club, competition)
+);
+CREATE INDEX IF NOT EXISTS clubs_rev ON clubs (rev);
+CREATE INDEX IF NOT EXISTS competitions_rev ON competitions (rev);
+CREATE INDEX IF NOT EXISTS booking_totals_rev ON booking_totals (rev);
+"""
+
+
+class ConnectionPool:
+    """Bounded pool of autocommit SQLite connections shared by request threads"""
+
+    def __init__(self, path, size=8):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection, opening one if the pool is not full yet"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            conn = self._connect() if create else self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._created = 0
+
+
+@contextlib.contextmanager
+def _transaction(conn, mode="IMMEDIATE"):
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+class SqliteStorage(Storage):
+    """Shared SQLite database, seeded from the JSON files on first use"""
+
+    def __init__(
+        self,
+        registry,
+        path="gudlft.db",
+        pool_size=8,
+        seed_clubs_path="clubs.json",
+        seed_competitions_path="competitions.json",
+    ):
+        super().__init__(registry)
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        self.seed_clubs_path = seed_clubs_path
+        self.seed_competitions_path = seed_competitions_path
+        self.revision = 0
+        self._refresh_lock = threading.Lock()
+
+    def load(self):
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+            with _transaction(conn):
+                empty = conn.execute(
+                    "SELECT NOT EXISTS (SELECT 1 FROM clubs)"
+                    " AND NOT EXISTS (SELECT 1 FROM competitions)"
+                ).fetchone()[0]
+                if empty:
+                    self._seed(conn)
+                self._backfill_totals(conn)
+            with _transaction(conn, "DEFERRED"):
+                self.revision = self._current_revision(conn)
+                clubs = conn.execute("SELECT name, email, points FROM clubs ORDER BY id")
+                clubs = [Club(*row) for row in clubs]
+                competitions = conn.execute(
+                    "SELECT name, date, number_of_places FROM competitions ORDER BY id"
+                )
+                competitions = [
+                    Competition(name, datetime.strptime(date, DATE_FORMAT), places)
+                    for name, date, places in competitions
+                ]
+                self.ledger.rebuild(
+                    conn.execute("SELECT club, competition, places FROM booking_totals")
+                )
+        self.registry.set_competitions(competitions)
+        self.registry.set_clubs(clubs)
+
+    @staticmethod
+    def _backfill_totals(conn):
+        """Fill booking_totals from the bookings of a database created without it"""
+        missing = conn.execute(
+            "SELECT NOT EXISTS (SELECT 1 FROM booking_totals)"
+            " AND EXISTS (SELECT 1 FROM bookings)"
+        ).fetchone()[0]
+        if missing:
+            conn.execute(
+                "INSERT INTO booking_totals (club, competition, places)"
+                " SELECT club, competition, SUM(places) FROM bookings"
+                " GROUP BY club, competition"
+            )
+
+    def _seed(self, conn):
+        clubs, _ = read_clubs(self.seed_clubs_path)
+        competitions, _ = read_competitions(self.seed_competitions_path)
+        conn.executemany(
+            "INSERT INTO clubs (name, email, points) VALUES (?, ?, ?)",
+            [(c.name, c.email, c.points) for c in clubs],
+        )
+        conn.executemany(
+            "INSERT INTO competitions (name, date, number_of_places) VALUES (?, ?, ?)",
+            [(c.name, c.date.strftime(DATE_FORMAT), c.number_of_places) for c in competitions],
+        )
+
+    @staticmethod
+    def _current_revision(conn):
+        return conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    def commit_bookings(self, bookings, atomic=False):
+        if not bookings:
+            return []
+        now = datetime.now().strftime(DATE_FORMAT)
+        conflicts, applied = [], []
+        with self.pool.connection() as conn:
+            try:
+                with _transaction(conn):
+                    revision = conn.execute(
+                        "UPDATE meta SET value = value + 1 WHERE key = 'revision'"
+                        " RETURNING value"
+                    ).fetchone()[0]
+                    for index, booking in enumerate(bookings):
+                        # A savepoint per booking lets best-effort mode drop
+                        # one conflicting booking and keep the rest.
+                        conn.execute("SAVEPOINT booking")
+                        left = self._book_row(conn, *booking, revision, now)
+                        if left is None:
+                            conn.execute("ROLLBACK TO booking")
+                            conflicts.append(index)
+                            if atomic:
+                                raise _Conflict()
+                        else:
+                            applied.append((booking, left))
+                        conn.execute("RELEASE booking")
+            except _Conflict:
+                applied = []
+            if conflicts:
+                # Another process got there first: resync and explain with fresh data.
+                for index in conflicts:
+                    self._resync(conn, *bookings[index][:2])
+        for (club, competition, _), (places_left, points_left, total) in applied:
+            self.registry.update_competition(competition, number_of_places=places_left)
+            self.registry.update_club(club, points=points_left)
+            self.ledger.set(club.name, competition.name, total)
+        if applied and revision == self.revision + 1:
+            # Nothing committed elsewhere in between: no need to refetch our rows.
+            self.revision = revision
+        results = [None] * len(bookings)
+        for index in conflicts:
+            results[index] = self._conflict_error(*bookings[index])
+        return results
+
+    @staticmethod
+    def _book_row(conn, club, competition, places, revision, now):
+        """Run the conditional UPDATEs; return (places, points) left and the total or None"""
+        places_left = conn.execute(
+            "UPDATE competitions"
+            " SET number_of_places = number_of_places - :places, rev = :rev"
+            " WHERE name = :name AND number_of_places >= :places"
+            " AND date >= :now RETURNING number_of_places",
+            {"places": places, "rev": revision, "name": competition.name, "now": now},
+        ).fetchone()
+        if places_left is None:
+            return None
+        points_left = conn.execute(
+            "UPDATE clubs SET points = points - :places, rev = :rev"
+            " WHERE name = :name AND points >= :places RETURNING points",
+            {"places": places, "rev": revision, "name": club.name},
+        ).fetchone()
+        if points_left is None:
+            return None
+        total = conn.execute(
+            "INSERT INTO booking_totals (club, competition, places, rev)"
+            " VALUES (:club, :competition, :places, :rev)"
+            " ON CONFLICT (club, competition) DO UPDATE"
+            " SET places = booking_totals.places + excluded.places, rev = excluded.rev"
+            " WHERE booking_totals.places + excluded.places <= :cap"
+            " RETURNING places",
+            {
+                "club": club.name,
+                "competition": competition.name,
+                "places": places,
+                "rev": revision,
+                "cap": MAX_PLACES_PER_COMPETITION,
+            },
+        ).fetchone()
+        if total is None:
+            return None
+        conn.execute(
+            "INSERT INTO bookings (competition, club, places, created_at)"
+            " VALUES (?, ?, ?, ?)",
+            (competition.name, club.name, places, now),
+        )
+        return places_left[0], points_left[0], total[0]
+
+    def _resync(self, conn, club, competition):
+        (points,) = conn.execute(
+            "SELECT points FROM clubs WHERE name = ?", (club.name,)
+        ).fetchone()
+        (places,) = conn.execute(
+            "SELECT number_of_places FROM competitions WHERE name = ?", (competition.name,)
+        ).fetchone()
+        total = conn.execute(
+            "SELECT places FROM booking_totals WHERE club = ? AND competition = ?",
+            (club.name, competition.name),
+        ).fetchone()
+        self.registry.update_club(club, points=points)
+        self.registry.update_competition(competition, number_of_places=places)
+        self.ledger.set(club.name, competition.name, total[0] if total else 0)
+
+    def _conflict_error(self, club, competition, places):
+        booked = self.ledger.booked(club.name, competition.name)
+        if booked + places > MAX_PLACES_PER_COMPETITION:
+            return BookingError(
+                f"You cannot book more than {MAX_PLACES_PER_COMPETITION} places per competition."
+                f" You have already booked {booked}."
+            )
+        if places > competition.number_of_places:
+            return BookingError(
+                "Not enough places available! "
+                f"Only {competition.number_of_places} places remaining."
+            )
+        if places > club.points:
+            return BookingError(f"You don't have enough points! You have {club.points} points.")
+        return BookingError("You cannot book places for a past competition.")
+
+    def after_fork(self):
+        # SQLite connections must not be used across fork(): abandon the
+        # inherited ones without closing them and catch up with other workers.
+        self.pool = ConnectionPool(self.path, self.pool.size)
+        self._refresh_lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        # One cheap read per request; rows are fetched only when a commit
+        # (from any process) moved the revision since the last refresh.
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            with self.pool.connection() as conn:
+                if self._current_revision(conn) == self.revision:
+                    return
+                with _transaction(conn, "DEFERRED"):
+                    revision = self._current_revision(conn)
+                    clubs = conn.execute(
+                        "SELECT name, email, points FROM clubs WHERE rev > ?", (self.revision,)
+                    ).fetchall()
+                    competitions = conn.execute(
+                        "SELECT name, number_of_places FROM competitions WHERE rev > ?",
+                        (self.revision,),
+                    ).fetchall()
+                    totals = conn.execute(
+                        "SELECT club, competition, places FROM booking_totals WHERE rev > ?",
+                        (self.revision,),
+                    ).fetchall()
+            for name, email, points in clubs:
+                club = self.registry.club_by_name(name)
+                if club is not None and club.points != points:
+                    self.registry.update_club(club, points=points)
+            for name, places in competitions:
+                competition = self.registry.competition_by_name(name)
+                if competition is not None and competition.number_of_places != places:
+                    self.registry.update_competition(competition, number_of_places=places)
+            for club_name, competition_name, places in totals:
+                self.ledger.set(club_name, competition_name, places)
+            self.revision = revision
+        finally:
+            self._refresh_lock.release()
+
+    def booking_changes(self, after, limit=None):
+        """Return the revision and the pairs booked after revision `after`
+
+        Each change is (revision, club, points, competition, numberOfPlaces)
+        with the values as of now, oldest first; with `limit`, only the
+        latest `limit` changes.
+        """
+        with self.pool.connection() as conn:
+            if self._current_revision(conn) == after:
+                return after, []
+            with _transaction(conn, "DEFERRED"):
+                revision = self._current_revision(conn)
+                changes = conn.execute(
+                    "SELECT t.rev, t.club, c.points, t.competition, p.number_of_places"
+                    " FROM booking_totals t"
+                    " JOIN clubs c ON c.name = t.club"
+                    " JOIN competitions p ON p.name = t.competition"
+                    " WHERE t.rev > ? ORDER BY t.rev DESC LIMIT ?",
+                    (after, -1 if limit is None else limit),
+                ).fetchall()
+        return revision, changes[::-1]
+
+    def close(self):
+        self.pool.close()
+
+
+class _Conflict(Exception):
+    """A conditional UPDATE matched no row"""
@@ -0,0 +1,92 @@
+"""
+Deferred data loading: on the first request or in a background thread
+
+Importing the server only builds empty state; the data is read by a Warmup.
+Lazily, the first request that needs data runs the load while concurrent
+requests wait for that same load. In the background, a thread starts loading
+as soon as the app is created so the process already accepts connections,
+and its readiness probe answers 503, while the files are read.
+
+A failed load is kept and reported to every caller instead of crashing the
+import, so a malformed data file shows up on the readiness probe.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class Warmup:
+    """Runs `load` exactly once, lazily or in a background thread"""
+
+    def __init__(self, load):
+        self._load = load
+        self._run_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+        self._loading = False
+        self.error = None
+        self.seconds = None
+
+    @property
+    def ready(self):
+        """True once the load has succeeded"""
+        return self._done.is_set() and self.error is None
+
+    @property
+    def state(self):
+        """PENDING, LOADING, READY or FAILED"""
+        if self._done.is_set():
+            return FAILED if self.error is not None else READY
+        return LOADING if self._loading else PENDING
+
+    def start(self):
+        """Load in a background thread unless a load already started; return self"""
+        with self._start_lock:
+            if self._thread is None and not self._done.is_set():
+                self._thread = threading.Thread(
+                    target=self.run, name="gudlft-warmup", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def run(self):
+        """Load now, or wait for the load in progress; return True if ready
+
+        Requests call this in both modes: lazily it performs the load, with a
+        background thread running it simply blocks until that thread is done.
+        """
+        if not self._done.is_set():
+            with self._run_lock:
+                if not self._done.is_set():
+                    self._run()
+        return self.ready
+
+    def _run(self):
+        self._loading = True
+        started = time.perf_counter()
+        try:
+            self._load()
+        except Exception as error:
+            logger.exception("Loading the data failed")
+            self.error = error
+        self.seconds = time.perf_counter() - started
+        self._loading = False
+        self._done.set()
+
+    def after_fork(self):
+        """Forget a background load interrupted by fork(); its thread is gone"""
+        if self._thread is not None and not self._done.is_set():
+            # Whatever it had read is reloaded from scratch on the next run().
+            self._run_lock = threading.Lock()
+            self._start_lock = threading.Lock()
+            self._thread = None
+            self._loading = False
@@ -0,0 +1,72 @@
+"""
+Gunicorn settings for the multi-process (pre-fork) deployment
+
+Run with: gunicorn "server:createApp()"
+
+Every worker keeps its own in-memory registry, so workers must share one
+source of truth: this mode runs on the SQLite storage, whose conditional
+booking transactions keep availability consistent across workers and whose
+per-request refresh makes each worker see the others' bookings.
+
+The master loads the data eagerly through the app factory before forking, so
+workers start ready and share the loaded records copy-on-write; a broken
+data file stops the master instead of every worker.
+
+Workers are gthread workers by default. An /events subscriber holds one of
+their threads for as long as it stays connected, so many subscribers are
+best served by a second deployment of gevent workers
+(GUNICORN_WORKER_CLASS=gevent) that the proxy sends /events to: there each
+subscriber is a parked greenlet, and every worker follows the bookings of
+all of them through the database (see gudlft.events.StorageFeed). Keep
+bookings on gthread workers: SQLite's busy wait and the commit itself block
+a gevent worker, with every greenlet in it. The sampling profiler needs
+threads and is refused under gevent.
+"""
+
+import multiprocessing
+import os
+
+os.environ.setdefault("GUDLFT_STORAGE", "sqlite")
+os.environ.setdefault("GUDLFT_WARMUP", "eager")
+
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+# Only used by gevent workers: open connections, mostly idle subscribers
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "10000"))
+# Requests served at once by a gthread worker
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+wsgi_app = "server:createApp()"
+# Load the data once in the master; workers inherit it copy-on-write.
+preload_app = True
+
+
+def uses_gevent(worker_class):
+    """Return True for gunicorn's gevent workers, however -k named them"""
+    return worker_class.__module__ == "gunicorn.workers.ggevent"
+
+
+def on_starting(server):
+    if server.cfg.workers > 1 and os.environ["GUDLFT_STORAGE"] != "sqlite":
+        raise RuntimeError(
+            "Several workers need a shared storage: set GUDLFT_STORAGE=sqlite"
+        )
+    if uses_gevent(server.worker_class):
+        from server import profiler
+
+        # It reads the stacks of threads, and greenlets share a single one.
+        if profiler is not None:
+            raise RuntimeError("GUDLFT_PROFILE_SAMPLE_RATE needs gthread workers")
+
+
+def post_fork(server, worker):
+    if uses_gevent(type(worker)):
+        # The worker patches only after this hook: patch first, so that the
+        # conditions, thread-locals and threads that afterFork() replaces
+        # cooperate with the event loop.
+        from gevent import monkey
+
+        monkey.patch_all()
+    from server import afterFork
+
+    afterFork()
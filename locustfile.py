@@ -4,27 +4,128 @@ Locust performance testing for GUDLFT application
 Run with: locust -f locustfile.py --host=http://127.0.0.1:5000
 Access dashboard at: http://localhost:8089
 
+Headless, with CSV output to compare builds:
+    locust -f locustfile.py --headless -u 50 -r 5 -t 2m --host http://127.0.0.1:5000 \\
+        --csv results/build-a
+    python -m benchmarks.compare_locust results/build-a_stats.csv results/build-b_stats.csv
+
 Performance requirements:
 - Data loading: < 5 seconds
 - Booking updates: < 2 seconds
 - Simulate 6 concurrent users
+
+Simulated users draw their club and the competitions they book from the same
+data files as the server (LOCUST_CLUBS_FILE, LOCUST_COMPETITIONS_FILE; use
+benchmarks.generate for large datasets). LOCUST_SKEW picks how load spreads:
+"uniform", or "zipf" where the k-th record of each file is chosen with a
+weight of 1/k^LOCUST_ZIPF_S, so a few hot clubs and competitions take most
+of the traffic. Bookings only target competitions that had not started
+when the run began. Each booking is also reported under the BOOKING type as
+"booking committed" or "booking rejected: <reason>", so commits and
+rejections show up as separate rows in the stats and CSV files.
 """
 
+import bisect
+import itertools
+import os
+import random
+import time
+from datetime import datetime
+
 from locust import HttpUser, task, between
 
+from gudlft.storage import read_clubs, read_competitions
+
+# Deepest points board page to request; raise it for large generated datasets
+MAX_PAGE = int(os.environ.get("LOCUST_MAX_PAGE", "100"))
+# How long a live-updates subscriber keeps its /events connection open
+LISTEN_SECONDS = float(os.environ.get("LOCUST_LISTEN_SECONDS", "30"))
+# Live-updates subscribers for every 4 interactive users; raise it (e.g. to
+# 400 with -u 4000) to hold thousands of idle streams during a run
+SUBSCRIBER_WEIGHT = int(os.environ.get("LOCUST_SUBSCRIBER_WEIGHT", "1"))
+CLUBS_FILE = os.environ.get("LOCUST_CLUBS_FILE", "clubs.json")
+COMPETITIONS_FILE = os.environ.get("LOCUST_COMPETITIONS_FILE", "competitions.json")
+SKEW = os.environ.get("LOCUST_SKEW", "uniform")
+ZIPF_S = float(os.environ.get("LOCUST_ZIPF_S", "1.1"))
+# Places requested by each booking, drawn uniformly from 1..MAX_PLACES
+MAX_PLACES = int(os.environ.get("LOCUST_MAX_PLACES", "2"))
+# Fix the draws so two builds are tested with the same sequence of picks
+if os.environ.get("LOCUST_SEED"):
+    random.seed(int(os.environ["LOCUST_SEED"]))
+
+# Booking outcomes, recognized from the flashed message in the response
+BOOKING_OUTCOMES = [
+    (b"Great-booking complete!", "booking committed"),
+    (b"past competition", "booking rejected: past"),
+    (b"Not enough places", "booking rejected: no places"),
+    (b"more than 12", "booking rejected: 12 cap"),
+    (b"enough points", "booking rejected: no points"),
+]
+
+
+class Picker:
+    """Draws records uniformly or with a Zipf skew over their file order"""
+
+    def __init__(self, records, skew=SKEW, s=ZIPF_S):
+        if not records:
+            raise ValueError("Nothing to pick from: check the LOCUST_*_FILE settings")
+        self.records = records
+        self.cum_weights = None
+        if skew == "zipf":
+            self.cum_weights = list(
+                itertools.accumulate(1 / rank**s for rank in range(1, len(records) + 1))
+            )
+        elif skew != "uniform":
+            raise ValueError(f"Unknown LOCUST_SKEW: {skew}")
+
+    def pick(self):
+        if self.cum_weights is None:
+            return random.choice(self.records)
+        point = random.random() * self.cum_weights[-1]
+        return self.records[bisect.bisect(self.cum_weights, point)]
+
+
+CLUBS = Picker(read_clubs(CLUBS_FILE)[0])
+_competitions = read_competitions(COMPETITIONS_FILE)[0]
+_upcoming = [c for c in _competitions if c.date > datetime.now() and c.number_of_places]
+# Fall back to every competition so a dataset of past ones still produces load.
+COMPETITIONS = Picker(_upcoming or _competitions)
+
 
 class GUDLFTUser(HttpUser):
     """Simulates a user interacting with the GUDLFT application"""
 
     # Wait between 1 and 3 seconds between tasks
     wait_time = between(1, 3)
+    # Four interactive users for every live-updates subscriber
+    weight = 4
 
     def on_start(self):
-        """Called when a simulated user starts"""
-        # Valid test data
-        self.email = "john@simplylift.co"
-        self.club_name = "Simply Lift"
-        self.competition_name = "Spring Festival"
+        """Called when a simulated user starts; bookings need a logged-in club"""
+        self.pick_identity()
+        self.client.post("/showSummary", data={"email": self.email})
+
+    def pick_identity(self):
+        """Choose the club drawn from the dataset that this user logs in as"""
+        club = CLUBS.pick()
+        self.email = club.email
+        self.club_name = club.name
+
+    def record_booking_outcome(self, response, started):
+        """Report the booking as a commit or a rejection (by reason)"""
+        name = "booking rejected: other"
+        for marker, outcome in BOOKING_OUTCOMES:
+            if marker in response.content:
+                name = outcome
+                break
+        self.environment.events.request.fire(
+            request_type="BOOKING",
+            name=name,
+            response_time=(time.monotonic() - started) * 1000,
+            response_length=len(response.content),
+            exception=None,
+            context={},
+        )
 
     @task(3)
     def load_homepage(self):
@@ -48,6 +149,7 @@ class GUDLFTUser(HttpUser):
         Requirement: < 5 seconds
         Weight: 2
         """
+        self.pick_identity()
         with self.client.post(
             "/showSummary", data={"email": self.email}, catch_response=True
         ) as response:
@@ -67,8 +169,11 @@ class GUDLFTUser(HttpUser):
         Requirement: < 2 seconds
         Weight: 1
         """
+        competition = COMPETITIONS.pick()
         with self.client.get(
-            f"/book/{self.competition_name}/{self.club_name}", catch_response=True
+            f"/book/{competition.name}",
+            name="/book/[competition]",
+            catch_response=True,
         ) as response:
             if response.elapsed.total_seconds() > 2:
                 response.failure(
@@ -83,13 +188,14 @@ class GUDLFTUser(HttpUser):
         Test: Submit booking (update operation)
         Requirement: < 2 seconds
         Weight: 1
+        Reports a "booking committed" or "booking rejected: <reason>" entry
         """
+        started = time.monotonic()
         with self.client.post(
             "/purchasePlaces",
             data={
-                "competition": self.competition_name,
-                "club": self.club_name,
-                "places": "1",
+                "competition": COMPETITIONS.pick().name,
+                "places": str(random.randint(1, MAX_PLACES)),
             },
             catch_response=True,
         ) as response:
@@ -99,6 +205,7 @@ class GUDLFTUser(HttpUser):
                 )
             elif response.status_code == 200:
                 response.success()
+                self.record_booking_outcome(response, started)
 
     @task(1)
     def view_points_board(self):
@@ -117,3 +224,108 @@ class GUDLFTUser(HttpUser):
                 response.success()
             else:
                 response.failure("Points board not displayed correctly")
+
+    @task(1)
+    def view_deep_points_page(self):
+        """
+        Test: View a random (possibly deep) page of the points board
+        Requirement: < 5 seconds
+        Weight: 1
+        Note: Pages past the end render an empty table and still return 200
+        """
+        page = random.randint(1, MAX_PAGE)
+        with self.client.get(
+            f"/?page={page}", name="/?page=[n]", catch_response=True
+        ) as response:
+            if response.elapsed.total_seconds() > 5:
+                response.failure(
+                    f"Page {page} took {response.elapsed.total_seconds():.2f}s (> 5s)"
+                )
+            elif response.status_code == 200:
+                response.success()
+
+    @task(1)
+    def search_points_board(self):
+        """
+        Test: Prefix search on the points board (always sorted by name)
+        Requirement: < 5 seconds
+        Weight: 1
+        """
+        with self.client.get(
+            f"/?q={self.club_name[:2]}", name="/?q=[prefix]", catch_response=True
+        ) as response:
+            if response.elapsed.total_seconds() > 5:
+                response.failure(
+                    f"Search took {response.elapsed.total_seconds():.2f}s (> 5s)"
+                )
+            elif response.status_code == 200:
+                response.success()
+
+    @task(1)
+    def view_deep_competitions_page(self):
+        """
+        Test: Login and request a random page of the competition list
+        Requirement: < 5 seconds
+        Weight: 1
+        """
+        page = random.randint(1, MAX_PAGE)
+        with self.client.post(
+            "/showSummary",
+            data={"email": self.email, "page": str(page)},
+            name="/showSummary [page n]",
+            catch_response=True,
+        ) as response:
+            if response.elapsed.total_seconds() > 5:
+                response.failure(
+                    f"Competitions page {page} took "
+                    f"{response.elapsed.total_seconds():.2f}s (> 5s)"
+                )
+            elif response.status_code == 200:
+                response.success()
+
+
+class LiveUpdatesSubscriber(HttpUser):
+    """Simulates a mostly idle client following /events for live updates
+
+    Run only subscribers with: locust -f locustfile.py LiveUpdatesSubscriber
+    Mix thousands of them with bookings: LOCUST_SUBSCRIBER_WEIGHT=400 and -u 4000
+    """
+
+    wait_time = between(1, 3)
+    weight = SUBSCRIBER_WEIGHT
+
+    @task
+    def listen_for_updates(self):
+        """
+        Test: Hold an SSE connection open and count pushed booking events
+        Requirement: stream opens in < 2 seconds
+        Reports one "SSE booking event" entry per event received
+        """
+        deadline = time.monotonic() + LISTEN_SECONDS
+        with self.client.get(
+            "/events", stream=True, catch_response=True, timeout=LISTEN_SECONDS + 20
+        ) as response:
+            if response.elapsed.total_seconds() > 2:
+                response.failure(
+                    f"Stream took {response.elapsed.total_seconds():.2f}s (> 2s) to open"
+                )
+                return
+            if response.status_code != 200:
+                response.failure(f"Stream failed with {response.status_code}")
+                return
+            received_at = time.monotonic()
+            for line in response.iter_lines():
+                if line.startswith(b"data:"):
+                    now = time.monotonic()
+                    self.environment.events.request.fire(
+                        request_type="SSE",
+                        name="SSE booking event",
+                        response_time=(now - received_at) * 1000,
+                        response_length=len(line),
+                        exception=None,
+                        context={},
+                    )
+                    received_at = now
+                if time.monotonic() > deadline:
+                    break
+            response.success()
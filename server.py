@@ -1,104 +1,633 @@
+import atexit
+import hashlib
+import hmac
 import json
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, flash, url_for
+from flask import Flask, abort, g, render_template, request, redirect, flash, session, url_for
+from markupsafe import Markup
 
+from gudlft.assets import StaticAssets
+from gudlft.booking import BookingEngine, BookingError
+from gudlft.cache import FragmentCache
+from gudlft.compression import Compressor, encoded_etags
+from gudlft.events import EventBroker, StorageFeed
+from gudlft.metrics import LatencyMetrics, noop
+from gudlft.models import DATE_FORMAT
+from gudlft.pagination import Page, page_args
+from gudlft.pipeline import BookingPipeline
+from gudlft.profiling import RequestProfiler
+from gudlft.registry import OPEN, Registry
+from gudlft.storage import JsonStorage, SqliteStorage, read_clubs, read_competitions
+from gudlft.templating import precompile, use_bytecode_cache
+from gudlft.warmup import Warmup
 
-def loadClubs():
-    with open("clubs.json") as c:
-        listOfClubs = json.load(c)["clubs"]
-        return listOfClubs
 
+def loadClubs(registry=None, path="clubs.json"):
+    listOfClubs, journal_seq = read_clubs(path)
+    if registry is not None:
+        registry.set_clubs(listOfClubs, journal_seq)
+    return listOfClubs
 
-def loadCompetitions():
-    with open("competitions.json") as comps:
-        listOfCompetitions = json.load(comps)["competitions"]
-        return listOfCompetitions
+
+def loadCompetitions(registry=None, path="competitions.json"):
+    listOfCompetitions, journal_seq = read_competitions(path)
+    if registry is not None:
+        registry.set_competitions(listOfCompetitions, journal_seq)
+    return listOfCompetitions
+
+
+def createStorage(registry, config):
+    """Return the storage backend selected by the STORAGE setting"""
+    if config["STORAGE"] == "json":
+        return JsonStorage(
+            registry,
+            config["CLUBS_FILE"],
+            config["COMPETITIONS_FILE"],
+            persistence=config["PERSISTENCE"],
+            journal_path=config["JOURNAL_FILE"],
+            journal_fsync=config["JOURNAL_FSYNC"],
+            flush_interval=config["FLUSH_INTERVAL"],
+            batch_size=config["FLUSH_BATCH_SIZE"],
+            ledger_every=config["LEDGER_SNAPSHOT_EVERY"],
+            reload_interval=config["RELOAD_INTERVAL"],
+        )
+    if config["RELOAD_INTERVAL"] > 0:
+        raise ValueError("Hot reload of the data files needs the json storage")
+    if config["STORAGE"] == "sqlite":
+        return SqliteStorage(
+            registry,
+            config["SQLITE_FILE"],
+            pool_size=config["SQLITE_POOL_SIZE"],
+            seed_clubs_path=config["CLUBS_FILE"],
+            seed_competitions_path=config["COMPETITIONS_FILE"],
+        )
+    raise ValueError(f"Unknown storage backend: {config['STORAGE']}")
 
 
 app = Flask(__name__)
-app.secret_key = "something_special"
+app.config.update(
+    # Logins live in the session cookie alone: keep it off cross-site posts.
+    SESSION_COOKIE_SAMESITE="Lax",
+    STORAGE="json",
+    CLUBS_FILE="clubs.json",
+    COMPETITIONS_FILE="competitions.json",
+    PERSISTENCE=True,
+    FLUSH_INTERVAL=1.0,
+    FLUSH_BATCH_SIZE=100,
+    LEDGER_SNAPSHOT_EVERY=10,
+    RELOAD_INTERVAL=0.0,
+    JOURNAL_FILE="bookings.journal",
+    JOURNAL_FSYNC=True,
+    SQLITE_FILE="gudlft.db",
+    SQLITE_POOL_SIZE=8,
+    FRAGMENT_CACHE_SIZE=128,
+    PAGE_SIZE=50,
+    MAX_PAGE_SIZE=200,
+    SSE_HISTORY=1024,
+    SSE_HEARTBEAT=15.0,
+    SSE_POLL_INTERVAL=0.5,
+    BULK_MAX_BOOKINGS=1000,
+    METRICS=True,
+    PROFILE_SAMPLE_RATE=0.0,
+    PROFILE_INTERVAL=0.005,
+    ADMIN_TOKEN=None,
+    WARMUP="background",
+    BOOKING_PIPELINE=False,
+    PIPELINE_WRITERS=4,
+    PIPELINE_MAX_BATCH=64,
+    PIPELINE_MAX_WAIT=0.0,
+    TEMPLATE_CACHE=True,
+    TEMPLATE_CACHE_DIR=None,
+    PRECOMPILE_TEMPLATES=True,
+    COMPRESSION=False,
+    COMPRESSION_MIN_SIZE=1024,
+    COMPRESSION_CACHE_SIZE=128,
+)
+app.config.from_prefixed_env("GUDLFT")
+
+if not app.config["SECRET_KEY"]:
+    # A known key would let anyone sign a session logging them in as any club.
+    raise RuntimeError("GUDLFT_SECRET_KEY must be set to sign the session cookie")
+
+if app.config["TEMPLATE_CACHE"]:
+    use_bytecode_cache(app, app.config["TEMPLATE_CACHE_DIR"])
+
+metrics = LatencyMetrics() if app.config["METRICS"] else None
+lap = metrics.lap if metrics is not None else noop
+
+if metrics is not None:
+    # Registered first so the timer also covers the other request hooks.
+    @app.before_request
+    def startTimer():
+        metrics.start(request.endpoint)
+
+    @app.teardown_request
+    def finishTimer(error=None):
+        metrics.finish()
+
+    @app.route("/metrics")
+    def metricsPage():
+        return app.response_class(
+            metrics.render(), mimetype="text/plain; version=0.0.4"
+        )
+
+profiler = None
+if app.config["PROFILE_SAMPLE_RATE"] > 0:
+    profiler = RequestProfiler(
+        app.config["PROFILE_SAMPLE_RATE"], app.config["PROFILE_INTERVAL"]
+    )
+
+    @app.before_request
+    def startProfile():
+        profiler.start(request.endpoint)
+
+    @app.teardown_request
+    def stopProfile(error=None):
+        profiler.stop()
+
+
+registry = Registry()
+storage = createStorage(registry, app.config)
+atexit.register(storage.close)
+# Loading is deferred: see createApp() and requireData().
+warmup = Warmup(storage.load)
+
+broker = EventBroker(app.config["SSE_HISTORY"])
+feed = None
+if app.config["STORAGE"] == "sqlite":
+    # Workers share only the database: each broker follows it, so that every
+    # subscriber sees the bookings of every worker (see gudlft.events).
+    feed = StorageFeed(storage, broker, app.config["SSE_POLL_INTERVAL"])
+    atexit.register(feed.stop)
+engine = BookingEngine(
+    registry, storage=storage, broker=broker if feed is None else None, lap=lap
+)
+pipeline = None
+if app.config["BOOKING_PIPELINE"]:
+    pipeline = BookingPipeline(
+        engine,
+        writers=app.config["PIPELINE_WRITERS"],
+        max_batch=app.config["PIPELINE_MAX_BATCH"],
+        max_wait=app.config["PIPELINE_MAX_WAIT"],
+    )
+    # Registered after storage.close, so it runs first and drains the queues.
+    atexit.register(pipeline.close)
+fragment_cache = FragmentCache(app.config["FRAGMENT_CACHE_SIZE"])
+compressor = None
+if app.config["COMPRESSION"]:
+    compressor = Compressor(
+        app.config["COMPRESSION_MIN_SIZE"], app.config["COMPRESSION_CACHE_SIZE"]
+    )
+assets = StaticAssets(app.static_folder)
+app.add_template_global(assets.url, "asset_url")
+
+
+def createApp():
+    """Return the app, loading its data as the WARMUP setting says
+
+    "eager" loads before returning and raises if the data is broken,
+    "background" starts a warm-up thread, "lazy" leaves the load to the first
+    request. Importing this module never loads anything by itself. Templates
+    are compiled here too, unless PRECOMPILE_TEMPLATES is off.
+    """
+    if app.config["PRECOMPILE_TEMPLATES"]:
+        precompile(app)
+    mode = app.config["WARMUP"]
+    if mode == "eager":
+        if not warmup.run():
+            raise warmup.error
+    elif mode == "background":
+        warmup.start()
+    elif mode != "lazy":
+        raise ValueError(f"Unknown warm-up mode: {mode}")
+    return app
+
+
+# Endpoints that answer while the data is still loading
+NO_DATA_ENDPOINTS = {"ready", "metricsPage", "static"}
+
+
+@app.before_request
+def requireData():
+    if warmup.ready or request.endpoint in NO_DATA_ENDPOINTS:
+        return
+    if not warmup.run():
+        abort(503)
+    lap("warmup")
+
+
+@app.before_request
+def refreshStorage():
+    # Probes answer before the load; there is nothing to refresh until then.
+    if not warmup.ready:
+        return
+    storage.refresh()
+    lap("refresh")
+
+
+@app.after_request
+def compressResponse(response):
+    # Routes whose body only depends on the data and the query set
+    # g.versionKey, so the compressed body can be reused.
+    if compressor is not None:
+        compressor.compress(response, request.accept_encodings, g.get("versionKey"))
+        lap("compress")
+    return response
+
+
+@app.after_request
+def cacheStaticAsset(response):
+    if request.endpoint == "static":
+        assets.cache_forever(response, request.view_args["filename"], request.args.get("v"))
+    return response
+
+
+def clubsPage(values):
+    """Return the requested page of the points board"""
+    number, per_page = page_args(
+        values, app.config["PAGE_SIZE"], app.config["MAX_PAGE_SIZE"]
+    )
+    q = values.get("q", "").strip()
+    # Searches are listed by name only (see Registry.clubs_page).
+    sort = "name" if q or values.get("sort") == "name" else "points"
+    start = (number - 1) * per_page
+    items, total = registry.clubs_page(start, start + per_page, order=sort, prefix=q)
+    return Page(items, number, per_page, total, {"q": q, "sort": sort})
+
+
+def competitionsPage(values, open_only=False):
+    """Return the requested page of competitions, in date order"""
+    number, per_page = page_args(
+        values, app.config["PAGE_SIZE"], app.config["MAX_PAGE_SIZE"]
+    )
+    q = values.get("q", "").strip()
+    start = (number - 1) * per_page
+    registry.advance_clock(datetime.now())
+    items, total = registry.competitions_page(
+        start, start + per_page, prefix=q, open_only=open_only
+    )
+    return Page(items, number, per_page, total, {"q": q, "open": open_only})
+
+
+def renderPointsTable(board, version):
+    """Return the rows of one points board page, rendered once per registry version
+
+    `version` must be read before the page was built: a booking committed
+    in between then leaves the rows under the older version, which no later
+    request asks for, instead of caching them as the newer one.
+    """
+    return fragment_cache.get_or_render(
+        ("points_table", version, board.cache_key),
+        lambda: Markup(render_template("_points_rows.html", clubs=board.items)),
+    )
+
+
+def renderIndex(values=None):
+    """Render the login page with the requested points board page"""
+    version = registry.version
+    board = clubsPage(values or {})
+    lap("lookup")
+    page = render_template(
+        "index.html", board=board, points_table=renderPointsTable(board, version)
+    )
+    lap("render")
+    return page
+
 
-competitions = loadCompetitions()
-clubs = loadClubs()
+def renderWelcome(club, values=None):
+    """Render the club summary with the requested competitions page"""
+    version = registry.version
+    board = clubsPage({})
+    competitions = competitionsPage(values or {}, open_only=True)
+    lap("lookup")
+    page = render_template(
+        "welcome.html",
+        club=club,
+        competitions=competitions,
+        points_table=renderPointsTable(board, version),
+    )
+    lap("render")
+    return page
 
 
 @app.route("/")
 def index():
-    return render_template("index.html", clubs=clubs)
+    if "_flashes" not in session:
+        g.versionKey = ("index", registry.version, request.query_string)
+    return renderIndex(request.args)
+
+
+def currentClub():
+    """Return the club logged in on this session, or None
+
+    The login stores the club's name, its key in the registry, in the signed
+    session cookie: later requests look it up directly and never trust a
+    club sent in a URL or a form.
+    """
+    name = session.get("club")
+    if name is None:
+        return None
+    club = registry.club_by_name(name)
+    if club is None:
+        # Removed from clubs.json since the login (see gudlft.reload)
+        session.pop("club")
+    return club
+
+
+def loginRequired():
+    """Send a visitor without a logged-in club back to the login page"""
+    flash("Please log in first.")
+    return renderIndex()
 
 
 @app.route("/showSummary", methods=["POST"])
 def showSummary():
     email = request.form["email"]
-    club_list = [club for club in clubs if club["email"] == email]
-    if not club_list:
+    club = registry.club_by_email(email)
+    lap("lookup")
+    if club is None:
         flash("Sorry, that email wasn't found.")
-        return render_template("index.html", clubs=clubs)
-    club = club_list[0]
-    return render_template(
-        "welcome.html", club=club, competitions=competitions, clubs=clubs
-    )
+        return renderIndex()
+    session.clear()
+    session["club"] = club.name
+    return renderWelcome(club, request.form)
 
 
-@app.route("/book/<competition>/<club>")
-def book(competition, club):
-    foundClub = [c for c in clubs if c["name"] == club][0]
-    foundCompetition = [c for c in competitions if c["name"] == competition][0]
-    if foundClub and foundCompetition:
-        return render_template(
-            "booking.html", club=foundClub, competition=foundCompetition
-        )
-    else:
-        flash("Something went wrong-please try again")
-        return render_template(
-            "welcome.html", club=club, competitions=competitions, clubs=clubs
-        )
+@app.route("/summary")
+def summary():
+    club = currentClub()
+    if club is None:
+        return loginRequired()
+    return renderWelcome(club, request.args)
+
+
+@app.route("/book/<competition>")
+def book(competition):
+    club = currentClub()
+    if club is None:
+        return loginRequired()
+    foundCompetition = registry.competition_by_name(competition)
+    lap("lookup")
+    if foundCompetition:
+        page = render_template("booking.html", club=club, competition=foundCompetition)
+        lap("render")
+        return page
+    flash("Something went wrong-please try again")
+    return renderWelcome(club)
 
 
 @app.route("/purchasePlaces", methods=["POST"])
 def purchasePlaces():
-    competition = [c for c in competitions if c["name"] == request.form["competition"]][
-        0
-    ]
-    club = [c for c in clubs if c["name"] == request.form["club"]][0]
-    placesRequired = int(request.form["places"])
-    club_points = int(club["points"])
-    available_places = int(competition["numberOfPlaces"])
-
-    # Check if competition is in the past
-    competition_date = datetime.strptime(competition["date"], "%Y-%m-%d %H:%M:%S")
-    if competition_date < datetime.now():
-        flash("You cannot book places for a past competition.")
-        return render_template(
-            "welcome.html", club=club, competitions=competitions, clubs=clubs
-        )
+    club = currentClub()
+    if club is None:
+        return loginRequired()
+    competition = registry.competition_by_name(request.form["competition"])
+    if competition is None:
+        flash("Something went wrong-please try again")
+        return renderWelcome(club)
+    try:
+        placesRequired = int(request.form["places"])
+    except ValueError:
+        flash("Places must be a positive integer.")
+        return renderWelcome(club)
+    lap("lookup")
+    try:
+        if pipeline is not None:
+            pipeline.book(club, competition, placesRequired)
+            lap("pipeline")
+        else:
+            engine.book(club, competition, placesRequired)
+    except BookingError as error:
+        flash(str(error))
+        return renderWelcome(club)
+    flash("Great-booking complete!")
+    return renderWelcome(club)
 
-    if placesRequired > available_places:
-        flash(f"Not enough places available! Only {available_places} places remaining.")
-        return render_template("welcome.html", club=club, competitions=competitions)
 
-    if placesRequired > 12:
-        flash("You cannot book more than 12 places per competition.")
-        return render_template("welcome.html", club=club, competitions=competitions)
+def afterFork():
+    """Reset per-process state in a worker forked from a preloaded master"""
+    warmup.after_fork()
+    if metrics is not None:
+        metrics.after_fork()
+    broker.after_fork()
+    if feed is not None:
+        feed.after_fork()
+    if pipeline is not None:
+        pipeline.after_fork()
+    if warmup.ready:
+        storage.after_fork()
 
-    if placesRequired > club_points:
-        flash(f"You don't have enough points! You have {club_points} points.")
-        return render_template("welcome.html", club=club, competitions=competitions)
 
-    competition["numberOfPlaces"] = str(available_places - placesRequired)
-    club["points"] = str(club_points - placesRequired)
-    flash("Great-booking complete!")
-    return render_template(
-        "welcome.html", club=club, competitions=competitions, clubs=clubs
+def jsonPage(name, page, serialize):
+    """Return (compact JSON body, strong ETag) of one page of an API listing
+
+    The ETag is a hash of the body, not of the registry version: versions
+    count per process, while every worker serving the same data sends the
+    same body and thus the same ETag.
+    """
+    body = json.dumps(
+        {
+            name: [serialize(item) for item in page.items],
+            "page": page.number,
+            "per_page": page.per_page,
+            "total": page.total,
+        },
+        separators=(",", ":"),
+    )
+    return body, hashlib.sha256(body.encode()).hexdigest()[:16]
+
+
+def conditionalJson(name, version, page, serialize):
+    """Return page as compact JSON with a strong ETag, or 304 if the client has it
+
+    `version` is the registry version read before `page` was built, so a
+    booking committed meanwhile cannot cache the older body as current.
+    """
+    lap("lookup")
+    key = (name, version, page.cache_key)
+    body, etag = fragment_cache.get_or_render(key, lambda: jsonPage(name, page, serialize))
+    # A compressed response was sent with its own ETag: accept it back too.
+    matched = next(filter(request.if_none_match.contains, encoded_etags(etag)), None)
+    if matched is not None:
+        response = app.response_class(status=304)
+        etag = matched
+    else:
+        g.versionKey = key
+        response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    lap("render")
+    return response
+
+
+@app.route("/api/points")
+def apiPoints():
+    version = registry.version
+    return conditionalJson(
+        "clubs",
+        version,
+        clubsPage(request.args),
+        lambda club: {"name": club.name, "points": club.points},
     )
 
 
-# TODO: Add route for points display
+@app.route("/api/competitions")
+def apiCompetitions():
+    # Expiring started competitions bumps the version: do it before reading it.
+    registry.advance_clock(datetime.now())
+    version = registry.version
+    return conditionalJson(
+        "competitions",
+        version,
+        competitionsPage(request.args, open_only=request.args.get("status") == OPEN),
+        lambda competition: {
+            "name": competition.name,
+            "date": competition.date.strftime(DATE_FORMAT),
+            "numberOfPlaces": competition.number_of_places,
+            "status": registry.competition_status(competition),
+        },
+    )
+
+
+def jsonResponse(payload, status=200):
+    """Return payload as compact JSON"""
+    return app.response_class(
+        json.dumps(payload, separators=(",", ":")),
+        status=status,
+        mimetype="application/json",
+    )
+
+
+def parseBooking(item):
+    """Resolve one bulk booking item to (club, competition, places)"""
+    if not isinstance(item, dict):
+        raise BookingError("Each booking must be an object.")
+    club, competition = item.get("club"), item.get("competition")
+    club = registry.club_by_name(club) if isinstance(club, str) else None
+    if club is None:
+        raise BookingError(f"Unknown club: {item.get('club')}")
+    if isinstance(competition, str):
+        competition = registry.competition_by_name(competition)
+    else:
+        competition = None
+    if competition is None:
+        raise BookingError(f"Unknown competition: {item.get('competition')}")
+    places = item.get("places")
+    if type(places) is not int or places < 1:
+        raise BookingError("Places must be a positive integer.")
+    return club, competition, places
+
+
+@app.route("/api/bookings", methods=["POST"])
+def apiBookings():
+    """Apply a JSON array of bookings in one commit, best-effort or all-or-nothing
+
+    An admin import tool: it books for any club, so it takes the admin token.
+    """
+    if not isAdmin():
+        return jsonResponse({"error": "Admin token required."}, 403)
+    mode = request.args.get("mode", "best-effort")
+    if mode not in ("best-effort", "atomic"):
+        return jsonResponse({"error": "mode must be best-effort or atomic."}, 400)
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        return jsonResponse({"error": "Expected a non-empty JSON array of bookings."}, 400)
+    if len(items) > app.config["BULK_MAX_BOOKINGS"]:
+        return jsonResponse(
+            {"error": f"At most {app.config['BULK_MAX_BOOKINGS']} bookings per request."},
+            413,
+        )
+    atomic = mode == "atomic"
+    bookings, errors = [], []
+    for item in items:
+        try:
+            bookings.append(parseBooking(item))
+            errors.append(None)
+        except BookingError as error:
+            errors.append(error)
+    lap("lookup")
+    applied = not (atomic and any(errors))
+    if applied:
+        results = iter(engine.book_many(bookings, atomic=atomic))
+        errors = [error or next(results) for error in errors]
+        applied = not (atomic and any(errors))
+    payload = []
+    for error in errors:
+        if error is not None:
+            payload.append({"status": "rejected", "error": str(error)})
+        else:
+            payload.append({"status": "booked" if applied else "not_applied"})
+    response = jsonResponse(
+        {"mode": mode, "booked": errors.count(None) if applied else 0, "results": payload},
+        200 if applied else 409,
+    )
+    lap("render")
+    return response
+
+
+@app.route("/events")
+def events():
+    last_id = request.headers.get("Last-Event-ID", request.args.get("lastEventId"))
+    try:
+        last_id = int(last_id) if last_id is not None else None
+    except ValueError:
+        last_id = None
+    if feed is not None:
+        feed.start()
+    return app.response_class(
+        broker.stream(last_id, heartbeat=app.config["SSE_HEARTBEAT"]),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/ready")
+def ready():
+    """Readiness probe: 200 once the data is loaded, 503 before or if it failed
+
+    Polling it starts the warm-up, so a lazy process becomes ready without
+    waiting for a first real request.
+    """
+    warmup.start()
+    payload = {"status": warmup.state}
+    if warmup.seconds is not None:
+        payload["load_seconds"] = round(warmup.seconds, 3)
+    if warmup.error is not None:
+        payload["error"] = str(warmup.error)
+    return jsonResponse(payload, 200 if warmup.ready else 503)
+
+
+def isAdmin():
+    """Return True if the request carries the configured admin token"""
+    token = app.config["ADMIN_TOKEN"]
+    supplied = request.headers.get("Authorization", "")
+    # Bytes: compare_digest() refuses str with non-ASCII characters.
+    return bool(token) and hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode())
+
+
+@app.route("/admin/profile", methods=["GET", "DELETE"])
+def adminProfile():
+    """Download the sampled stacks as collapsed text, or clear them"""
+    if profiler is None:
+        abort(404)
+    if not isAdmin():
+        abort(403)
+    if request.method == "DELETE":
+        profiler.reset()
+        return "", 204
+    route = request.args.get("route")
+    response = app.response_class(profiler.collapsed(route), mimetype="text/plain")
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="{route or "requests"}.collapsed"'
+    )
+    return response
+
 
 @app.route("/logout")
 def logout():
+    session.clear()
     return redirect(url_for("index"))
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    createApp().run(debug=True)
@@ -0,0 +1,124 @@
+"""
+Shared test configuration and fixtures
+"""
+
+import json
+import os
+import shutil
+
+import pytest
+
+from gudlft.models import Club, Competition
+from gudlft.registry import Registry
+
+# Tests mutate the in-memory data; never let them rewrite the real JSON files.
+os.environ.setdefault("GUDLFT_PERSISTENCE", "false")
+os.environ.setdefault("GUDLFT_SECRET_KEY", "test-secret-key")
+
+TEST_CLUBS = [
+    {"name": "Simply Lift", "email": "john@simplylift.co", "points": "13"},
+    {"name": "Iron Temple", "email": "admin@irontemple.com", "points": "4"},
+    {"name": "She Lifts", "email": "kate@shelifts.co.uk", "points": "12"},
+]
+
+TEST_COMPETITIONS = [
+    {"name": "Spring Festival", "date": "2020-03-27 10:00:00", "numberOfPlaces": "25"},
+    {"name": "Future Open", "date": "2099-06-01 10:00:00", "numberOfPlaces": "20"},
+    {"name": "Tiny Cup", "date": "2099-07-01 10:00:00", "numberOfPlaces": "2"},
+]
+
+
+def make_registry(clubs=TEST_CLUBS, competitions=TEST_COMPETITIONS):
+    """Build a registry of fresh records from JSON-style dicts"""
+    registry = Registry()
+    registry.set_clubs([Club.from_dict(club) for club in clubs])
+    registry.set_competitions([Competition.from_dict(c) for c in competitions])
+    return registry
+
+
+EMAILS = {club["name"]: club["email"] for club in TEST_CLUBS}
+
+
+def login(client, club="Simply Lift"):
+    """Log the test client in as `club` through the login form"""
+    response = client.post("/showSummary", data={"email": EMAILS[club]})
+    assert b"Welcome" in response.data
+    return response
+
+
+def install_server_state(monkeypatch, directory, backend):
+    """Point the server at a new storage backend over the data files in `directory`"""
+    import server
+    from gudlft.booking import BookingEngine
+    from gudlft.cache import FragmentCache
+    from gudlft.events import EventBroker, StorageFeed
+    from gudlft.warmup import Warmup
+
+    config = dict(
+        server.app.config,
+        STORAGE=backend,
+        PERSISTENCE=False,
+        CLUBS_FILE=str(directory / "clubs.json"),
+        COMPETITIONS_FILE=str(directory / "competitions.json"),
+        SQLITE_FILE=str(directory / "gudlft.db"),
+    )
+    registry = Registry()
+    storage = server.createStorage(registry, config)
+    warmup = Warmup(storage.load)
+    if not warmup.run():
+        raise warmup.error
+    broker = EventBroker()
+    feed = StorageFeed(storage, broker, interval=0.01) if backend == "sqlite" else None
+    monkeypatch.setattr(server, "registry", registry)
+    monkeypatch.setattr(server, "storage", storage)
+    monkeypatch.setattr(server, "warmup", warmup)
+    monkeypatch.setattr(server, "broker", broker)
+    monkeypatch.setattr(server, "feed", feed)
+    monkeypatch.setattr(
+        server,
+        "engine",
+        BookingEngine(
+            registry, storage=storage, broker=broker if feed is None else None, lap=server.lap
+        ),
+    )
+    monkeypatch.setattr(server, "fragment_cache", FragmentCache())
+    return registry, storage
+
+
+def close_server_state(storage):
+    """Stop the live updates feed, if any, and close `storage`"""
+    import server
+
+    if server.feed is not None:
+        server.feed.stop()
+    storage.close()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request):
+    """Name of the storage backend the server runs on"""
+    return request.param
+
+
+@pytest.fixture
+def repo_data(tmp_path):
+    """Private copy of the repository's data files"""
+    directory = tmp_path / "repo_data"
+    directory.mkdir()
+    for name in ("clubs.json", "competitions.json"):
+        shutil.copy(name, directory / name)
+    return directory
+
+
+@pytest.fixture
+def fresh_registry(monkeypatch, tmp_path, backend):
+    """Swap the server's data for a private copy that includes future competitions"""
+    directory = tmp_path / "fresh_data"
+    directory.mkdir()
+    (directory / "clubs.json").write_text(json.dumps({"clubs": TEST_CLUBS}))
+    (directory / "competitions.json").write_text(
+        json.dumps({"competitions": TEST_COMPETITIONS})
+    )
+    registry, storage = install_server_state(monkeypatch, directory, backend)
+    yield registry
+    close_server_state(storage)
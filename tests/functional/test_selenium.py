@@ -64,7 +64,7 @@ class TestFunctionalSelenium:
         points_before = int(points_match.group(1))
 
         # 5. Go to booking page for Winter Cup (future competition)
-        browser.get("http://127.0.0.1:5000/book/Winter%20Cup/Simply%20Lift")
+        browser.get("http://127.0.0.1:5000/book/Winter%20Cup")
 
         # 6. Book 3 places
         places_input = browser.find_element(By.NAME, "places")
@@ -0,0 +1,15 @@
+"""
+Integration fixtures: every test runs once per storage backend
+"""
+
+import pytest
+
+from tests.conftest import close_server_state, install_server_state
+
+
+@pytest.fixture(autouse=True)
+def server_state(monkeypatch, repo_data, backend):
+    """Serve a private copy of the repository's data from the selected backend"""
+    registry, storage = install_server_state(monkeypatch, repo_data, backend)
+    yield registry
+    close_server_state(storage)
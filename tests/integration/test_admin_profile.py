@@ -0,0 +1,67 @@
+"""
+Integration tests for the admin profile download
+"""
+
+import pytest
+import server
+from gudlft.profiling import RequestProfiler
+from server import app
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the app"""
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    """Enable profiling with an admin token"""
+    profiler = RequestProfiler(1.0, interval=60)
+    monkeypatch.setattr(server, "profiler", profiler)
+    monkeypatch.setitem(app.config, "ADMIN_TOKEN", "secret")
+    return profiler
+
+
+AUTH = {"Authorization": "Bearer secret"}
+
+
+class TestAdminProfile:
+    """Test access to /admin/profile"""
+
+    def test_not_found_when_profiling_is_off(self, client, monkeypatch):
+        """Test that the endpoint does not exist without a profiler"""
+        monkeypatch.setattr(server, "profiler", None)
+        assert client.get("/admin/profile", headers=AUTH).status_code == 404
+
+    def test_requires_admin_token(self, client, profiler):
+        """Test that requests without the right token are refused"""
+        assert client.get("/admin/profile").status_code == 403
+        wrong = {"Authorization": "Bearer nope"}
+        assert client.get("/admin/profile", headers=wrong).status_code == 403
+
+    def test_non_ascii_token_is_refused(self, client, profiler):
+        """Test that a non-ASCII Authorization header is refused, not an error"""
+        wrong = {"Authorization": "Bearer sécret"}
+        assert client.get("/admin/profile", headers=wrong).status_code == 403
+
+    def test_no_token_configured_refuses_everyone(self, client, profiler, monkeypatch):
+        """Test that an unset token never grants access"""
+        monkeypatch.setitem(app.config, "ADMIN_TOKEN", None)
+        assert client.get("/admin/profile", headers=AUTH).status_code == 403
+
+    def test_download_collapsed_stacks(self, client, profiler):
+        """Test that samples come back as an attachment, filtered by route"""
+        profiler._stacks = {"book": {"book (server.py:1)": 3}, "index": {"x": 1}}
+        response = client.get("/admin/profile?route=book", headers=AUTH)
+        assert response.status_code == 200
+        assert response.get_data(as_text=True) == "book;book (server.py:1) 3\n"
+        assert "book.collapsed" in response.headers["Content-Disposition"]
+
+    def test_delete_resets(self, client, profiler):
+        """Test that DELETE clears the collected samples"""
+        profiler._stacks = {"index": {"x": 1}}
+        assert client.delete("/admin/profile", headers=AUTH).status_code == 204
+        assert profiler.routes() == []
@@ -0,0 +1,127 @@
+"""
+Integration tests for the JSON API and its conditional GET support
+"""
+
+import pytest
+from server import app
+from tests.conftest import login
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the app"""
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+class TestPointsApi:
+    """Test the /api/points endpoint"""
+
+    def test_returns_clubs_by_points(self, client, fresh_registry):
+        """Test that clubs are listed with integer points, highest first"""
+        response = client.get("/api/points")
+        assert response.status_code == 200
+        assert response.mimetype == "application/json"
+        data = response.get_json()
+        assert data["clubs"][0] == {"name": "Simply Lift", "points": 13}
+        assert data["total"] == 3
+
+    def test_body_is_compact(self, client, fresh_registry):
+        """Test that no whitespace padding is sent"""
+        assert b", " not in client.get("/api/points").data
+
+    def test_pagination_and_search(self, client, fresh_registry):
+        """Test that page and prefix parameters are honoured"""
+        data = client.get("/api/points?q=she&per_page=1").get_json()
+        assert [club["name"] for club in data["clubs"]] == ["She Lifts"]
+        assert data["per_page"] == 1
+
+    def test_if_none_match_returns_304(self, client, fresh_registry):
+        """Test that a matching ETag gets an empty 304"""
+        etag = client.get("/api/points").headers["ETag"]
+        response = client.get("/api/points", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.headers["ETag"] == etag
+
+    def test_etag_is_strong(self, client, fresh_registry):
+        """Test that the ETag is not a weak validator"""
+        assert not client.get("/api/points").headers["ETag"].startswith("W/")
+
+    def test_booking_changes_etag(self, client, fresh_registry):
+        """Test that a booking invalidates the previous ETag"""
+        etag = client.get("/api/points").headers["ETag"]
+        login(client)
+        client.post(
+            "/purchasePlaces",
+            data={"competition": "Future Open", "places": "3"},
+        )
+        response = client.get("/api/points", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.get_json()["clubs"][0]["points"] == 12
+
+    def test_booking_during_render_keeps_old_etag(self, client, fresh_registry, monkeypatch):
+        """Test that a page built before a booking does not validate after it"""
+        clubs_page = fresh_registry.clubs_page
+
+        def booking_after_slice(*args, **kwargs):
+            page = clubs_page(*args, **kwargs)
+            monkeypatch.setattr(fresh_registry, "clubs_page", clubs_page)
+            club = fresh_registry.club_by_name("Simply Lift")
+            fresh_registry.update_club(club, points=1)
+            return page
+
+        monkeypatch.setattr(fresh_registry, "clubs_page", booking_after_slice)
+        etag = client.get("/api/points?per_page=1").headers["ETag"]
+        response = client.get("/api/points?per_page=1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.get_json()["clubs"][0]["name"] == "She Lifts"
+
+    def test_etag_is_shared_by_workers(self, client, fresh_registry, monkeypatch):
+        """Test that another worker's ETag for the same data gets a 304"""
+        import server
+        from gudlft.cache import FragmentCache
+
+        etag = client.get("/api/points").headers["ETag"]
+        # Another worker: its own cache and version counter, the same data
+        monkeypatch.setattr(server, "fragment_cache", FragmentCache())
+        fresh_registry.version += 7
+        response = client.get("/api/points", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_etag_depends_on_query(self, client, fresh_registry):
+        """Test that two different pages do not share an ETag"""
+        first = client.get("/api/points?page=1&per_page=1").headers["ETag"]
+        second = client.get("/api/points?page=2&per_page=1").headers["ETag"]
+        assert first != second
+
+
+class TestCompetitionsApi:
+    """Test the /api/competitions endpoint"""
+
+    def test_returns_competitions_by_date(self, client, fresh_registry):
+        """Test that competitions are listed chronologically with integer places"""
+        data = client.get("/api/competitions").get_json()
+        assert data["competitions"][0] == {
+            "name": "Spring Festival",
+            "date": "2020-03-27 10:00:00",
+            "numberOfPlaces": 25,
+            "status": "past",
+        }
+        assert data["total"] == 3
+
+    def test_status_filter_lists_open_competitions(self, client, fresh_registry):
+        """Test that status=open leaves out past and full competitions"""
+        fresh_registry.update_competition(
+            fresh_registry.competition_by_name("Tiny Cup"), number_of_places=0
+        )
+        data = client.get("/api/competitions?status=open").get_json()
+        assert [c["name"] for c in data["competitions"]] == ["Future Open"]
+        assert data["competitions"][0]["status"] == "open"
+
+    def test_if_none_match_returns_304(self, client, fresh_registry):
+        """Test that polling unchanged data costs a 304"""
+        etag = client.get("/api/competitions").headers["ETag"]
+        response = client.get("/api/competitions", headers={"If-None-Match": etag})
+        assert response.status_code == 304
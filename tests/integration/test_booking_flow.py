@@ -4,6 +4,7 @@ Integration tests for the booking flow
 
 import pytest
 from server import app
+from tests.conftest import login
 
 
 @pytest.fixture
@@ -27,7 +28,8 @@ class TestBookingFlow:
 
     def test_book_page_access(self, client):
         """Test accessing the booking page"""
-        response = client.get("/book/Spring Festival/Simply Lift")
+        login(client)
+        response = client.get("/book/Spring Festival")
         assert response.status_code == 200
         assert b"Spring Festival" in response.data or b"Places" in response.data
 
@@ -38,7 +40,7 @@ class TestBookingFlow:
         assert response.status_code == 200
 
         # Step 2: Access booking page
-        response = client.get("/book/Spring Festival/Simply Lift")
+        response = client.get("/book/Spring Festival")
         assert response.status_code == 200
 
         # Step 3: Purchase places (this will fail for past competitions)
@@ -46,7 +48,6 @@ class TestBookingFlow:
             "/purchasePlaces",
             data={
                 "competition": "Spring Festival",
-                "club": "Simply Lift",
                 "places": "1",
             },
         )
@@ -68,3 +69,40 @@ class TestPointsDisplay:
         response = client.post("/showSummary", data={"email": "john@simplylift.co"})
         assert response.status_code == 200
         assert b"Points" in response.data or b"points" in response.data
+
+
+class TestSuccessfulBooking:
+    """Test a booking that is committed"""
+
+    def test_booking_deducts_points_and_places(self, client, fresh_registry):
+        """Test that a future competition booking updates points and places"""
+        login(client)
+        response = client.post(
+            "/purchasePlaces",
+            data={"competition": "Future Open", "places": "3"},
+        )
+        assert response.status_code == 200
+        assert b"Great-booking complete!" in response.data
+        assert b"Points available: 10" in response.data
+        assert fresh_registry.competition_by_name("Future Open").number_of_places == 17
+
+    def test_booking_through_pipeline(self, client, fresh_registry, monkeypatch):
+        """Test that the coalesced pipeline books and reports like the direct path"""
+        import server
+        from gudlft.pipeline import BookingPipeline
+
+        pipeline = BookingPipeline(server.engine)
+        monkeypatch.setattr(server, "pipeline", pipeline)
+        login(client)
+        response = client.post(
+            "/purchasePlaces",
+            data={"competition": "Future Open", "places": "3"},
+        )
+        assert b"Great-booking complete!" in response.data
+        response = client.post(
+            "/purchasePlaces",
+            data={"competition": "Tiny Cup", "places": "3"},
+        )
+        assert b"Only 2 places remaining" in response.data
+        pipeline.close()
+        assert fresh_registry.competition_by_name("Future Open").number_of_places == 17
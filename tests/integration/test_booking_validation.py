@@ -4,6 +4,7 @@ Unit tests for booking validation logic
 
 import pytest
 from server import app, loadClubs, loadCompetitions
+from tests.conftest import login
 
 
 @pytest.fixture
@@ -19,10 +20,10 @@ class TestBookingValidation:
 
     def test_booking_more_than_12_places(self, client):
         """Test that booking more than 12 places is rejected"""
+        login(client)
         response = client.post(
             "/purchasePlaces",
             data={
-                "club": "Simply Lift",
                 "competition": "Winter Cup",
                 "places": "13",
             },
@@ -32,12 +33,22 @@ class TestBookingValidation:
         print(response.data)
         assert b"cannot book more than 12" in response.data
 
+    def test_cap_counts_earlier_bookings(self, client, fresh_registry):
+        """Test that repeated bookings cannot add up to more than 12 places"""
+        data = {"competition": "Future Open", "places": "7"}
+        login(client)
+        client.post("/purchasePlaces", data=data)
+        response = client.post("/purchasePlaces", data=dict(data, places="6"))
+        assert b"cannot book more than 12" in response.data
+        assert b"already booked 7" in response.data
+        assert fresh_registry.competition_by_name("Future Open").number_of_places == 13
+
     def test_booking_exceeds_club_points(self, client):
         """Test that booking cannot exceed club points"""
+        login(client, "Iron Temple")
         response = client.post(
             "/purchasePlaces",
             data={
-                "club": "Iron Temple",
                 "competition": "Winter Cup",
                 "places": "10",
             },
@@ -49,10 +60,10 @@ class TestBookingValidation:
 
     def test_booking_exceeds_available_places(self, client):
         """Test that booking cannot exceed available places"""
+        login(client)
         response = client.post(
             "/purchasePlaces",
             data={
-                "club": "Simply Lift",
                 "competition": "Spring Festival",
                 "places": "30",
             },
@@ -62,19 +73,34 @@ class TestBookingValidation:
 
     def test_valid_booking(self, client):
         """Test that valid booking succeeds"""
+        login(client)
         response = client.post(
             "/purchasePlaces",
-            data={"club": "Simply Lift", "competition": "Spring Festival", "places": "5"},
+            data={"competition": "Spring Festival", "places": "5"},
             follow_redirects=True,
         )
         assert response.status_code == 200
 
+    @pytest.mark.parametrize("places", ["-12", "abc"])
+    def test_invalid_places_rejected(self, client, fresh_registry, places):
+        """Test that negative or non-numeric places are refused, not booked"""
+        import server
+
+        login(client)
+        response = client.post(
+            "/purchasePlaces", data={"competition": "Future Open", "places": places}
+        )
+        assert response.status_code == 200
+        assert b"Places must be a positive integer." in response.data
+        assert server.registry.club_by_name("Simply Lift").points == 13
+        assert server.registry.competition_by_name("Future Open").number_of_places == 20
+
     def test_booking_exactly_12_places(self, client):
         """Test that booking exactly 12 places is allowed"""
+        login(client, "She Lifts")
         response = client.post(
             "/purchasePlaces",
             data={
-                "club": "She Lifts",
                 "competition": "Spring Festival",
                 "places": "12",
             },
@@ -86,12 +112,12 @@ class TestBookingValidation:
         """Test that all clubs have points field"""
         clubs = loadClubs()
         for club in clubs:
-            assert "points" in club
-            assert int(club["points"]) >= 0
+            assert isinstance(club.points, int)
+            assert club.points >= 0
 
     def test_competitions_have_places(self):
         """Test that all competitions have numberOfPlaces field"""
         competitions = loadCompetitions()
         for competition in competitions:
-            assert "numberOfPlaces" in competition
-            assert int(competition["numberOfPlaces"]) >= 0
+            assert isinstance(competition.number_of_places, int)
+            assert competition.number_of_places >= 0
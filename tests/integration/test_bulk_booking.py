@@ -0,0 +1,140 @@
+"""
+Integration tests for the bulk booking endpoint
+"""
+
+import pytest
+from server import app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Create a test client sending the admin token"""
+    app.config["TESTING"] = True
+    monkeypatch.setitem(app.config, "ADMIN_TOKEN", "secret")
+    with app.test_client() as client:
+        client.environ_base["HTTP_AUTHORIZATION"] = "Bearer secret"
+        yield client
+
+
+def booking(club="Simply Lift", competition="Future Open", places=1):
+    """Build one bulk booking item"""
+    return {"club": club, "competition": competition, "places": places}
+
+
+class TestAdminOnly:
+    """Test that only an admin can book on behalf of clubs"""
+
+    @pytest.mark.parametrize("authorization", [None, "Bearer wrong"])
+    def test_refused_without_admin_token(self, client, fresh_registry, authorization):
+        """Test that anyone else gets a 403 and nothing is booked"""
+        headers = {"Authorization": authorization} if authorization else {}
+        with app.test_client() as anonymous:
+            response = anonymous.post("/api/bookings", json=[booking()], headers=headers)
+        assert response.status_code == 403
+        assert fresh_registry.club_by_name("Simply Lift").points == 13
+
+    def test_refused_when_no_token_configured(self, client, fresh_registry, monkeypatch):
+        """Test that the endpoint is closed unless ADMIN_TOKEN is set"""
+        monkeypatch.setitem(app.config, "ADMIN_TOKEN", None)
+        assert client.post("/api/bookings", json=[booking()]).status_code == 403
+
+
+class TestBestEffort:
+    """Test the default mode, which applies every valid booking"""
+
+    def test_applies_valid_and_reports_rejected(self, client, fresh_registry):
+        """Test that one bad booking does not block the others"""
+        response = client.post(
+            "/api/bookings",
+            json=[
+                booking(places=2),
+                booking(competition="Spring Festival"),
+                booking(club="Iron Temple", places=3),
+            ],
+        )
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["booked"] == 2
+        assert [r["status"] for r in data["results"]] == ["booked", "rejected", "booked"]
+        assert "past competition" in data["results"][1]["error"]
+        assert fresh_registry.competition_by_name("Future Open").number_of_places == 15
+        assert fresh_registry.club_by_name("Iron Temple").points == 1
+
+    def test_rules_see_earlier_items(self, client, fresh_registry):
+        """Test that places, points and the 12 cap add up across the batch"""
+        response = client.post(
+            "/api/bookings",
+            json=[
+                booking(competition="Tiny Cup", places=2),
+                booking(club="She Lifts", competition="Tiny Cup"),
+                booking(places=8),
+                booking(places=5),
+            ],
+        )
+        results = response.get_json()["results"]
+        assert results[1]["error"] == "Not enough places available! Only 0 places remaining."
+        assert results[2]["status"] == "booked"
+        assert "more than 12 places" in results[3]["error"]
+        assert fresh_registry.club_by_name("Simply Lift").points == 3
+
+    def test_unknown_records_and_bad_places(self, client, fresh_registry):
+        """Test that items that cannot be resolved are rejected individually"""
+        response = client.post(
+            "/api/bookings",
+            json=[booking(club="Nobody"), booking(competition="Nothing"), booking(places=0), 7],
+        )
+        errors = [r["error"] for r in response.get_json()["results"]]
+        assert errors == [
+            "Unknown club: Nobody",
+            "Unknown competition: Nothing",
+            "Places must be a positive integer.",
+            "Each booking must be an object.",
+        ]
+
+
+class TestAtomic:
+    """Test all-or-nothing mode"""
+
+    def test_all_valid_is_applied(self, client, fresh_registry):
+        """Test that a valid batch is applied in full"""
+        response = client.post(
+            "/api/bookings?mode=atomic",
+            json=[booking(places=2), booking(club="She Lifts", competition="Tiny Cup")],
+        )
+        assert response.status_code == 200
+        assert response.get_json()["booked"] == 2
+        assert fresh_registry.competition_by_name("Tiny Cup").number_of_places == 1
+
+    def test_one_failure_applies_nothing(self, client, fresh_registry):
+        """Test that a single rejection leaves every record untouched"""
+        response = client.post(
+            "/api/bookings?mode=atomic",
+            json=[booking(places=2), booking(club="Iron Temple", places=5)],
+        )
+        assert response.status_code == 409
+        data = response.get_json()
+        assert data["booked"] == 0
+        assert [r["status"] for r in data["results"]] == ["not_applied", "rejected"]
+        assert fresh_registry.club_by_name("Simply Lift").points == 13
+        assert fresh_registry.competition_by_name("Future Open").number_of_places == 20
+
+
+class TestMalformedRequests:
+    """Test request-level validation"""
+
+    @pytest.mark.parametrize("body", [{}, [], "text"])
+    def test_body_must_be_a_non_empty_array(self, client, fresh_registry, body):
+        """Test that anything but a non-empty array is refused"""
+        assert client.post("/api/bookings", json=body).status_code == 400
+
+    def test_unknown_mode(self, client, fresh_registry):
+        """Test that only the two documented modes are accepted"""
+        response = client.post("/api/bookings?mode=maybe", json=[booking()])
+        assert response.status_code == 400
+
+    def test_batch_size_limit(self, client, fresh_registry, monkeypatch):
+        """Test that oversized batches are refused before any work"""
+        monkeypatch.setitem(app.config, "BULK_MAX_BOOKINGS", 2)
+        response = client.post("/api/bookings", json=[booking()] * 3)
+        assert response.status_code == 413
+        assert fresh_registry.club_by_name("Simply Lift").points == 13
@@ -0,0 +1,93 @@
+"""
+Integration tests for compressed pages and the fingerprinted stylesheet
+"""
+
+import gzip
+import re
+
+import pytest
+import server
+from gudlft import compression
+from gudlft.compression import Compressor
+from server import app
+from tests.conftest import login
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the app"""
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def compressor(monkeypatch):
+    """Enable gzip compression of anything over 100 bytes"""
+    monkeypatch.setattr(compression, "brotli", None)
+    compressor = Compressor(min_size=100)
+    monkeypatch.setattr(server, "compressor", compressor)
+    return compressor
+
+
+class TestCompressedPages:
+    """Test the compression hook on real routes"""
+
+    def test_off_by_default(self, client):
+        """Test that pages are sent as they are unless COMPRESSION is on"""
+        assert server.compressor is None
+        assert "Content-Encoding" not in client.get("/", headers=GZIP).headers
+
+    def test_index_compressed(self, client, compressor):
+        """Test that the index is gzipped for clients that accept it"""
+        response = client.get("/", headers=GZIP)
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert b"Simply Lift" in gzip.decompress(response.data)
+
+    def test_index_recompressed_after_booking(self, client, compressor, fresh_registry):
+        """Test that the cached compressed index follows the registry version"""
+        client.get("/", headers=GZIP)
+        client.get("/", headers=GZIP)
+        assert compressor.cache.hits == 1
+        login(client)
+        client.post("/purchasePlaces", data={"competition": "Future Open", "places": "3"})
+        response = client.get("/", headers=GZIP)
+        assert b"<td>10</td>" in gzip.decompress(response.data)
+
+    def test_summary_compressed_but_not_cached(self, client, compressor, fresh_registry):
+        """Test that per-club pages are compressed on every request"""
+        login(client)
+        response = client.get("/summary", headers=GZIP)
+        assert b"john@simplylift.co" in gzip.decompress(response.data)
+        assert compressor.cache.misses == 0
+
+    def test_compressed_etag_revalidates(self, client, compressor, fresh_registry):
+        """Test that the ETag of a compressed listing still gets a 304"""
+        response = client.get("/api/competitions", headers=GZIP)
+        etag = response.headers["ETag"]
+        assert etag.endswith('-gzip"')
+        response = client.get("/api/competitions", headers=dict(GZIP, **{"If-None-Match": etag}))
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+
+class TestStylesheet:
+    """Test the stylesheet that replaced the inline styles"""
+
+    def test_pages_link_fingerprinted_stylesheet(self, client):
+        """Test that the stylesheet link is cached for a year"""
+        page = client.get("/").get_data(as_text=True)
+        assert "style=" not in page
+        url = re.search(r'href="(/static/gudlft\.css\?v=\w+)"', page).group(1)
+        response = client.get(url)
+        assert "max-age=31536000" in response.headers["Cache-Control"]
+        assert "immutable" in response.headers["Cache-Control"]
+        response.close()
+
+    def test_unversioned_stylesheet_revalidated(self, client):
+        """Test that the bare URL is not cached forever"""
+        response = client.get("/static/gudlft.css")
+        assert response.cache_control.max_age is None
+        response.close()
@@ -0,0 +1,66 @@
+"""
+Integration tests for the /events server-sent events endpoint
+"""
+
+import pytest
+from server import app
+from tests.conftest import login
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the app"""
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+class TestEventsEndpoint:
+    """Test the live updates stream"""
+
+    def test_stream_headers(self, client, fresh_registry):
+        """Test that the endpoint answers with an uncached event stream"""
+        response = client.get("/events", buffered=False)
+        assert response.mimetype == "text/event-stream"
+        assert response.headers["Cache-Control"] == "no-cache"
+        response.close()
+
+    def test_booking_is_pushed(self, client, fresh_registry):
+        """Test that a committed booking sends the new places and points"""
+        response = client.get("/events", buffered=False)
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b"retry:")
+        login(client)
+        client.post(
+            "/purchasePlaces",
+            data={"competition": "Future Open", "places": "3"},
+        )
+        event = next(chunks)
+        assert b"event: booking" in event
+        assert b'"numberOfPlaces":17' in event
+        assert b'"points":10' in event
+        response.close()
+
+    def test_rejected_booking_is_not_pushed(self, client, fresh_registry):
+        """Test that rejections publish nothing"""
+        import server
+
+        login(client)
+        client.post(
+            "/purchasePlaces",
+            data={"competition": "Future Open", "places": "13"},
+        )
+        assert server.broker.last_id == 0
+
+    def test_last_event_id_replays_missed_events(self, client, fresh_registry):
+        """Test that reconnecting with Last-Event-ID resumes the stream"""
+        login(client)
+        client.post(
+            "/purchasePlaces",
+            data={"competition": "Future Open", "places": "1"},
+        )
+        response = client.get("/events", headers={"Last-Event-ID": "0"}, buffered=False)
+        chunks = iter(response.response)
+        next(chunks)
+        assert next(chunks).startswith(b"id: 1\n")
+        response.close()
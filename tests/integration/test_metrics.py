@@ -0,0 +1,37 @@
+"""
+Integration tests for the /metrics endpoint
+"""
+
+import pytest
+from server import app
+from tests.conftest import login
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the app"""
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+class TestMetricsEndpoint:
+    """Test the Prometheus text endpoint"""
+
+    def test_content_type(self, client):
+        """Test that the endpoint speaks the Prometheus text format"""
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+
+    def test_booking_phases_are_recorded(self, client, fresh_registry):
+        """Test that a booking reports each phase of purchasePlaces"""
+        login(client)
+        client.post(
+            "/purchasePlaces",
+            data={"competition": "Future Open", "places": "1"},
+        )
+        text = client.get("/metrics").get_data(as_text=True)
+        for phase in ("lookup", "lock", "validate", "mutate", "render"):
+            assert f'{{route="purchasePlaces",phase="{phase}"}}' in text
+        assert 'gudlft_request_duration_seconds_count{route="purchasePlaces"}' in text
@@ -0,0 +1,131 @@
+"""
+Integration tests for deferred loading and the readiness probe
+"""
+
+import threading
+
+import pytest
+import server
+from gudlft.registry import Registry
+from gudlft.warmup import Warmup
+from server import app
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the app"""
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+class TestReadiness:
+    """Test /ready and requests that arrive before the data is loaded"""
+
+    def test_ready_once_loaded(self, client):
+        """Test that the probe answers 200 with the load duration"""
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.get_json()["status"] == "ready"
+        assert "load_seconds" in response.get_json()
+
+    def test_not_ready_while_loading(self, client, monkeypatch):
+        """Test that the probe answers 503 until the warm-up finishes"""
+        release = threading.Event()
+        warmup = Warmup(lambda: release.wait(5))
+        monkeypatch.setattr(server, "warmup", warmup)
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.get_json()["status"] == "loading"
+        release.set()
+        warmup.run()
+        assert client.get("/ready").status_code == 200
+
+    def test_fresh_sqlite_database_reports_loading(self, client, monkeypatch, tmp_path):
+        """Test that probes on an empty database answer 503, then 200 once loaded"""
+        config = dict(app.config, STORAGE="sqlite", SQLITE_FILE=str(tmp_path / "gudlft.db"))
+        storage = server.createStorage(Registry(), config)
+        release = threading.Event()
+
+        def load():
+            release.wait(5)
+            storage.load()
+
+        warmup = Warmup(load)
+        monkeypatch.setattr(server, "storage", storage)
+        monkeypatch.setattr(server, "warmup", warmup)
+        # Polling /ready alone starts the load, as in lazy mode.
+        assert client.get("/ready").status_code == 503
+        assert client.get("/metrics").status_code == 200
+        release.set()
+        warmup.run()
+        assert client.get("/ready").status_code == 200
+        storage.close()
+
+    def test_first_request_loads_lazily(self, client, monkeypatch, server_state):
+        """Test that a request waits for the load it triggers"""
+        calls = []
+        monkeypatch.setattr(server, "warmup", Warmup(lambda: calls.append(1)))
+        assert client.get("/").status_code == 200
+        assert client.get("/").status_code == 200
+        assert calls == [1]
+
+    def test_broken_data_file(self, client, monkeypatch):
+        """Test that a failed load answers 503 instead of crashing"""
+
+        def load():
+            raise ValueError("Expecting ',' delimiter")
+
+        monkeypatch.setattr(server, "warmup", Warmup(load))
+        assert client.get("/").status_code == 503
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.get_json()["status"] == "failed"
+        assert response.get_json()["error"] == "Expecting ',' delimiter"
+
+
+class TestCreateApp:
+    """Test the app factory's warm-up modes"""
+
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(server, "warmup", Warmup(lambda: calls.append(1)))
+        return calls
+
+    def test_lazy_loads_nothing(self, monkeypatch, calls):
+        """Test that the lazy factory returns without loading"""
+        monkeypatch.setitem(app.config, "WARMUP", "lazy")
+        assert server.createApp() is app
+        assert calls == []
+
+    def test_eager_loads_before_returning(self, monkeypatch, calls):
+        """Test that the eager factory has loaded when it returns"""
+        monkeypatch.setitem(app.config, "WARMUP", "eager")
+        server.createApp()
+        assert calls == [1]
+
+    def test_eager_raises_on_broken_data(self, monkeypatch):
+        """Test that eager startup fails fast on a broken data file"""
+
+        def load():
+            raise ValueError("bad data")
+
+        monkeypatch.setattr(server, "warmup", Warmup(load))
+        monkeypatch.setitem(app.config, "WARMUP", "eager")
+        with pytest.raises(ValueError):
+            server.createApp()
+
+    def test_background_starts_loading(self, monkeypatch, calls):
+        """Test that the background factory starts the warm-up thread"""
+        monkeypatch.setitem(app.config, "WARMUP", "background")
+        server.createApp()
+        assert server.warmup.run()
+        assert calls == [1]
+
+    def test_templates_compiled_at_startup(self, monkeypatch, calls):
+        """Test that every template is compiled before the first request"""
+        monkeypatch.setitem(app.config, "WARMUP", "lazy")
+        app.jinja_env.cache.clear()
+        server.createApp()
+        assert len(app.jinja_env.cache) == len(app.jinja_env.list_templates())
@@ -2,8 +2,14 @@
 Unit tests for Flask routes
 """
 
+import os
+import subprocess
+import sys
+
 import pytest
+from flask import Flask
 from server import app
+from tests.conftest import login
 
 
 @pytest.fixture
@@ -51,3 +57,197 @@ class TestLogoutRoute:
         """Test that logout redirects to index"""
         response = client.get("/logout")
         assert response.status_code == 302  # Redirect status
+
+
+class TestUnknownRecords:
+    """Test that unknown clubs or competitions are handled without errors"""
+
+    def test_book_unknown_competition(self, client):
+        """Test that booking an unknown competition shows an error message"""
+        login(client)
+        response = client.get("/book/Unknown Cup")
+        assert response.status_code == 200
+        assert b"Something went wrong" in response.data
+
+    def test_purchase_unknown_competition(self, client):
+        """Test that purchasing for an unknown competition shows an error message"""
+        login(client)
+        response = client.post(
+            "/purchasePlaces",
+            data={"competition": "Unknown Cup", "places": "1"},
+        )
+        assert response.status_code == 200
+        assert b"Something went wrong" in response.data
+
+
+class TestPointsTableCache:
+    """Test that the cached points table follows bookings"""
+
+    def test_repeated_index_hits_cache(self, client, fresh_registry):
+        """Test that the points table is rendered once for unchanged data"""
+        import server
+
+        client.get("/")
+        client.get("/")
+        assert server.fragment_cache.misses == 1
+        assert server.fragment_cache.hits == 1
+
+    def test_booking_invalidates_points_table(self, client, fresh_registry):
+        """Test that the index shows new points after a booking"""
+        assert b"<td>13</td>" in client.get("/").data
+        login(client)
+        client.post(
+            "/purchasePlaces",
+            data={"competition": "Future Open", "places": "3"},
+        )
+        response = client.get("/")
+        assert b"<td>10</td>" in response.data
+        assert b"<td>13</td>" not in response.data
+
+    def test_booking_during_render_is_not_cached_as_new(
+        self, client, fresh_registry, monkeypatch
+    ):
+        """Test that rows built before a booking are not served after it"""
+        clubs_page = fresh_registry.clubs_page
+
+        def booking_after_slice(*args, **kwargs):
+            page = clubs_page(*args, **kwargs)
+            monkeypatch.setattr(fresh_registry, "clubs_page", clubs_page)
+            club = fresh_registry.club_by_name("Simply Lift")
+            # Simply Lift drops from the top of the board to the bottom.
+            fresh_registry.update_club(club, points=1)
+            return page
+
+        monkeypatch.setattr(fresh_registry, "clubs_page", booking_after_slice)
+        assert b"Simply Lift" in client.get("/?per_page=1").data
+        response = client.get("/?per_page=1")
+        assert b"She Lifts" in response.data
+        assert b"Simply Lift" not in response.data
+
+
+class TestPaginatedListings:
+    """Test pagination and search on the points board and competition list"""
+
+    def test_index_paginates_points_board(self, client, fresh_registry):
+        """Test that per_page limits the rows and links to the next page"""
+        response = client.get("/?per_page=2")
+        assert b"Page 1 of 2 (3 clubs)" in response.data
+        assert b"Simply Lift" in response.data
+        assert b"Iron Temple" not in response.data
+        assert b"page=2" in response.data
+
+    def test_index_deep_page(self, client, fresh_registry):
+        """Test that a later page shows the remaining clubs"""
+        response = client.get("/?per_page=2&page=2")
+        assert b"Iron Temple" in response.data
+        assert b"Simply Lift" not in response.data
+
+    def test_index_prefix_search(self, client, fresh_registry):
+        """Test that the search box filters clubs by name prefix"""
+        response = client.get("/?q=iron")
+        assert b"Iron Temple" in response.data
+        assert b"She Lifts" not in response.data
+
+    def test_index_search_sorted_by_name(self, client, fresh_registry):
+        """Test that a search lists matches by name even when points are asked for"""
+        response = client.get("/?q=s&sort=points")
+        assert b"Matches sorted by name." in response.data
+        assert response.data.index(b"She Lifts") < response.data.index(b"Simply Lift")
+
+    def test_summary_competitions_page(self, client, fresh_registry):
+        """Test that the open competitions are paginated in date order"""
+        response = client.post(
+            "/showSummary",
+            data={"email": "john@simplylift.co", "per_page": "1", "page": "2"},
+        )
+        assert b"Tiny Cup" in response.data
+        assert b"Future Open" not in response.data
+        assert b"Page 2 of 2 (2 open competitions)" in response.data
+
+    def test_summary_hides_past_competitions(self, client, fresh_registry):
+        """Test that competitions that already started are not listed"""
+        response = client.post("/showSummary", data={"email": "john@simplylift.co"})
+        assert b"Spring Festival" not in response.data
+        assert b"Future Open" in response.data
+
+    def test_summary_hides_full_competitions(self, client, fresh_registry):
+        """Test that a competition leaves the list once a booking fills it"""
+        login(client, "She Lifts")
+        client.post(
+            "/purchasePlaces",
+            data={"competition": "Tiny Cup", "places": "2"},
+        )
+        response = client.post("/showSummary", data={"email": "john@simplylift.co"})
+        assert b"Tiny Cup" not in response.data
+        assert b"(1 open competitions)" in response.data
+
+
+class TestSessionLogin:
+    """Test that the logged-in club comes from the signed session only"""
+
+    def test_book_requires_login(self, client):
+        """Test that the booking page sends anonymous visitors to the login page"""
+        response = client.get("/book/Future Open")
+        assert b"Please log in first." in response.data
+        assert b"Places available" not in response.data
+
+    def test_purchase_requires_login(self, client, fresh_registry):
+        """Test that an anonymous booking is refused and changes nothing"""
+        import server
+
+        response = client.post(
+            "/purchasePlaces", data={"competition": "Future Open", "places": "1"}
+        )
+        assert b"Please log in first." in response.data
+        assert server.registry.competition_by_name("Future Open").number_of_places == 20
+
+    def test_posted_club_is_ignored(self, client, fresh_registry):
+        """Test that a club field in the form cannot book for another club"""
+        import server
+
+        login(client, "She Lifts")
+        client.post(
+            "/purchasePlaces",
+            data={"competition": "Future Open", "club": "Simply Lift", "places": "2"},
+        )
+        assert server.registry.club_by_name("Simply Lift").points == 13
+        assert server.registry.club_by_name("She Lifts").points == 10
+
+    def test_summary_pages_use_session(self, client, fresh_registry):
+        """Test that the competition list pages without sending the email again"""
+        login(client)
+        response = client.get("/summary?per_page=1&page=2")
+        assert b"Welcome, john@simplylift.co" in response.data
+        assert b"Page 2 of 2 (2 open competitions)" in response.data
+
+    def test_logout_clears_session(self, client, fresh_registry):
+        """Test that the club is no longer logged in after logging out"""
+        login(client)
+        client.get("/logout")
+        response = client.get("/summary")
+        assert b"Please log in first." in response.data
+
+    def test_cookie_signed_with_old_default_key_rejected(self, client, fresh_registry):
+        """Test that a session forged with the former public key logs nobody in"""
+        forger = Flask(__name__)
+        forger.secret_key = "something_special"
+        cookie = forger.session_interface.get_signing_serializer(forger).dumps(
+            {"club": "She Lifts"}
+        )
+        client.set_cookie(app.config["SESSION_COOKIE_NAME"], cookie)
+        response = client.get("/summary")
+        assert b"Please log in first." in response.data
+
+    def test_session_cookie_is_same_site(self, client, fresh_registry):
+        """Test that the login cookie is not sent with cross-site posts"""
+        response = login(client)
+        assert "SameSite=Lax" in response.headers["Set-Cookie"]
+
+    def test_secret_key_required(self):
+        """Test that the server refuses to start without a configured secret key"""
+        env = {k: v for k, v in os.environ.items() if k != "GUDLFT_SECRET_KEY"}
+        result = subprocess.run(
+            [sys.executable, "-c", "import server"], env=env, capture_output=True, text=True
+        )
+        assert result.returncode != 0
+        assert "GUDLFT_SECRET_KEY" in result.stderr
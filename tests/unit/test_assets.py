@@ -0,0 +1,51 @@
+"""
+Unit tests for fingerprinted static assets
+"""
+
+import pytest
+from flask import Flask, Response
+
+from gudlft.assets import ONE_YEAR, StaticAssets
+
+
+@pytest.fixture
+def assets(tmp_path):
+    """Create a static folder with one stylesheet"""
+    (tmp_path / "site.css").write_text("body { margin: 0; }")
+    return StaticAssets(str(tmp_path))
+
+
+class TestStaticAssets:
+    """Test content digests and the headers they unlock"""
+
+    def test_digest_follows_content(self, tmp_path, assets):
+        """Test that another content gets another digest"""
+        (tmp_path / "other.css").write_text("body { margin: 1px; }")
+        assert len(assets.digest("site.css")) == 12
+        assert assets.digest("site.css") != assets.digest("other.css")
+
+    def test_missing_file(self, assets):
+        """Test that a missing file has no digest"""
+        assert assets.digest("missing.css") is None
+
+    def test_url_carries_digest(self, tmp_path, assets):
+        """Test that templates link the file with its digest"""
+        app = Flask(__name__, static_folder=str(tmp_path), static_url_path="/static")
+        with app.test_request_context():
+            assert assets.url("site.css") == f"/static/site.css?v={assets.digest('site.css')}"
+
+    def test_current_version_cached_forever(self, assets):
+        """Test that the current fingerprint is cached for a year, without revalidation"""
+        response = Response("body { margin: 0; }")
+        response.cache_control.no_cache = True
+        assets.cache_forever(response, "site.css", assets.digest("site.css"))
+        assert response.cache_control.max_age == ONE_YEAR
+        assert response.cache_control.immutable
+        assert not response.cache_control.no_cache
+
+    @pytest.mark.parametrize("version", [None, "0123456789ab"])
+    def test_other_versions_not_cached(self, assets, version):
+        """Test that unversioned or outdated URLs keep the default headers"""
+        response = Response("body { margin: 0; }")
+        assets.cache_forever(response, "site.css", version)
+        assert response.cache_control.max_age is None
@@ -0,0 +1,82 @@
+"""
+Unit tests for the benchmark dataset generator, regression gate and Locust comparison
+"""
+
+from benchmarks import compare_locust
+from benchmarks.bench_routes import compare
+from benchmarks.generate import generate
+from gudlft.storage import read_clubs, read_competitions
+
+
+class TestGenerate:
+    """Test the synthetic dataset generator"""
+
+    def test_files_load_like_repository_data(self, tmp_path):
+        """Test that generated files go through the normal loaders"""
+        clubs_path, competitions_path = generate(tmp_path, 50, 5)
+        clubs, _ = read_clubs(clubs_path)
+        competitions, _ = read_competitions(competitions_path)
+        assert len(clubs) == 50
+        assert len(competitions) == 5
+        assert len({club.email for club in clubs}) == 50
+
+    def test_same_seed_same_files(self, tmp_path):
+        """Test that a seed fully determines the output"""
+        generate(tmp_path / "a", 20, 3, seed=7)
+        generate(tmp_path / "b", 20, 3, seed=7)
+        for name in ("clubs.json", "competitions.json"):
+            assert (tmp_path / "a" / name).read_text() == (tmp_path / "b" / name).read_text()
+
+
+class TestCompare:
+    """Test the regression gate"""
+
+    BASELINE = {"index": {"ops_per_sec": 1000.0, "p50_ms": 1.0, "p95_ms": 2.0}}
+
+    def test_within_threshold_passes(self):
+        """Test that small variations are not reported"""
+        results = {"index": {"ops_per_sec": 900.0, "p50_ms": 1.1, "p95_ms": 2.2}}
+        assert compare(results, self.BASELINE, 0.25) == []
+
+    def test_throughput_and_latency_regressions(self):
+        """Test that both slower throughput and higher p95 are reported"""
+        results = {"index": {"ops_per_sec": 500.0, "p50_ms": 1.0, "p95_ms": 3.0}}
+        assert len(compare(results, self.BASELINE, 0.25)) == 2
+
+    def test_new_scenarios_are_skipped(self):
+        """Test that routes without a baseline never fail the gate"""
+        results = {"new": {"ops_per_sec": 1.0, "p50_ms": 9.0, "p95_ms": 9.0}}
+        assert compare(results, self.BASELINE, 0.25) == []
+
+
+class TestCompareLocust:
+    """Test the Locust CSV comparison"""
+
+    HEADER = "Type,Name,Request Count,Median Response Time,Requests/s,95%\n"
+
+    def write(self, path, rows):
+        path.write_text(self.HEADER + "".join(row + "\n" for row in rows))
+        return compare_locust.read_stats(path)
+
+    def test_rows_matched_on_type_and_name(self, tmp_path):
+        """Test that rows line up and the aggregate row is dropped"""
+        old = self.write(
+            tmp_path / "old.csv",
+            ["POST,/purchasePlaces,10,5,2.0,10", ",Aggregated,10,5,2.0,10"],
+        )
+        new = self.write(tmp_path / "new.csv", ["POST,/purchasePlaces,10,5,2.0,11"])
+        lines, regressions = compare_locust.compare(old, new, 0.2)
+        assert list(old) == [("POST", "/purchasePlaces")]
+        assert len(lines) == 2
+        assert regressions == []
+
+    def test_regressions_and_missing_rows(self, tmp_path):
+        """Test that a slower p95 fails and one-sided rows are listed"""
+        old = self.write(tmp_path / "old.csv", ["POST,/purchasePlaces,10,5,2.0,10"])
+        new = self.write(
+            tmp_path / "new.csv",
+            ["POST,/purchasePlaces,10,5,2.0,20", "BOOKING,booking committed,3,5,0.5,N/A"],
+        )
+        lines, regressions = compare_locust.compare(old, new, 0.2)
+        assert len(regressions) == 1
+        assert "only in new run" in lines[1]
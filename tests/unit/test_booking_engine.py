@@ -0,0 +1,241 @@
+"""
+Unit and stress tests for the lock-striped booking engine
+"""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from gudlft.booking import BookingEngine, BookingError
+from gudlft.models import Club, Competition
+from gudlft.registry import Registry
+from tests.conftest import make_registry
+
+
+@pytest.fixture
+def registry():
+    """Create a registry with the shared test data"""
+    return make_registry()
+
+
+@pytest.fixture
+def engine(registry):
+    """Create a booking engine over the registry"""
+    return BookingEngine(registry)
+
+
+class TestBookingRules:
+    """Test the business rules enforced by the engine"""
+
+    def test_valid_booking_updates_records(self, registry, engine):
+        """Test that a valid booking deducts places and points"""
+        club = registry.club_by_name("Simply Lift")
+        competition = registry.competition_by_name("Future Open")
+        engine.book(club, competition, 3)
+        assert competition.number_of_places == 17
+        assert club.points == 10
+
+    def test_past_competition_rejected(self, registry, engine):
+        """Test that past competitions cannot be booked"""
+        with pytest.raises(BookingError, match="past competition"):
+            engine.book(
+                registry.club_by_name("Simply Lift"),
+                registry.competition_by_name("Spring Festival"),
+                1,
+            )
+
+    def test_more_than_available_rejected(self, registry, engine):
+        """Test that a booking cannot exceed the remaining places"""
+        with pytest.raises(BookingError, match="Only 2 places remaining"):
+            engine.book(
+                registry.club_by_name("Simply Lift"),
+                registry.competition_by_name("Tiny Cup"),
+                3,
+            )
+
+    def test_more_than_12_rejected(self, registry, engine):
+        """Test that more than 12 places per competition is rejected"""
+        with pytest.raises(BookingError, match="more than 12"):
+            engine.book(
+                registry.club_by_name("Simply Lift"),
+                registry.competition_by_name("Future Open"),
+                13,
+            )
+
+    def test_cap_counts_earlier_bookings(self, registry, engine):
+        """Test that the cap applies to the total booked across requests"""
+        club = registry.club_by_name("Simply Lift")
+        competition = registry.competition_by_name("Future Open")
+        for _ in range(3):
+            engine.book(club, competition, 4)
+        with pytest.raises(BookingError, match="already booked 12"):
+            engine.book(club, competition, 1)
+        assert engine.storage.ledger.booked("Simply Lift", "Future Open") == 12
+
+    def test_cap_is_per_competition(self, registry, engine):
+        """Test that places booked elsewhere do not count towards the cap"""
+        club = registry.club_by_name("Simply Lift")
+        engine.book(club, registry.competition_by_name("Tiny Cup"), 1)
+        engine.book(club, registry.competition_by_name("Future Open"), 12)
+
+    def test_more_than_points_rejected(self, registry, engine):
+        """Test that a club cannot spend more points than it has"""
+        with pytest.raises(BookingError, match="enough points"):
+            engine.book(
+                registry.club_by_name("Iron Temple"),
+                registry.competition_by_name("Future Open"),
+                5,
+            )
+
+    @pytest.mark.parametrize("places", [0, -12])
+    def test_non_positive_places_rejected(self, registry, engine, places):
+        """Test that a booking cannot hand back points, places or cap room"""
+        club = registry.club_by_name("Simply Lift")
+        competition = registry.competition_by_name("Future Open")
+        with pytest.raises(BookingError, match="positive integer"):
+            engine.book(club, competition, places)
+        assert club.points == 13
+        assert competition.number_of_places == 20
+        assert engine.storage.ledger.booked(club.name, competition.name) == 0
+
+    def test_rejection_leaves_records_untouched(self, registry, engine):
+        """Test that a rejected booking changes nothing"""
+        club = registry.club_by_name("Iron Temple")
+        competition = registry.competition_by_name("Future Open")
+        with pytest.raises(BookingError):
+            engine.book(club, competition, 5)
+        assert club.points == 4
+        assert competition.number_of_places == 20
+
+    def test_now_can_be_injected(self, registry, engine):
+        """Test that the past check uses the supplied clock"""
+        engine.book(
+            registry.club_by_name("Simply Lift"),
+            registry.competition_by_name("Spring Festival"),
+            1,
+            now=datetime(2019, 1, 1),
+        )
+        assert registry.competition_by_name("Spring Festival").number_of_places == 24
+
+
+class TestBookMany:
+    """Test batches booked under one lock acquisition"""
+
+    def test_returns_one_result_per_booking(self, registry, engine):
+        """Test that valid bookings are applied and invalid ones reported"""
+        club = registry.club_by_name("Simply Lift")
+        errors = engine.book_many(
+            [
+                (club, registry.competition_by_name("Future Open"), 2),
+                (club, registry.competition_by_name("Spring Festival"), 1),
+            ]
+        )
+        assert errors[0] is None
+        assert "past competition" in str(errors[1])
+        assert club.points == 11
+
+    def test_cap_is_cumulative_within_batch(self, registry, engine):
+        """Test that splitting a booking does not get around the 12 cap"""
+        club = registry.club_by_name("Simply Lift")
+        competition = registry.competition_by_name("Future Open")
+        errors = engine.book_many([(club, competition, 7), (club, competition, 6)])
+        assert errors[0] is None
+        assert "more than 12" in str(errors[1])
+
+    def test_cap_counts_bookings_before_batch(self, registry, engine):
+        """Test that a batch sees the places booked by earlier requests"""
+        club = registry.club_by_name("Simply Lift")
+        competition = registry.competition_by_name("Future Open")
+        engine.book(club, competition, 10)
+        errors = engine.book_many([(club, competition, 2), (club, competition, 1)])
+        assert errors[0] is None
+        assert "more than 12" in str(errors[1])
+
+    def test_atomic_failure_applies_nothing(self, registry, engine):
+        """Test that all-or-nothing mode keeps every record on failure"""
+        club = registry.club_by_name("Iron Temple")
+        competition = registry.competition_by_name("Future Open")
+        errors = engine.book_many([(club, competition, 3), (club, competition, 3)], atomic=True)
+        assert errors[0] is None
+        assert "enough points! You have 1 points" in str(errors[1])
+        assert club.points == 4
+        assert competition.number_of_places == 20
+
+    def test_single_commit(self, registry):
+        """Test that the storage receives all accepted bookings at once"""
+        engine = BookingEngine(registry)
+        calls = []
+        commit = engine.storage.commit_bookings
+        engine.storage.commit_bookings = lambda b, a: calls.append(len(b)) or commit(b, a)
+        club = registry.club_by_name("Simply Lift")
+        engine.book_many(
+            [(club, registry.competition_by_name(name), 1) for name in ("Future Open", "Tiny Cup")]
+        )
+        assert calls == [2]
+
+
+class TestLockStriping:
+    """Test stripe selection"""
+
+    def test_stripes_are_sorted_and_unique(self, registry):
+        """Test that locks are acquired in a stable order without duplicates"""
+        engine = BookingEngine(registry, stripes=1)
+        locks = engine._stripes_for(
+            registry.competition_by_name("Future Open"), registry.club_by_name("Simply Lift")
+        )
+        assert len(locks) == 1
+
+
+class TestConcurrentBookings:
+    """Stress test: concurrent bookings must never lose places or points"""
+
+    THREADS = 16
+    BOOKINGS_PER_THREAD = 250
+    CLUBS = 200
+
+    @pytest.fixture
+    def contended(self):
+        """Create a few clubs and competitions shared by every thread"""
+        registry = Registry()
+        # Enough clubs that no pair reaches the 12-place cap: places run out first.
+        registry.set_clubs(
+            [Club(f"Club {i}", f"club{i}@test.com", 100) for i in range(self.CLUBS)]
+        )
+        registry.set_competitions(
+            [Competition(f"Cup {i}", datetime(2099, 1, 1, 10), 900) for i in range(3)]
+        )
+        return registry
+
+    def test_no_places_or_points_lost(self, contended):
+        """Test that accepted bookings add up exactly under contention"""
+        engine = BookingEngine(contended, stripes=8)
+        accepted = [0] * self.THREADS
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker(index):
+            barrier.wait()
+            for n in range(self.BOOKINGS_PER_THREAD):
+                club = contended.clubs[(index + n) % len(contended.clubs)]
+                competition = contended.competitions[n % len(contended.competitions)]
+                try:
+                    engine.book(club, competition, 1)
+                except BookingError:
+                    continue
+                accepted[index] += 1
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        total = sum(accepted)
+        places_left = sum(c.number_of_places for c in contended.competitions)
+        points_left = sum(c.points for c in contended.clubs)
+        assert places_left == 3 * 900 - total
+        assert points_left == self.CLUBS * 100 - total
+        assert all(c.number_of_places >= 0 for c in contended.competitions)
+        assert all(c.points >= 0 for c in contended.clubs)
+        # Every competition gets ~1333 attempts for 900 places: all must fill exactly
+        assert total == 2700
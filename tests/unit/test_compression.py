@@ -0,0 +1,94 @@
+"""
+Unit tests for response compression
+"""
+
+import gzip
+
+import pytest
+from flask import Response
+from werkzeug.http import parse_accept_header
+
+from gudlft import compression
+from gudlft.compression import Compressor, encoded_etags
+
+BODY = "<td>Club</td>" * 200
+
+
+def accept(header):
+    """Return a parsed Accept-Encoding header"""
+    return parse_accept_header(header)
+
+
+@pytest.fixture
+def gzip_only(monkeypatch):
+    """Pretend the optional brotli package is not installed"""
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+class TestCompressor:
+    """Test which responses get encoded, and how"""
+
+    def test_gzip_body(self, gzip_only):
+        """Test that a large page is gzipped when the client accepts it"""
+        response = Compressor().compress(Response(BODY), accept("gzip, deflate"))
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Content-Length"] == str(len(response.get_data()))
+        assert gzip.decompress(response.get_data()).decode() == BODY
+        assert "Accept-Encoding" in response.vary
+
+    def test_brotli_preferred(self):
+        """Test that brotli wins over gzip when both sides support it"""
+        brotli = pytest.importorskip("brotli")
+        response = Compressor().compress(Response(BODY), accept("gzip, br"))
+        assert response.headers["Content-Encoding"] == "br"
+        assert brotli.decompress(response.get_data()).decode() == BODY
+
+    def test_falls_back_to_gzip_without_brotli(self, gzip_only):
+        """Test that a missing brotli package is not an error"""
+        compressor = Compressor()
+        assert compressor.codings == ("gzip",)
+        assert compressor.negotiate(accept("br")) is None
+        assert compressor.negotiate(accept("br, gzip")) == "gzip"
+
+    def test_small_body_sent_as_is(self):
+        """Test that bodies under the threshold are not encoded"""
+        response = Compressor(min_size=4096).compress(Response(BODY), accept("gzip"))
+        assert "Content-Encoding" not in response.headers
+        assert response.get_data(as_text=True) == BODY
+
+    def test_client_without_compression(self):
+        """Test that a client accepting nothing gets the plain body, marked as varying"""
+        response = Compressor().compress(Response(BODY), accept(""))
+        assert "Content-Encoding" not in response.headers
+        assert "Accept-Encoding" in response.vary
+
+    @pytest.mark.parametrize(
+        "response",
+        [
+            Response(BODY, mimetype="image/png"),
+            Response(BODY, status=404),
+            Response(iter([BODY]), mimetype="text/event-stream"),
+        ],
+        ids=["binary", "error", "stream"],
+    )
+    def test_skipped_responses(self, response):
+        """Test that binary, error and streamed responses are left alone"""
+        Compressor().compress(response, accept("gzip"))
+        assert "Content-Encoding" not in response.headers
+
+    def test_etag_names_the_encoding(self, gzip_only):
+        """Test that the encoded body does not validate as the plain one"""
+        response = Response(BODY)
+        response.set_etag("abc")
+        Compressor().compress(response, accept("gzip"))
+        assert response.get_etag() == ("abc-gzip", False)
+        assert "abc-gzip" in encoded_etags("abc")
+
+    def test_keyed_body_compressed_once(self, gzip_only):
+        """Test that a response with a version key reuses its encoded body"""
+        compressor = Compressor()
+        for _ in range(3):
+            response = compressor.compress(Response(BODY), accept("gzip"), key=("index", 1))
+        assert gzip.decompress(response.get_data()).decode() == BODY
+        assert compressor.cache.misses == 1
+        assert compressor.cache.hits == 2
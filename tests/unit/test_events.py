@@ -0,0 +1,87 @@
+"""
+Unit tests for the server-sent events broker
+"""
+
+import threading
+
+from gudlft.events import EventBroker
+
+
+class TestEventBroker:
+    """Test publishing and reading events"""
+
+    def test_publish_assigns_ids(self):
+        """Test that events get increasing ids"""
+        broker = EventBroker()
+        assert broker.publish("booking", {"a": 1}) == 1
+        assert broker.publish("booking", {"a": 2}) == 2
+
+    def test_events_after(self):
+        """Test that only newer events are returned"""
+        broker = EventBroker()
+        broker.publish("booking", {"a": 1})
+        broker.publish("booking", {"a": 2})
+        assert broker.events_after(1) == [(2, "booking", '{"a":2}')]
+
+    def test_history_is_bounded(self):
+        """Test that the oldest events fall out of the ring buffer"""
+        broker = EventBroker(history=2)
+        for i in range(5):
+            broker.publish("booking", {"i": i})
+        assert [entry[0] for entry in broker.events_after(0)] == [4, 5]
+
+    def test_wait_times_out_without_events(self):
+        """Test that waiting returns nothing when no event arrives"""
+        assert EventBroker().wait(0, timeout=0.01) == []
+
+    def test_wait_wakes_every_subscriber(self):
+        """Test that one publish reaches all waiting subscribers"""
+        broker = EventBroker()
+        received = []
+        waiting = threading.Barrier(11)
+
+        def subscriber():
+            waiting.wait()
+            received.append(broker.wait(0, timeout=5))
+
+        threads = [threading.Thread(target=subscriber) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        waiting.wait()
+        broker.publish("booking", {"a": 1})
+        for thread in threads:
+            thread.join()
+        assert len(received) == 10
+        assert all(entries[0][0] == 1 for entries in received)
+
+
+class TestEventStream:
+    """Test SSE formatting of the stream"""
+
+    def test_stream_starts_with_retry(self):
+        """Test that the first chunk sets the reconnection delay"""
+        stream = EventBroker().stream(retry_ms=1000)
+        assert next(stream) == "retry: 1000\n\n"
+
+    def test_stream_formats_events(self):
+        """Test that events are framed with id, event and data lines"""
+        broker = EventBroker()
+        stream = broker.stream()
+        next(stream)
+        broker.publish("booking", {"club": "Simply Lift"})
+        assert next(stream) == 'id: 1\nevent: booking\ndata: {"club":"Simply Lift"}\n\n'
+
+    def test_stream_sends_heartbeat(self):
+        """Test that an idle stream emits a comment line"""
+        stream = EventBroker().stream(heartbeat=0.01)
+        next(stream)
+        assert next(stream) == ": keepalive\n\n"
+
+    def test_stream_resumes_after_last_id(self):
+        """Test that a reconnecting client gets what it missed"""
+        broker = EventBroker()
+        broker.publish("booking", {"n": 1})
+        broker.publish("booking", {"n": 2})
+        stream = broker.stream(last_id=1)
+        next(stream)
+        assert next(stream).startswith("id: 2\n")
@@ -0,0 +1,59 @@
+"""
+Unit tests for the rendered-fragment cache and registry versioning
+"""
+
+from gudlft.cache import FragmentCache
+from tests.conftest import make_registry
+
+
+class TestFragmentCache:
+    """Test caching and eviction"""
+
+    def test_renders_once_per_key(self):
+        """Test that a second lookup of the same key is a hit"""
+        cache = FragmentCache()
+        calls = []
+
+        def render():
+            calls.append(1)
+            return "<tr></tr>"
+
+        assert cache.get_or_render(("table", 1), render) == "<tr></tr>"
+        assert cache.get_or_render(("table", 1), render) == "<tr></tr>"
+        assert len(calls) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_new_version_misses(self):
+        """Test that a different version re-renders"""
+        cache = FragmentCache()
+        cache.get_or_render(("table", 1), lambda: "old")
+        assert cache.get_or_render(("table", 2), lambda: "new") == "new"
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = FragmentCache(max_entries=2)
+        cache.get_or_render("a", lambda: "A")
+        cache.get_or_render("b", lambda: "B")
+        cache.get_or_render("a", lambda: "A")
+        cache.get_or_render("c", lambda: "C")
+        assert cache.get_or_render("a", lambda: "A2") == "A"
+        assert cache.get_or_render("b", lambda: "B2") == "B2"
+
+
+class TestRegistryVersion:
+    """Test that registry mutations bump the version"""
+
+    def test_update_bumps_version(self):
+        """Test that a points update changes the version"""
+        registry = make_registry()
+        before = registry.version
+        registry.update_club(registry.clubs[0], points=1)
+        assert registry.version > before
+
+    def test_lookups_do_not_bump_version(self):
+        """Test that reads leave the version unchanged"""
+        registry = make_registry()
+        before = registry.version
+        registry.club_by_name("Simply Lift")
+        registry.competition_by_name("Future Open")
+        assert registry.version == before
@@ -0,0 +1,66 @@
+"""
+Unit tests for the gunicorn server hooks
+"""
+
+import runpy
+import sys
+from types import SimpleNamespace
+
+import pytest
+import server
+from gudlft.profiling import RequestProfiler
+
+
+class GeventWorker:
+    """Stands for gunicorn's gevent worker class"""
+
+    __module__ = "gunicorn.workers.ggevent"
+
+
+class ThreadWorker:
+    """Stands for gunicorn's gthread worker class"""
+
+    __module__ = "gunicorn.workers.gthread"
+
+
+@pytest.fixture
+def conf(monkeypatch):
+    """Load gunicorn.conf.py without touching the environment for good"""
+    monkeypatch.setenv("GUDLFT_STORAGE", "sqlite")
+    monkeypatch.setenv("GUDLFT_WARMUP", "eager")
+    monkeypatch.delenv("GUNICORN_WORKER_CLASS", raising=False)
+    return runpy.run_path("gunicorn.conf.py")
+
+
+def arbiter(worker_class, workers=2):
+    """Return a stand-in for the gunicorn arbiter passed to the hooks"""
+    return SimpleNamespace(cfg=SimpleNamespace(workers=workers), worker_class=worker_class)
+
+
+class TestGunicornConf:
+    """Test the worker class and the checks made before forking"""
+
+    def test_gthread_by_default(self, conf):
+        """Test that bookings are served by thread workers unless told otherwise"""
+        assert conf["worker_class"] == "gthread"
+
+    def test_profiler_refused_under_gevent(self, conf, monkeypatch):
+        """Test that profiling with gevent workers stops the master"""
+        monkeypatch.setattr(server, "profiler", RequestProfiler(1.0))
+        with pytest.raises(RuntimeError, match="gthread"):
+            conf["on_starting"](arbiter(GeventWorker))
+        conf["on_starting"](arbiter(ThreadWorker))
+
+    def test_gevent_without_profiler_starts(self, conf, monkeypatch):
+        """Test that gevent workers are accepted when profiling is off"""
+        monkeypatch.setattr(server, "profiler", None)
+        conf["on_starting"](arbiter(GeventWorker))
+
+    def test_thread_worker_is_not_patched(self, conf, monkeypatch):
+        """Test that a gthread worker keeps the standard threading module"""
+        forked = []
+        monkeypatch.setattr(server, "afterFork", lambda: forked.append(True))
+        conf["post_fork"](arbiter(ThreadWorker), ThreadWorker())
+        assert forked == [True]
+        monkey = sys.modules.get("gevent.monkey")
+        assert monkey is None or not monkey.is_module_patched("threading")
@@ -0,0 +1,363 @@
+"""
+Unit tests for the booking journal, snapshots and startup replay
+"""
+
+import json
+
+import pytest
+
+from gudlft.journal import BookingJournal
+from gudlft.persistence import BatchedWriter
+from gudlft.registry import Registry
+from gudlft.storage import JsonStorage
+from server import loadClubs, loadCompetitions
+from tests.conftest import make_registry
+
+
+@pytest.fixture
+def registry():
+    """Create a registry with one club and one competition"""
+    return make_registry(
+        clubs=[{"name": "Club A", "email": "a@test.com", "points": "15"}],
+        competitions=[
+            {"name": "Spring Cup", "date": "2099-04-01 09:00:00", "numberOfPlaces": "30"}
+        ],
+    )
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Open a journal inside tmp_path"""
+    journal = BookingJournal(str(tmp_path / "bookings.journal"), fsync=False)
+    yield journal
+    journal.close()
+
+
+class TestJournalAppend:
+    """Test appending and reading events"""
+
+    def test_append_assigns_increasing_seq(self, journal):
+        """Test that each booking gets the next sequence number"""
+        assert journal.append("Spring Cup", "Club A", 2, 28, 13) == 1
+        assert journal.append("Spring Cup", "Club A", 1, 27, 12) == 2
+
+    def test_event_fields(self, journal):
+        """Test that an event records the booking and its outcome"""
+        journal.append("Spring Cup", "Club A", 2, 28, 13)
+        event = next(journal.read())
+        assert event["competition"] == "Spring Cup"
+        assert event["club"] == "Club A"
+        assert event["places"] == 2
+        assert event["numberOfPlaces"] == 28
+        assert event["points"] == 13
+        assert "timestamp" in event
+
+    def test_append_many_writes_every_event(self, journal):
+        """Test that a batch gets consecutive sequence numbers"""
+        last = journal.append_many(
+            [("Spring Cup", "Club A", 2, 28, 13), ("Spring Cup", "Club A", 1, 27, 12)]
+        )
+        assert last == 2
+        assert [e["numberOfPlaces"] for e in journal.read()] == [28, 27]
+
+    def test_reopen_resumes_sequence(self, journal, tmp_path):
+        """Test that reopening continues after the last recorded event"""
+        journal.append("Spring Cup", "Club A", 2, 28, 13)
+        journal.close()
+        reopened = BookingJournal(str(tmp_path / "bookings.journal"), fsync=False)
+        assert reopened.append("Spring Cup", "Club A", 1, 27, 12) == 2
+        reopened.close()
+
+    def test_reopen_after_compaction_resumes_sequence(self, journal, tmp_path):
+        """Test that an emptied journal continues after the archive and snapshots"""
+        journal.append_many([("Spring Cup", "Club A", 1, 29, 14)] * 3)
+        journal.compact(3)
+        journal.close()
+        path = str(tmp_path / "bookings.journal")
+        reopened = BookingJournal(path, fsync=False)
+        assert reopened.last_seq == 3
+        reopened.close()
+        (tmp_path / "bookings.journal.archive").unlink()
+        reopened = BookingJournal(path, fsync=False, after_seq=3)
+        assert reopened.append("Spring Cup", "Club A", 1, 26, 11) == 4
+        reopened.close()
+
+    def test_truncated_last_line_is_ignored(self, journal, tmp_path):
+        """Test that a line torn by a crash does not break reading"""
+        journal.append("Spring Cup", "Club A", 2, 28, 13)
+        with open(tmp_path / "bookings.journal", "a") as f:
+            f.write('{"seq": 2, "compet')
+        assert [event["seq"] for event in journal.read()] == [1]
+
+
+class TestJournalReplay:
+    """Test replaying the journal tail on top of a snapshot"""
+
+    def test_replay_applies_events(self, registry, journal):
+        """Test that replay restores the latest places and points"""
+        journal.append("Spring Cup", "Club A", 2, 28, 13)
+        journal.append("Spring Cup", "Club A", 3, 25, 10)
+        assert journal.replay(registry) == 2
+        assert registry.competition_by_name("Spring Cup").number_of_places == 25
+        assert registry.club_by_name("Club A").points == 10
+
+    def test_replay_skips_events_in_snapshot(self, registry, journal):
+        """Test that events already covered by the snapshot are not applied"""
+        journal.append("Spring Cup", "Club A", 2, 28, 13)
+        registry.clubs_seq = registry.competitions_seq = 1
+        assert journal.replay(registry) == 0
+        assert registry.club_by_name("Club A").points == 15
+
+    def test_replay_ignores_unknown_records(self, registry, journal):
+        """Test that events for removed clubs or competitions are skipped"""
+        journal.append("Old Cup", "Old Club", 1, 0, 0)
+        journal.replay(registry)
+        assert registry.club_by_name("Club A").points == 15
+
+
+class TestSnapshotCompaction:
+    """Test snapshots written by the BatchedWriter with a journal attached"""
+
+    def test_snapshot_records_seq_and_compacts(self, registry, journal, tmp_path):
+        """Test that a snapshot stores journalSeq and archives covered events"""
+        writer = BatchedWriter(
+            registry,
+            str(tmp_path / "clubs.json"),
+            str(tmp_path / "competitions.json"),
+            flush_interval=0,
+            journal=journal,
+        )
+        registry.club_by_name("Club A").points = 13
+        journal.append("Spring Cup", "Club A", 2, 28, 13)
+        writer.mark_dirty()
+        writer.flush()
+
+        saved = json.loads((tmp_path / "clubs.json").read_text())
+        assert saved["journalSeq"] == 1
+        assert list(journal.read()) == []
+        archived = (tmp_path / "bookings.journal.archive").read_text().splitlines()
+        assert json.loads(archived[0])["seq"] == 1
+
+    def test_startup_loads_snapshot_then_replays_tail(self, registry, journal, tmp_path):
+        """Test that a restart sees bookings made after the last snapshot"""
+        writer = BatchedWriter(
+            registry,
+            str(tmp_path / "clubs.json"),
+            str(tmp_path / "competitions.json"),
+            flush_interval=0,
+            journal=journal,
+        )
+        journal.append("Spring Cup", "Club A", 2, 28, 13)
+        writer.mark_dirty()
+        writer.flush()
+        journal.append("Spring Cup", "Club A", 3, 25, 10)
+
+        restarted = Registry()
+        loadCompetitions(restarted, str(tmp_path / "competitions.json"))
+        loadClubs(restarted, str(tmp_path / "clubs.json"))
+        assert restarted.clubs_seq == 1
+        assert journal.replay(restarted) == 1
+        assert restarted.club_by_name("Club A").points == 10
+        assert restarted.competition_by_name("Spring Cup").number_of_places == 25
+
+
+class TestHistory:
+    """Test the full booking history and the ledger rebuilt from it"""
+
+    def test_history_spans_archive_and_journal(self, registry, journal, tmp_path):
+        """Test that archived and live events are read once each, in order"""
+        for places in (1, 2, 3):
+            journal.append("Spring Cup", "Club A", places, 0, 0)
+        journal.compact(2)
+        # As if a crash had left seq 2 in both files mid-compaction
+        with open(tmp_path / "bookings.journal", "r+") as live:
+            tail = live.read()
+            live.seek(0)
+            live.write(
+                (tmp_path / "bookings.journal.archive").read_text().splitlines()[1]
+                + "\n"
+                + tail
+            )
+        assert [e["places"] for e in journal.history()] == [1, 2, 3]
+
+    def test_storage_rebuilds_ledger(self, registry, tmp_path):
+        """Test that a restarted storage knows the places booked before"""
+        for name, key, records in (
+            ("clubs.json", "clubs", registry.clubs),
+            ("competitions.json", "competitions", registry.competitions),
+        ):
+            (tmp_path / name).write_text(
+                json.dumps({key: [record.to_dict() for record in records]})
+            )
+        journal = BookingJournal(str(tmp_path / "bookings.journal"), fsync=False)
+        journal.append("Spring Cup", "Club A", 4, 26, 11)
+        journal.compact(1)
+        journal.append("Spring Cup", "Club A", 5, 21, 6)
+        journal.close()
+        storage = JsonStorage(
+            Registry(),
+            str(tmp_path / "clubs.json"),
+            str(tmp_path / "competitions.json"),
+            journal_path=str(tmp_path / "bookings.journal"),
+            journal_fsync=False,
+            flush_interval=0,
+        )
+        storage.load()
+        assert storage.ledger.booked("Club A", "Spring Cup") == 9
+        storage.close()
+
+    def test_storage_loads_ledger_snapshot_then_tail(self, registry, tmp_path):
+        """Test that a restart reads the ledger snapshot, not the archive"""
+        for name, key, records in (
+            ("clubs.json", "clubs", registry.clubs),
+            ("competitions.json", "competitions", registry.competitions),
+        ):
+            (tmp_path / name).write_text(
+                json.dumps({key: [record.to_dict() for record in records]})
+            )
+
+        def open_storage():
+            storage = JsonStorage(
+                Registry(),
+                str(tmp_path / "clubs.json"),
+                str(tmp_path / "competitions.json"),
+                journal_path=str(tmp_path / "bookings.journal"),
+                journal_fsync=False,
+                flush_interval=0,
+                batch_size=1000,
+            )
+            storage.load()
+            return storage
+
+        storage = open_storage()
+        club = storage.registry.club_by_name("Club A")
+        competition = storage.registry.competition_by_name("Spring Cup")
+        storage.commit_bookings([(club, competition, 2), (club, competition, 3)])
+        storage.writer.mark_dirty(1000)
+        storage.commit_bookings([(club, competition, 4)])
+        assert [e["booked"] for e in storage.journal.read()] == [9]
+        storage.journal.close()
+
+        (tmp_path / "bookings.journal.archive").unlink()
+        restarted = open_storage()
+        assert restarted.ledger.booked("Club A", "Spring Cup") == 9
+        restarted.close()
+
+    def test_ledger_snapshot_every_few_flushes(self, registry, tmp_path):
+        """Test that compaction keeps the events after an older ledger snapshot"""
+        for name, key, records in (
+            ("clubs.json", "clubs", registry.clubs),
+            ("competitions.json", "competitions", registry.competitions),
+        ):
+            (tmp_path / name).write_text(
+                json.dumps({key: [record.to_dict() for record in records]})
+            )
+
+        def open_storage():
+            storage = JsonStorage(
+                Registry(),
+                str(tmp_path / "clubs.json"),
+                str(tmp_path / "competitions.json"),
+                journal_path=str(tmp_path / "bookings.journal"),
+                journal_fsync=False,
+                flush_interval=0,
+                batch_size=1,
+                ledger_every=3,
+            )
+            storage.load()
+            return storage
+
+        storage = open_storage()
+        club = storage.registry.club_by_name("Club A")
+        competition = storage.registry.competition_by_name("Spring Cup")
+        for places in (1, 2, 3):
+            storage.commit_bookings([(club, competition, places)])
+            storage.after_commit(1)
+        assert storage.writer.flush_count == 3
+        ledger = json.loads((tmp_path / "bookings.journal.ledger").read_text())
+        assert ledger["journalSeq"] == 1
+        assert json.loads((tmp_path / "clubs.json").read_text())["journalSeq"] == 3
+        assert [e["seq"] for e in storage.journal.read()] == [2, 3]
+        storage.journal.close()
+
+        (tmp_path / "bookings.journal.archive").unlink()
+        restarted = open_storage()
+        assert restarted.ledger.booked("Club A", "Spring Cup") == 6
+        restarted.close()
+
+
+class TestRestart:
+    """Test bookings made after a clean restart"""
+
+    def test_crash_after_clean_restart_keeps_bookings(self, registry, tmp_path):
+        """Test that a booking journaled after compaction is replayed after a crash"""
+        for name, key, records in (
+            ("clubs.json", "clubs", registry.clubs),
+            ("competitions.json", "competitions", registry.competitions),
+        ):
+            (tmp_path / name).write_text(
+                json.dumps({key: [record.to_dict() for record in records]})
+            )
+
+        def open_storage():
+            storage = JsonStorage(
+                Registry(),
+                str(tmp_path / "clubs.json"),
+                str(tmp_path / "competitions.json"),
+                journal_path=str(tmp_path / "bookings.journal"),
+                journal_fsync=False,
+                flush_interval=0,
+                batch_size=1000,
+            )
+            storage.load()
+            club = storage.registry.club_by_name("Club A")
+            competition = storage.registry.competition_by_name("Spring Cup")
+            return storage, club, competition
+
+        storage, club, competition = open_storage()
+        storage.commit_bookings([(club, competition, 1)] * 3)
+        storage.after_commit(3)
+        storage.close()
+        assert (tmp_path / "bookings.journal").read_text() == ""
+
+        storage, club, competition = open_storage()
+        storage.commit_bookings([(club, competition, 2)])
+        assert [e["seq"] for e in storage.journal.read()] == [4]
+        # Crash: the journal is durable, the data files were not rewritten.
+        storage.journal.close()
+
+        storage, club, competition = open_storage()
+        assert club.points == 10
+        assert competition.number_of_places == 25
+        assert storage.ledger.booked("Club A", "Spring Cup") == 5
+        storage.close()
+
+
+class TestJsonStorageBatch:
+    """Test journaling of a booking batch by the JSON storage"""
+
+    def test_events_carry_values_after_each_booking(self, registry, tmp_path):
+        """Test that replaying a prefix of a batch gives that prefix's state"""
+        for name, key, records in (
+            ("clubs.json", "clubs", registry.clubs),
+            ("competitions.json", "competitions", registry.competitions),
+        ):
+            (tmp_path / name).write_text(
+                json.dumps({key: [record.to_dict() for record in records]})
+            )
+        storage = JsonStorage(
+            Registry(),
+            str(tmp_path / "clubs.json"),
+            str(tmp_path / "competitions.json"),
+            journal_path=str(tmp_path / "bookings.journal"),
+            journal_fsync=False,
+            flush_interval=0,
+            batch_size=1000,
+        )
+        storage.load()
+        club = storage.registry.club_by_name("Club A")
+        competition = storage.registry.competition_by_name("Spring Cup")
+        storage.commit_bookings([(club, competition, 2), (club, competition, 3)])
+        events = list(storage.journal.read())
+        assert [(e["numberOfPlaces"], e["points"]) for e in events] == [(28, 13), (25, 10)]
+        storage.close()
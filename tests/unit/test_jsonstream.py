@@ -0,0 +1,112 @@
+"""
+Unit tests for the incremental data file readers and NDJSON snapshots
+"""
+
+import json
+
+import pytest
+
+from gudlft.jsonstream import RecordReader
+from gudlft.persistence import write_data_file
+from gudlft.registry import Registry
+from gudlft.storage import JsonStorage, read_clubs
+
+CLUBS = [
+    {"name": "Club A", "email": "a@test.com", "points": "15"},
+    {"name": "Club, \"B\" }", "email": "b@test.com", "points": "1234567"},
+    {"name": "Club C", "email": "c@test.com", "points": "0"},
+]
+
+
+def read(path, key="clubs", **kwargs):
+    """Return the records and metadata read from `path`"""
+    reader = RecordReader(str(path), key, **kwargs)
+    return list(reader), reader.meta
+
+
+class TestJsonReader:
+    """Test streaming records out of the array of a JSON document"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+    def test_any_chunk_size(self, tmp_path, chunk_size):
+        """Test that records split across chunks are decoded unchanged"""
+        path = tmp_path / "clubs.json"
+        path.write_text(json.dumps({"clubs": CLUBS, "journalSeq": 12}, indent=4))
+        records, meta = read(path, chunk_size=chunk_size)
+        assert records == CLUBS
+        assert meta == {"journalSeq": 12}
+
+    def test_metadata_before_array(self, tmp_path):
+        """Test that top-level keys are kept whichever side of the array they are"""
+        path = tmp_path / "clubs.json"
+        path.write_text('{"journalSeq": 3, "clubs": []}')
+        assert read(path) == ([], {"journalSeq": 3})
+
+    def test_missing_array(self, tmp_path):
+        """Test that a file without the expected key is refused"""
+        path = tmp_path / "clubs.json"
+        path.write_text('{"competitions": []}')
+        with pytest.raises(KeyError):
+            read(path)
+
+    def test_truncated_file(self, tmp_path):
+        """Test that a truncated document raises a decode error"""
+        path = tmp_path / "clubs.json"
+        path.write_text(json.dumps({"clubs": CLUBS})[:-10])
+        with pytest.raises(json.JSONDecodeError):
+            read(path, chunk_size=16)
+
+    def test_progress(self, tmp_path):
+        """Test that progress is reported every N records and at the end"""
+        path = tmp_path / "clubs.json"
+        path.write_text(json.dumps({"clubs": CLUBS}))
+        calls = []
+        read(path, progress=lambda *args: calls.append(args), progress_every=2)
+        assert [records for records, _ in calls] == [2, 3]
+        assert calls[-1][1] == path.stat().st_size
+
+
+class TestNdjson:
+    """Test the one-record-per-line variant"""
+
+    def test_reads_records_and_metadata(self, tmp_path):
+        """Test that a journalSeq line is metadata and blank lines are skipped"""
+        path = tmp_path / "clubs.ndjson"
+        lines = ['{"journalSeq": 4}'] + [json.dumps(c) for c in CLUBS] + [""]
+        path.write_text("\n".join(lines) + "\n")
+        assert read(path) == (CLUBS, {"journalSeq": 4})
+
+    def test_snapshot_round_trip(self, tmp_path):
+        """Test that snapshots of an NDJSON file are written back as NDJSON"""
+        path = tmp_path / "clubs.ndjson"
+        write_data_file(str(path), "clubs", iter(CLUBS), journal_seq=9)
+        assert len(path.read_text().splitlines()) == 4
+        clubs, seq = read_clubs(str(path))
+        assert [c.to_dict() for c in clubs] == CLUBS
+        assert seq == 9
+
+    def test_storage_loads_and_snapshots_ndjson(self, tmp_path):
+        """Test that JsonStorage runs unchanged on NDJSON data files"""
+        clubs_path, competitions_path = tmp_path / "clubs.ndjson", tmp_path / "comps.ndjson"
+        write_data_file(str(clubs_path), "clubs", CLUBS)
+        write_data_file(
+            str(competitions_path),
+            "competitions",
+            [{"name": "Cup", "date": "2099-01-01 10:00:00", "numberOfPlaces": "20"}],
+        )
+        registry = Registry()
+        storage = JsonStorage(
+            registry,
+            str(clubs_path),
+            str(competitions_path),
+            journal_path=str(tmp_path / "bookings.journal"),
+            flush_interval=0,
+            batch_size=1,
+        )
+        storage.load()
+        storage.commit_booking(
+            registry.club_by_name("Club A"), registry.competition_by_name("Cup"), 2
+        )
+        storage.after_commit()
+        assert json.loads(clubs_path.read_text().splitlines()[1])["points"] == "13"
+        storage.close()
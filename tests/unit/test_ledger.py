@@ -0,0 +1,32 @@
+"""
+Unit tests for the per-pair booking ledger
+"""
+
+from gudlft.ledger import BookingLedger
+
+
+class TestBookingLedger:
+    """Test the running totals per (club, competition)"""
+
+    def test_unknown_pair_is_zero(self):
+        """Test that a pair never booked has booked nothing"""
+        assert BookingLedger().booked("Club A", "Cup") == 0
+
+    def test_add_accumulates_per_pair(self):
+        """Test that totals add up per pair and stay separate"""
+        ledger = BookingLedger()
+        ledger.add("Club A", "Cup", 3)
+        assert ledger.add("Club A", "Cup", 4) == 7
+        ledger.add("Club B", "Cup", 1)
+        assert ledger.booked("Club A", "Cup") == 7
+        assert ledger.booked("Club B", "Cup") == 1
+        assert ledger.booked("Club A", "Other Cup") == 0
+
+    def test_rebuild_replaces_totals(self):
+        """Test that a rebuild sums the history and forgets earlier totals"""
+        ledger = BookingLedger()
+        ledger.add("Club Z", "Cup", 5)
+        pairs = ledger.rebuild([("Club A", "Cup", 2), ("Club B", "Cup", 1), ("Club A", "Cup", 3)])
+        assert pairs == len(ledger) == 2
+        assert ledger.booked("Club A", "Cup") == 5
+        assert ledger.booked("Club Z", "Cup") == 0
@@ -34,8 +34,8 @@ class TestLoadClubs:
         with patch("builtins.open", mock_open(read_data=mock_data)):
             clubs = loadClubs()
             assert len(clubs) == 2
-            assert clubs[0]["name"] == "Club A"
-            assert clubs[1]["points"] == "20"
+            assert clubs[0].name == "Club A"
+            assert clubs[1].points == 20
 
     def test_loadClubs_structure(self):
         """Test that each club has required fields"""
@@ -49,7 +49,7 @@ class TestLoadClubs:
             required_fields = ("name", "email", "points")
             for club in clubs:
                 for field in required_fields:
-                    assert field in club
+                    assert hasattr(club, field)
 
     def test_loadClubs_empty_list(self):
         """Test that loadClubs handles empty clubs list"""
@@ -91,8 +91,8 @@ class TestLoadCompetitions:
         with patch("builtins.open", mock_open(read_data=mock_data)):
             competitions = loadCompetitions()
             assert len(competitions) == 2
-            assert competitions[0]["name"] == "Spring Cup"
-            assert competitions[1]["numberOfPlaces"] == "50"
+            assert competitions[0].name == "Spring Cup"
+            assert competitions[1].number_of_places == 50
 
     def test_loadCompetitions_structure(self):
         """Test that each competition has required fields"""
@@ -103,10 +103,10 @@ class TestLoadCompetitions:
         })
         with patch("builtins.open", mock_open(read_data=mock_data)):
             competitions = loadCompetitions()
-            required_fields = ("name", "date", "numberOfPlaces")
+            required_fields = ("name", "date", "number_of_places")
             for comp in competitions:
                 for field in required_fields:
-                    assert field in comp
+                    assert hasattr(comp, field)
 
     def test_loadCompetitions_empty_list(self):
         """Test that loadCompetitions handles empty competitions list"""
@@ -0,0 +1,79 @@
+"""
+Unit tests for the latency histograms and their Prometheus rendering
+"""
+
+import threading
+from unittest.mock import patch
+
+from gudlft.metrics import Histogram, LatencyMetrics
+
+
+class TestHistogram:
+    """Test bucket counting"""
+
+    def test_observe_counts_in_cumulative_buckets(self):
+        """Test that each value lands in its bucket and every larger one"""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+        assert histogram.count == 4
+        assert histogram.sum == 3.65
+
+
+class TestLatencyMetrics:
+    """Test request timers and the text exposition"""
+
+    def test_laps_are_summed_per_phase(self):
+        """Test that repeated laps of one phase are recorded once per request"""
+        metrics = LatencyMetrics(buckets=(1.0,))
+        clock = iter([0.0, 0.1, 0.3, 0.6, 1.0])
+        with patch("gudlft.metrics.time.perf_counter", lambda: next(clock)):
+            metrics.start("purchasePlaces")
+            metrics.lap("lookup")
+            metrics.lap("render")
+            metrics.lap("lookup")
+            metrics.finish()
+        lookup = metrics._phases[("purchasePlaces", "lookup")]
+        assert lookup.count == 1
+        assert round(lookup.sum, 6) == 0.4
+        assert metrics._requests["purchasePlaces"].sum == 1.0
+
+    def test_lap_without_request_is_ignored(self):
+        """Test that code run outside a request does not fail"""
+        metrics = LatencyMetrics()
+        metrics.lap("validate")
+        metrics.finish()
+        assert metrics.render().count("_count") == 0
+
+    def test_render_prometheus_text(self):
+        """Test the exposition format of one recorded request"""
+        metrics = LatencyMetrics(buckets=(0.5,))
+        metrics.start("index")
+        metrics.lap("render")
+        metrics.finish()
+        text = metrics.render()
+        assert "# TYPE gudlft_request_duration_seconds histogram" in text
+        assert 'gudlft_request_duration_seconds_bucket{route="index",le="+Inf"} 1' in text
+        assert 'gudlft_request_phase_seconds_count{route="index",phase="render"} 1' in text
+
+    def test_unmatched_route_label(self):
+        """Test that requests without an endpoint share one label"""
+        metrics = LatencyMetrics()
+        metrics.start(None)
+        metrics.finish()
+        assert 'route="unmatched"' in metrics.render()
+
+    def test_render_waits_for_a_new_route(self):
+        """Test that a scrape does not read the tables while a route is added"""
+        metrics = LatencyMetrics()
+        metrics.start("index")
+        metrics.finish()
+        rendered = []
+        with metrics._lock:
+            scrape = threading.Thread(target=lambda: rendered.append(metrics.render()))
+            scrape.start()
+            scrape.join(0.1)
+            assert rendered == []
+        scrape.join()
+        assert 'route="index"' in rendered[0]
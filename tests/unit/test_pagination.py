@@ -0,0 +1,136 @@
+"""
+Unit tests for sorted listings, prefix search and page parsing
+"""
+
+from datetime import datetime
+
+import pytest
+
+from gudlft.models import Club, Competition
+from gudlft.pagination import Page, page_args
+from gudlft.registry import Registry
+
+
+@pytest.fixture
+def registry():
+    """Create a registry with clubs of distinct points and dated competitions"""
+    registry = Registry()
+    registry.set_clubs(
+        [
+            Club("Alpha Lift", "alpha@test.com", 5),
+            Club("Iron Temple", "iron@test.com", 4),
+            Club("alpine Club", "alpine@test.com", 30),
+            Club("Beta Gym", "beta@test.com", 12),
+        ]
+    )
+    registry.set_competitions(
+        [
+            Competition("Winter Cup", datetime(2099, 12, 1), 10),
+            Competition("Spring Open", datetime(2099, 3, 1), 10),
+            Competition("Summer Games", datetime(2099, 6, 1), 10),
+        ]
+    )
+    return registry
+
+
+def names(records):
+    return [record.name for record in records]
+
+
+class TestClubListing:
+    """Test the points board indexes"""
+
+    def test_sorted_by_points_descending(self, registry):
+        """Test that the default order is highest points first"""
+        clubs, total = registry.clubs_page(0, 10)
+        assert names(clubs) == ["alpine Club", "Beta Gym", "Alpha Lift", "Iron Temple"]
+        assert total == 4
+
+    def test_sorted_by_name(self, registry):
+        """Test case-insensitive name order"""
+        clubs, _ = registry.clubs_page(0, 10, order="name")
+        assert names(clubs) == ["Alpha Lift", "alpine Club", "Beta Gym", "Iron Temple"]
+
+    def test_page_slice(self, registry):
+        """Test that start/stop select one page"""
+        clubs, total = registry.clubs_page(1, 3)
+        assert names(clubs) == ["Beta Gym", "Alpha Lift"]
+        assert total == 4
+
+    def test_prefix_search_is_case_insensitive(self, registry):
+        """Test that a prefix matches names regardless of case"""
+        clubs, total = registry.clubs_page(0, 10, order="name", prefix="ALP")
+        assert names(clubs) == ["Alpha Lift", "alpine Club"]
+        assert total == 2
+
+    def test_prefix_search_is_in_name_order(self, registry):
+        """Test that prefix matches stay in name order even when points are asked for"""
+        clubs, total = registry.clubs_page(1, 2, order="points", prefix="al")
+        assert names(clubs) == ["alpine Club"]
+        assert total == 2
+
+    def test_points_update_reorders(self, registry):
+        """Test that the points index follows a points change"""
+        registry.update_club(registry.club_by_name("alpine Club"), points=1)
+        clubs, _ = registry.clubs_page(0, 10)
+        assert names(clubs)[-1] == "alpine Club"
+
+    def test_removed_club_leaves_listing(self, registry):
+        """Test that a removed club disappears from every index"""
+        registry.remove_club(registry.club_by_name("Beta Gym"))
+        assert "Beta Gym" not in names(registry.clubs_page(0, 10)[0])
+        assert "Beta Gym" not in names(registry.clubs_page(0, 10, order="name")[0])
+
+
+class TestCompetitionListing:
+    """Test the date-ordered competition index"""
+
+    def test_sorted_by_date(self, registry):
+        """Test that competitions are listed chronologically"""
+        competitions, _ = registry.competitions_page(0, 10)
+        assert names(competitions) == ["Spring Open", "Summer Games", "Winter Cup"]
+
+    def test_prefix_search(self, registry):
+        """Test that a name prefix selects competitions in date order"""
+        competitions, total = registry.competitions_page(0, 10, prefix="s")
+        assert names(competitions) == ["Spring Open", "Summer Games"]
+        assert total == 2
+
+    def test_date_change_reorders(self, registry):
+        """Test that moving a competition date updates its position"""
+        registry.update_competition(
+            registry.competition_by_name("Winter Cup"), date=datetime(2099, 1, 1)
+        )
+        assert names(registry.competitions_page(0, 1)[0]) == ["Winter Cup"]
+
+
+class TestPageArgs:
+    """Test query-string parsing"""
+
+    def test_defaults(self):
+        """Test the first page with the default size"""
+        assert page_args({}) == (1, 50)
+
+    def test_clamps_values(self):
+        """Test that page and per_page are kept in range"""
+        assert page_args({"page": "0", "per_page": "100000"}) == (1, 200)
+
+    def test_invalid_values(self):
+        """Test that garbage falls back to the defaults"""
+        assert page_args({"page": "abc", "per_page": "x"}) == (1, 50)
+
+
+class TestPage:
+    """Test page navigation properties"""
+
+    def test_navigation(self):
+        """Test page count and neighbours"""
+        page = Page([], 2, 10, 25)
+        assert page.pages == 3
+        assert page.has_prev and page.has_next
+
+    def test_empty_listing_has_one_page(self):
+        """Test that an empty listing still renders page 1 of 1"""
+        page = Page([], 1, 10, 0)
+        assert page.pages == 1
+        assert not page.has_next
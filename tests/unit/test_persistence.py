@@ -0,0 +1,113 @@
+"""
+Unit tests for atomic JSON writes and batched flushing
+"""
+
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from gudlft.persistence import BatchedWriter, atomic_write_json
+from tests.conftest import make_registry
+
+
+@pytest.fixture
+def registry():
+    """Create a registry with the shared test data"""
+    return make_registry()
+
+
+def make_writer(registry, tmp_path, **kwargs):
+    """Create a writer targeting data files inside tmp_path"""
+    return BatchedWriter(
+        registry,
+        str(tmp_path / "clubs.json"),
+        str(tmp_path / "competitions.json"),
+        **kwargs,
+    )
+
+
+class TestAtomicWriteJson:
+    """Test the temp-file + fsync + rename write"""
+
+    def test_writes_payload(self, tmp_path):
+        """Test that the file contains the encoded payload"""
+        path = tmp_path / "clubs.json"
+        atomic_write_json(str(path), {"clubs": []})
+        assert json.loads(path.read_text()) == {"clubs": []}
+
+    def test_leaves_no_temp_file(self, tmp_path):
+        """Test that only the target file remains after a write"""
+        atomic_write_json(str(tmp_path / "clubs.json"), {"clubs": []})
+        assert os.listdir(tmp_path) == ["clubs.json"]
+
+    def test_failure_keeps_original(self, tmp_path):
+        """Test that a failed encode leaves the previous file untouched"""
+        path = tmp_path / "clubs.json"
+        path.write_text('{"clubs": []}')
+        with pytest.raises(TypeError):
+            atomic_write_json(str(path), {"clubs": [object()]})
+        assert path.read_text() == '{"clubs": []}'
+        assert os.listdir(tmp_path) == ["clubs.json"]
+
+
+class TestBatchedWriter:
+    """Test group commit of registry changes"""
+
+    def test_sync_mode_flushes_when_batch_full(self, registry, tmp_path):
+        """Test that the batch is written once batch_size changes are pending"""
+        writer = make_writer(registry, tmp_path, flush_interval=0, batch_size=3)
+        registry.clubs[0].points = 12
+        writer.mark_dirty()
+        writer.mark_dirty()
+        assert not (tmp_path / "clubs.json").exists()
+        writer.mark_dirty()
+        saved = json.loads((tmp_path / "clubs.json").read_text())
+        assert saved["clubs"][0]["points"] == "12"
+        assert writer.flush_count == 1
+        assert writer.pending == 0
+
+    def test_flush_without_changes_is_noop(self, registry, tmp_path):
+        """Test that flushing a clean writer does not touch the disk"""
+        writer = make_writer(registry, tmp_path, flush_interval=0)
+        with patch("gudlft.persistence.atomic_write_json") as write:
+            assert writer.flush() is False
+            write.assert_not_called()
+
+    def test_close_flushes_pending(self, registry, tmp_path):
+        """Test that close writes changes below the batch size"""
+        writer = make_writer(registry, tmp_path, flush_interval=0, batch_size=10)
+        registry.competitions[0].number_of_places = 24
+        writer.mark_dirty()
+        writer.close()
+        saved = json.loads((tmp_path / "competitions.json").read_text())
+        assert saved["competitions"][0] == {
+            "name": "Spring Festival",
+            "date": "2020-03-27 10:00:00",
+            "numberOfPlaces": "24",
+        }
+
+    def test_background_flush_after_interval(self, registry, tmp_path):
+        """Test that the flusher thread writes pending changes on its own"""
+        writer = make_writer(registry, tmp_path, flush_interval=0.01, batch_size=100)
+        writer.start()
+        try:
+            writer.mark_dirty()
+            deadline = time.monotonic() + 2
+            while writer.flush_count == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert writer.flush_count == 1
+            assert (tmp_path / "clubs.json").exists()
+        finally:
+            writer.close()
+
+    def test_failed_flush_keeps_changes_pending(self, registry, tmp_path):
+        """Test that changes are retried after a write error"""
+        writer = make_writer(registry, tmp_path, flush_interval=0, batch_size=10)
+        writer.mark_dirty(2)
+        with patch("gudlft.persistence.atomic_write_json", side_effect=OSError):
+            with pytest.raises(OSError):
+                writer.flush()
+        assert writer.pending == 2
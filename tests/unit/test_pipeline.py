@@ -0,0 +1,91 @@
+"""
+Unit tests for the coalesced booking pipeline
+"""
+
+import pytest
+
+from gudlft.booking import BookingEngine, BookingError
+from gudlft.pipeline import BookingPipeline
+from gudlft.storage import Storage
+from tests.conftest import make_registry
+
+
+@pytest.fixture
+def registry():
+    """Create a registry with the shared test data"""
+    return make_registry()
+
+
+@pytest.fixture
+def engine(registry):
+    """Create a booking engine over the registry"""
+    return BookingEngine(registry)
+
+
+@pytest.fixture
+def pipeline(engine):
+    """Create a pipeline with a single writer, closed after the test"""
+    pipeline = BookingPipeline(engine, writers=1)
+    yield pipeline
+    pipeline.close()
+
+
+class TestBookingPipeline:
+    """Test bookings queued to a single writer per competition"""
+
+    def test_book_applies_booking(self, registry, pipeline):
+        """Test that a queued booking updates the records like a direct one"""
+        pipeline.book(
+            registry.club_by_name("Simply Lift"), registry.competition_by_name("Future Open"), 3
+        )
+        assert registry.club_by_name("Simply Lift").points == 10
+        assert registry.competition_by_name("Future Open").number_of_places == 17
+
+    def test_rule_violation_raised_to_caller(self, registry, pipeline):
+        """Test that a rejected booking raises in the waiting request"""
+        with pytest.raises(BookingError, match="enough points"):
+            pipeline.book(
+                registry.club_by_name("Iron Temple"),
+                registry.competition_by_name("Future Open"),
+                5,
+            )
+
+    def test_burst_coalesced_in_arrival_order(self, registry, engine, pipeline):
+        """Test that a burst is booked in few batches, first come first served"""
+        competition = registry.competition_by_name("Tiny Cup")
+        clubs = registry.clubs
+        with engine.exclusive():
+            futures = [pipeline.submit(clubs[i % 3], competition, 1) for i in range(6)]
+        errors = [future.result(5) for future in futures]
+        assert errors[:2] == [None, None]
+        assert all("Only 0 places remaining" in str(error) for error in errors[2:])
+        assert competition.number_of_places == 0
+        # The writer was blocked on the first one while the others queued up.
+        assert pipeline.batch_count <= 2
+        assert pipeline.booking_count == 6
+
+    def test_close_drains_queue(self, registry, engine, pipeline):
+        """Test that closing books what was queued before stopping"""
+        club = registry.club_by_name("Simply Lift")
+        competition = registry.competition_by_name("Future Open")
+        with engine.exclusive():
+            futures = [pipeline.submit(club, competition, 1) for _ in range(4)]
+        pipeline.close()
+        assert all(future.done() for future in futures)
+        assert competition.number_of_places == 16
+
+    def test_storage_failure_reaches_every_request(self, registry):
+        """Test that an unexpected error is raised in each request of the batch"""
+
+        class BrokenStorage(Storage):
+            def commit_bookings(self, bookings, atomic=False):
+                raise OSError("disk full")
+
+        pipeline = BookingPipeline(BookingEngine(registry, storage=BrokenStorage(registry)))
+        with pytest.raises(OSError):
+            pipeline.book(
+                registry.club_by_name("Simply Lift"),
+                registry.competition_by_name("Future Open"),
+                1,
+            )
+        pipeline.close()
@@ -0,0 +1,72 @@
+"""
+Unit tests for the request sampling profiler
+"""
+
+import threading
+
+from gudlft.profiling import RequestProfiler
+
+
+def serve(profiler, route, started, release):
+    """Simulate a request that waits inside a recognizable function"""
+    profiler.start(route)
+    started.set()
+    release.wait(5)
+    profiler.stop()
+
+
+class TestSampling:
+    """Test request selection"""
+
+    def test_zero_rate_picks_nothing(self):
+        """Test that a zero sample rate never picks a request"""
+        profiler = RequestProfiler(0.0)
+        assert not any(profiler.start("index") for _ in range(100))
+        assert profiler.sampled_requests == 0
+
+    def test_full_rate_picks_everything(self):
+        """Test that a sample rate of 1 picks every request"""
+        profiler = RequestProfiler(1.0, interval=60)
+        assert profiler.start("index")
+        profiler.stop()
+        assert profiler.sampled_requests == 1
+
+
+class TestStacks:
+    """Test stack capture and collapsed output"""
+
+    def test_samples_running_request(self):
+        """Test that the stack of a picked request is counted under its route"""
+        profiler = RequestProfiler(1.0, interval=60)
+        started, release = threading.Event(), threading.Event()
+        worker = threading.Thread(
+            target=serve, args=(profiler, "showSummary", started, release)
+        )
+        worker.start()
+        started.wait(5)
+        profiler.sample()
+        release.set()
+        worker.join()
+        lines = profiler.collapsed().splitlines()
+        assert profiler.routes() == ["showSummary"]
+        assert len(lines) >= 1
+        stack, count = lines[-1].rsplit(" ", 1)
+        assert stack.startswith("showSummary;")
+        assert "serve (test_profiling.py:" in stack
+        assert int(count) >= 1
+
+    def test_finished_request_is_not_sampled(self):
+        """Test that samples stop once the request ends"""
+        profiler = RequestProfiler(1.0, interval=60)
+        profiler.start("index")
+        profiler.stop()
+        profiler.sample()
+        assert profiler.collapsed() == ""
+
+    def test_route_filter_and_reset(self):
+        """Test that output can be limited to one route and cleared"""
+        profiler = RequestProfiler(1.0, interval=60)
+        profiler._stacks = {"a": {"x": 1}, "b": {"y": 2}}
+        assert profiler.collapsed("b") == "b;y 2\n"
+        profiler.reset()
+        assert profiler.routes() == []
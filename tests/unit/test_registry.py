@@ -0,0 +1,169 @@
+"""
+Unit tests for the club/competition registry and its lookup indexes
+"""
+
+from datetime import datetime
+
+import pytest
+
+from gudlft.models import Club, Competition
+from gudlft.registry import Registry
+
+
+@pytest.fixture
+def registry():
+    """Create a registry with two clubs and one competition"""
+    registry = Registry()
+    registry.set_clubs([
+        Club("Club A", "a@test.com", 15),
+        Club("Club B", "b@test.com", 20),
+    ])
+    registry.set_competitions([Competition("Spring Cup", datetime(2099, 4, 1, 9), 30)])
+    return registry
+
+
+class TestRegistryLookups:
+    """Test indexed lookups"""
+
+    def test_club_by_email(self, registry):
+        """Test that a club is found by its email"""
+        assert registry.club_by_email("b@test.com").name == "Club B"
+
+    def test_club_by_name(self, registry):
+        """Test that a club is found by its name"""
+        assert registry.club_by_name("Club A").email == "a@test.com"
+
+    def test_competition_by_name(self, registry):
+        """Test that a competition is found by its name"""
+        assert registry.competition_by_name("Spring Cup").number_of_places == 30
+
+    def test_unknown_keys_return_none(self, registry):
+        """Test that misses return None instead of raising"""
+        assert registry.club_by_email("nobody@test.com") is None
+        assert registry.club_by_name("Nobody") is None
+        assert registry.competition_by_name("Nothing") is None
+
+    def test_set_clubs_keeps_order(self, registry):
+        """Test that the ordered list follows the loaded data"""
+        assert [club.name for club in registry.clubs] == ["Club A", "Club B"]
+
+    def test_set_clubs_from_generator(self, registry):
+        """Test that a bulk load from any iterable fills every index"""
+        registry.set_clubs(Club(f"Club {i}", f"{i}@test.com", i) for i in range(3))
+        assert registry.club_by_email("2@test.com").name == "Club 2"
+        assert [c.points for c in registry.clubs_page(0, 3)[0]] == [2, 1, 0]
+
+    def test_set_clubs_rejects_duplicates(self, registry):
+        """Test that a bulk load refuses two clubs with the same email"""
+        with pytest.raises(ValueError):
+            registry.set_clubs([Club("X", "x@test.com", 1), Club("Y", "x@test.com", 1)])
+
+
+class TestRegistryMutations:
+    """Test that indexes stay in sync with mutations"""
+
+    def test_add_club_is_indexed(self, registry):
+        """Test that an added club is reachable by email and name"""
+        club = Club("Club C", "c@test.com", 5)
+        registry.add_club(club)
+        assert registry.club_by_email("c@test.com") is club
+        assert registry.club_by_name("Club C") is club
+        assert registry.clubs[-1] is club
+
+    def test_add_duplicate_email_rejected(self, registry):
+        """Test that two clubs cannot share an email"""
+        with pytest.raises(ValueError):
+            registry.add_club(Club("Other", "a@test.com", 1))
+
+    def test_add_duplicate_competition_rejected(self, registry):
+        """Test that two competitions cannot share a name"""
+        with pytest.raises(ValueError):
+            registry.add_competition(Competition("Spring Cup", datetime(2099, 1, 1), 1))
+
+    def test_remove_club(self, registry):
+        """Test that a removed club disappears from every index"""
+        club = registry.club_by_name("Club A")
+        registry.remove_club(club)
+        assert registry.club_by_email("a@test.com") is None
+        assert registry.club_by_name("Club A") is None
+        assert club not in registry.clubs
+
+    def test_update_club_rekeys_email(self, registry):
+        """Test that changing an email moves the club in the email index"""
+        club = registry.club_by_name("Club A")
+        registry.update_club(club, email="new@test.com", points=3)
+        assert registry.club_by_email("a@test.com") is None
+        assert registry.club_by_email("new@test.com") is club
+        assert club.points == 3
+
+    def test_update_club_refuses_taken_name(self, registry):
+        """Test that renaming onto an existing club name is rejected"""
+        club = registry.club_by_name("Club A")
+        with pytest.raises(ValueError):
+            registry.update_club(club, name="Club B")
+        assert registry.club_by_name("Club A") is club
+
+    def test_update_competition_rekeys_name(self, registry):
+        """Test that renaming a competition moves it in the name index"""
+        competition = registry.competition_by_name("Spring Cup")
+        registry.update_competition(competition, name="Summer Cup")
+        assert registry.competition_by_name("Spring Cup") is None
+        assert registry.competition_by_name("Summer Cup") is competition
+
+
+class TestCompetitionStatus:
+    """Test the precomputed past/open/full status and the open index"""
+
+    @pytest.fixture
+    def registry(self):
+        """Create a registry with competitions spread over time"""
+        registry = Registry()
+        registry.set_competitions([
+            Competition("Early Cup", datetime(2030, 1, 1, 9), 10),
+            Competition("Mid Cup", datetime(2030, 6, 1, 9), 0),
+            Competition("Late Cup", datetime(2030, 12, 1, 9), 5),
+        ])
+        registry.advance_clock(datetime(2029, 1, 1))
+        return registry
+
+    def names(self, registry):
+        """Return the open competitions in listing order"""
+        return [c.name for c in registry.competitions_page(0, 10, open_only=True)[0]]
+
+    def test_initial_status(self, registry):
+        """Test that empty competitions are full and the others open"""
+        assert registry.competition_status(registry.competition_by_name("Mid Cup")) == "full"
+        assert self.names(registry) == ["Early Cup", "Late Cup"]
+
+    def test_clock_expires_started_competitions(self, registry):
+        """Test that advancing the clock moves competitions to past"""
+        version = registry.version
+        assert registry.advance_clock(datetime(2030, 7, 1)) == 2
+        assert registry.competition_status(registry.competition_by_name("Early Cup")) == "past"
+        assert self.names(registry) == ["Late Cup"]
+        assert registry.version > version
+
+    def test_clock_never_goes_back(self, registry):
+        """Test that an older time leaves every status alone"""
+        registry.advance_clock(datetime(2030, 7, 1))
+        assert registry.advance_clock(datetime(2029, 1, 1)) == 0
+        assert self.names(registry) == ["Late Cup"]
+
+    def test_filling_and_freeing_places(self, registry):
+        """Test that status follows places reaching and leaving zero"""
+        early = registry.competition_by_name("Early Cup")
+        registry.update_competition(early, number_of_places=0)
+        assert registry.competition_status(early) == "full"
+        registry.update_competition(registry.competition_by_name("Mid Cup"), number_of_places=3)
+        assert self.names(registry) == ["Mid Cup", "Late Cup"]
+
+    def test_added_after_start_is_past(self, registry):
+        """Test that a competition added with a past date is never open"""
+        registry.add_competition(Competition("Old Cup", datetime(2000, 1, 1), 5))
+        assert registry.competition_status(registry.competition_by_name("Old Cup")) == "past"
+        assert "Old Cup" not in self.names(registry)
+
+    def test_prefix_search_on_open(self, registry):
+        """Test that a name search can be limited to open competitions"""
+        items, total = registry.competitions_page(0, 10, prefix="m", open_only=True)
+        assert (items, total) == ([], 0)
@@ -0,0 +1,176 @@
+"""
+Unit tests for hot reloading the JSON data files
+"""
+
+import json
+
+import pytest
+
+from gudlft.booking import BookingEngine, BookingError
+from gudlft.registry import Registry
+from gudlft.reload import FileTracker, file_signature
+from gudlft.storage.json_storage import JsonStorage
+from tests.conftest import TEST_CLUBS, TEST_COMPETITIONS
+
+
+def write_data(path, key, records):
+    """Replace a data file the way an editor saving it would"""
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({key: records}))
+    tmp.replace(path)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Directory holding the shared test data files"""
+    write_data(tmp_path / "clubs.json", "clubs", TEST_CLUBS)
+    write_data(tmp_path / "competitions.json", "competitions", TEST_COMPETITIONS)
+    return tmp_path
+
+
+def make_storage(data_dir, **kwargs):
+    """Load a reloading storage whose watcher never fires by itself"""
+    options = dict(persistence=False, reload_interval=3600)
+    options.update(kwargs)
+    storage = JsonStorage(
+        Registry(),
+        str(data_dir / "clubs.json"),
+        str(data_dir / "competitions.json"),
+        journal_path=str(data_dir / "bookings.journal"),
+        **options,
+    )
+    storage.load()
+    return storage
+
+
+def book(storage, club, competition, places):
+    """Book through an engine driving `storage`"""
+    registry = storage.registry
+    BookingEngine(registry, storage=storage).book(
+        registry.club_by_name(club), registry.competition_by_name(competition), places
+    )
+
+
+@pytest.fixture
+def storage(data_dir):
+    """Storage over the test files, with reloads checked by hand"""
+    storage = make_storage(data_dir)
+    yield storage
+    storage.close()
+
+
+class TestFileTracker:
+    """Test the detection of files edited by someone else"""
+
+    def test_unchanged_file_not_reported(self, data_dir):
+        """Test that a file still holding what was recorded is not reported"""
+        tracker = FileTracker()
+        path = str(data_dir / "clubs.json")
+        tracker.record(path, file_signature(path), {})
+        assert tracker.changed() == []
+
+    def test_replaced_file_reported(self, data_dir):
+        """Test that a file replaced since it was recorded is reported"""
+        tracker = FileTracker()
+        path = str(data_dir / "clubs.json")
+        tracker.record(path, file_signature(path), {})
+        write_data(data_dir / "clubs.json", "clubs", TEST_CLUBS[:1])
+        assert tracker.changed() == [path]
+
+
+class TestReload:
+    """Test that edited files are swapped in without losing bookings"""
+
+    def test_nothing_to_reload(self, storage):
+        """Test that the watcher does nothing while the files are untouched"""
+        assert storage.watcher.check() is False
+
+    def test_added_competition_appears(self, storage, data_dir):
+        """Test that a competition added to the file becomes visible"""
+        version = storage.registry.version
+        added = {"name": "New Open", "date": "2099-08-01 10:00:00", "numberOfPlaces": "8"}
+        write_data(data_dir / "competitions.json", "competitions", TEST_COMPETITIONS + [added])
+        assert storage.watcher.check() is True
+        assert storage.registry.competition_by_name("New Open").number_of_places == 8
+        assert storage.registry.version > version
+
+    def test_only_edited_file_reparsed(self, storage, data_dir):
+        """Test that the clubs are kept as they are when only competitions changed"""
+        club = storage.registry.club_by_name("Simply Lift")
+        write_data(data_dir / "competitions.json", "competitions", TEST_COMPETITIONS[1:])
+        storage.watcher.check()
+        assert storage.registry.club_by_name("Simply Lift") is club
+        assert storage.registry.competition_by_name("Spring Festival") is None
+
+    def test_bookings_since_load_are_kept(self, storage, data_dir):
+        """Test that an edited number keeps the bookings made before the reload"""
+        book(storage, "Simply Lift", "Future Open", 3)
+        edited = [dict(c) for c in TEST_COMPETITIONS]
+        edited[1]["numberOfPlaces"] = "30"
+        write_data(data_dir / "competitions.json", "competitions", edited)
+        storage.watcher.check()
+        assert storage.registry.competition_by_name("Future Open").number_of_places == 27
+
+    def test_edit_below_bookings_clamped(self, storage, data_dir):
+        """Test that an edit leaving fewer places than were booked ends at 0"""
+        book(storage, "Simply Lift", "Future Open", 5)
+        edited = [dict(c) for c in TEST_COMPETITIONS]
+        edited[1]["numberOfPlaces"] = "3"
+        write_data(data_dir / "competitions.json", "competitions", edited)
+        storage.watcher.check()
+        assert storage.registry.competition_by_name("Future Open").number_of_places == 0
+
+    def test_engine_uses_reloaded_records(self, storage, data_dir):
+        """Test that bookings on a stale record apply to the reloaded one"""
+        engine = BookingEngine(storage.registry, storage=storage)
+        stale = storage.registry.club_by_name("Simply Lift")
+        edited = [dict(c) for c in TEST_CLUBS]
+        edited[0]["points"] = "20"
+        write_data(data_dir / "clubs.json", "clubs", edited)
+        storage.watcher.check()
+        engine.book(stale, storage.registry.competition_by_name("Future Open"), 2)
+        assert storage.registry.club_by_name("Simply Lift").points == 18
+
+    def test_removed_record_rejected(self, storage, data_dir):
+        """Test that booking a record removed by the reload is refused"""
+        engine = BookingEngine(storage.registry, storage=storage)
+        stale = storage.registry.competition_by_name("Tiny Cup")
+        write_data(data_dir / "competitions.json", "competitions", TEST_COMPETITIONS[:2])
+        storage.watcher.check()
+        with pytest.raises(BookingError):
+            engine.book(storage.registry.club_by_name("Simply Lift"), stale, 1)
+
+    def test_broken_file_keeps_data(self, storage, data_dir):
+        """Test that a malformed edit is reported once and the data kept"""
+        (data_dir / "competitions.json").write_text('{"competitions": [')
+        assert storage.watcher.check() is False
+        assert storage.watcher.check() is False
+        assert storage.registry.competition_by_name("Future Open") is not None
+
+
+class TestReloadWithSnapshots:
+    """Test the interplay between reloads and the storage's own writes"""
+
+    @pytest.fixture
+    def storage(self, data_dir):
+        storage = make_storage(data_dir, persistence=True, flush_interval=0, batch_size=1)
+        yield storage
+        storage.close()
+
+    def test_own_snapshot_not_reloaded(self, storage):
+        """Test that a snapshot written by the storage is not taken for an edit"""
+        book(storage, "Simply Lift", "Future Open", 1)
+        assert storage.watcher.check() is False
+
+    def test_snapshot_waits_for_pending_edit(self, storage, data_dir):
+        """Test that an edit is never overwritten by a snapshot taken before its reload"""
+        edited = [dict(c) for c in TEST_COMPETITIONS]
+        edited[1]["numberOfPlaces"] = "30"
+        write_data(data_dir / "competitions.json", "competitions", edited)
+        book(storage, "Simply Lift", "Future Open", 1)
+        on_disk = json.loads((data_dir / "competitions.json").read_text())
+        assert on_disk["competitions"][1]["numberOfPlaces"] == "30"
+        storage.watcher.check()
+        assert storage.registry.competition_by_name("Future Open").number_of_places == 29
+        on_disk = json.loads((data_dir / "competitions.json").read_text())
+        assert on_disk["competitions"][1]["numberOfPlaces"] == "29"
@@ -0,0 +1,337 @@
+"""
+Unit tests for the SQLite storage backend
+"""
+
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from gudlft.booking import BookingEngine, BookingError
+from gudlft.events import EventBroker, StorageFeed
+from gudlft.registry import Registry
+from gudlft.storage import SqliteStorage
+from tests.conftest import TEST_CLUBS, TEST_COMPETITIONS
+
+
+@pytest.fixture
+def seed_dir(tmp_path):
+    """Write the shared test data as JSON seed files"""
+    (tmp_path / "clubs.json").write_text(json.dumps({"clubs": TEST_CLUBS}))
+    (tmp_path / "competitions.json").write_text(
+        json.dumps({"competitions": TEST_COMPETITIONS})
+    )
+    return tmp_path
+
+
+def open_storage(seed_dir):
+    """Create and load a storage (one per simulated worker process)"""
+    storage = SqliteStorage(
+        Registry(),
+        str(seed_dir / "gudlft.db"),
+        pool_size=4,
+        seed_clubs_path=str(seed_dir / "clubs.json"),
+        seed_competitions_path=str(seed_dir / "competitions.json"),
+    )
+    storage.load()
+    return storage
+
+
+@pytest.fixture
+def storage(seed_dir):
+    """Create a loaded SQLite storage over the test data"""
+    storage = open_storage(seed_dir)
+    yield storage
+    storage.close()
+
+
+class TestLoad:
+    """Test schema creation and seeding"""
+
+    def test_seeds_from_json(self, storage):
+        """Test that an empty database is filled from the JSON files"""
+        assert [club.name for club in storage.registry.clubs] == [
+            "Simply Lift",
+            "Iron Temple",
+            "She Lifts",
+        ]
+        assert storage.registry.competition_by_name("Future Open").number_of_places == 20
+
+    def test_uses_wal(self, storage, seed_dir):
+        """Test that the database runs in write-ahead-log mode"""
+        conn = sqlite3.connect(seed_dir / "gudlft.db")
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    def test_existing_database_is_not_reseeded(self, storage, seed_dir):
+        """Test that a restart keeps bookings instead of reading the JSON again"""
+        club = storage.registry.club_by_name("Simply Lift")
+        storage.commit_booking(club, storage.registry.competition_by_name("Future Open"), 3)
+        restarted = open_storage(seed_dir)
+        assert restarted.registry.club_by_name("Simply Lift").points == 10
+        assert restarted.registry.competition_by_name("Future Open").number_of_places == 17
+        restarted.close()
+
+
+    def test_restart_loads_booking_totals(self, storage, seed_dir):
+        """Test that the ledger of a restarted worker knows earlier bookings"""
+        registry = storage.registry
+        for places in (3, 4):
+            storage.commit_booking(
+                registry.club_by_name("Simply Lift"),
+                registry.competition_by_name("Future Open"),
+                places,
+            )
+        restarted = open_storage(seed_dir)
+        assert restarted.ledger.booked("Simply Lift", "Future Open") == 7
+        restarted.close()
+
+    def test_totals_backfilled_from_bookings(self, storage, seed_dir):
+        """Test that a database from before booking_totals gets its totals"""
+        conn = sqlite3.connect(seed_dir / "gudlft.db")
+        conn.execute(
+            "INSERT INTO bookings (competition, club, places, created_at)"
+            " VALUES ('Future Open', 'She Lifts', 5, '2026-01-01 10:00:00')"
+        )
+        conn.commit()
+        conn.close()
+        restarted = open_storage(seed_dir)
+        assert restarted.ledger.booked("She Lifts", "Future Open") == 5
+        restarted.close()
+
+class TestCommitBooking:
+    """Test the conditional booking transaction"""
+
+    def test_updates_database_and_registry(self, storage, seed_dir):
+        """Test that a booking is recorded in both places"""
+        registry = storage.registry
+        storage.commit_booking(
+            registry.club_by_name("Simply Lift"), registry.competition_by_name("Future Open"), 2
+        )
+        assert registry.club_by_name("Simply Lift").points == 11
+        conn = sqlite3.connect(seed_dir / "gudlft.db")
+        assert conn.execute("SELECT places FROM bookings").fetchall() == [(2,)]
+        conn.close()
+
+    def test_conflict_with_other_process_is_rejected(self, storage, seed_dir):
+        """Test that places taken by another process cannot be booked twice"""
+        other = open_storage(seed_dir)
+        other.commit_booking(
+            other.registry.club_by_name("She Lifts"),
+            other.registry.competition_by_name("Tiny Cup"),
+            2,
+        )
+        competition = storage.registry.competition_by_name("Tiny Cup")
+        with pytest.raises(BookingError, match="Only 0 places remaining"):
+            storage.commit_booking(storage.registry.club_by_name("Simply Lift"), competition, 1)
+        assert competition.number_of_places == 0
+        assert storage.registry.club_by_name("Simply Lift").points == 13
+        other.close()
+
+    def test_cap_reached_in_other_process_is_rejected(self, storage, seed_dir):
+        """Test that the cap holds when another worker's bookings are not seen yet"""
+        other = open_storage(seed_dir)
+        other.commit_booking(
+            other.registry.club_by_name("Simply Lift"),
+            other.registry.competition_by_name("Future Open"),
+            10,
+        )
+        registry = storage.registry
+        with pytest.raises(BookingError, match="already booked 10"):
+            storage.commit_booking(
+                registry.club_by_name("Simply Lift"),
+                registry.competition_by_name("Future Open"),
+                3,
+            )
+        assert storage.ledger.booked("Simply Lift", "Future Open") == 10
+        other.close()
+
+    def test_batch_best_effort_skips_conflicts(self, storage, seed_dir):
+        """Test that a conflicting booking in a batch does not undo the others"""
+        other = open_storage(seed_dir)
+        other.commit_booking(
+            other.registry.club_by_name("She Lifts"),
+            other.registry.competition_by_name("Tiny Cup"),
+            2,
+        )
+        registry = storage.registry
+        club = registry.club_by_name("Simply Lift")
+        errors = storage.commit_bookings(
+            [
+                (club, registry.competition_by_name("Future Open"), 2),
+                (club, registry.competition_by_name("Tiny Cup"), 1),
+            ]
+        )
+        assert errors[0] is None
+        assert "Only 0 places remaining" in str(errors[1])
+        assert club.points == 11
+        other.close()
+
+    def test_batch_atomic_conflict_applies_nothing(self, storage, seed_dir):
+        """Test that an all-or-nothing batch is rolled back on conflict"""
+        other = open_storage(seed_dir)
+        other.commit_booking(
+            other.registry.club_by_name("She Lifts"),
+            other.registry.competition_by_name("Tiny Cup"),
+            2,
+        )
+        registry = storage.registry
+        club = registry.club_by_name("Simply Lift")
+        errors = storage.commit_bookings(
+            [
+                (club, registry.competition_by_name("Future Open"), 2),
+                (club, registry.competition_by_name("Tiny Cup"), 1),
+            ],
+            atomic=True,
+        )
+        assert errors[1] is not None
+        reloaded = open_storage(seed_dir)
+        assert reloaded.registry.club_by_name("Simply Lift").points == 13
+        assert club.points == 13
+        for s in (other, reloaded):
+            s.close()
+
+    def test_engine_never_overbooks_across_processes(self, seed_dir):
+        """Test that two workers sharing the database sell each place once, up to the cap"""
+        workers = [open_storage(seed_dir) for _ in range(2)]
+        engines = [BookingEngine(w.registry, storage=w) for w in workers]
+        booked = []
+
+        def book(engine):
+            registry = engine.registry
+            for _ in range(20):
+                try:
+                    engine.book(
+                        registry.club_by_name("Simply Lift"),
+                        registry.competition_by_name("Future Open"),
+                        1,
+                    )
+                    booked.append(1)
+                except BookingError:
+                    pass
+
+        threads = [threading.Thread(target=book, args=(e,)) for e in engines * 2]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(booked) == 12
+        final = open_storage(seed_dir)
+        assert final.registry.club_by_name("Simply Lift").points == 1
+        assert final.registry.competition_by_name("Future Open").number_of_places == 8
+        assert final.ledger.booked("Simply Lift", "Future Open") == 12
+        for storage in workers + [final]:
+            storage.close()
+
+
+class TestRefresh:
+    """Test incremental refresh from other processes"""
+
+    def test_pulls_changes_committed_elsewhere(self, storage, seed_dir):
+        """Test that refresh applies only rows changed since the last one"""
+        other = open_storage(seed_dir)
+        other.commit_booking(
+            other.registry.club_by_name("Iron Temple"),
+            other.registry.competition_by_name("Future Open"),
+            4,
+        )
+        version = storage.registry.version
+        storage.refresh()
+        assert storage.registry.club_by_name("Iron Temple").points == 0
+        assert storage.registry.competition_by_name("Future Open").number_of_places == 16
+        assert storage.revision == other.revision
+        assert storage.registry.version > version
+        other.close()
+
+    def test_pulls_booking_totals(self, storage, seed_dir):
+        """Test that refresh brings the ledger up to date with other workers"""
+        other = open_storage(seed_dir)
+        other.commit_booking(
+            other.registry.club_by_name("Simply Lift"),
+            other.registry.competition_by_name("Future Open"),
+            6,
+        )
+        storage.refresh()
+        assert storage.ledger.booked("Simply Lift", "Future Open") == 6
+        other.close()
+
+    def test_noop_when_nothing_changed(self, storage):
+        """Test that an unchanged database leaves the registry version alone"""
+        version = storage.registry.version
+        storage.refresh()
+        assert storage.registry.version == version
+
+    def test_after_fork_uses_new_connections(self, storage, seed_dir):
+        """Test that a forked worker opens its own pool and catches up"""
+        inherited = storage.pool
+        other = open_storage(seed_dir)
+        other.commit_booking(
+            other.registry.club_by_name("She Lifts"),
+            other.registry.competition_by_name("Future Open"),
+            5,
+        )
+        storage.after_fork()
+        assert storage.pool is not inherited
+        assert storage.registry.club_by_name("She Lifts").points == 7
+        inherited.close()
+        other.close()
+
+
+class TestLiveUpdates:
+    """Test the live updates every worker reads from the shared database"""
+
+    def test_booking_changes_since_revision(self, storage, seed_dir):
+        """Test that the changed pairs come with their revision and current values"""
+        registry = storage.registry
+        storage.commit_booking(
+            registry.club_by_name("Simply Lift"), registry.competition_by_name("Future Open"), 3
+        )
+        storage.commit_booking(
+            registry.club_by_name("She Lifts"), registry.competition_by_name("Tiny Cup"), 2
+        )
+        assert storage.booking_changes(0) == (
+            2,
+            [(1, "Simply Lift", 10, "Future Open", 17), (2, "She Lifts", 10, "Tiny Cup", 0)],
+        )
+        assert storage.booking_changes(1, limit=1) == (2, [(2, "She Lifts", 10, "Tiny Cup", 0)])
+        assert storage.booking_changes(2) == (2, [])
+
+    def test_every_worker_publishes_every_booking(self, seed_dir):
+        """Test that each worker's broker gets all bookings under shared ids"""
+        workers = [open_storage(seed_dir) for _ in range(2)]
+        brokers = [EventBroker() for _ in workers]
+        feeds = [StorageFeed(w, b, interval=60).start() for w, b in zip(workers, brokers)]
+        for places, worker in zip((1, 2, 3, 4), workers * 2):
+            worker.commit_booking(
+                worker.registry.club_by_name("Simply Lift"),
+                worker.registry.competition_by_name("Future Open"),
+                places,
+            )
+            for feed in feeds:
+                feed.poll()
+        for broker in brokers:
+            assert [entry[0] for entry in broker.events_after(0)] == [1, 2, 3, 4]
+            assert broker.events_after(3) == [
+                (
+                    4,
+                    "booking",
+                    '{"competition":"Future Open","numberOfPlaces":10,'
+                    '"club":"Simply Lift","points":3}',
+                )
+            ]
+        for feed, worker in zip(feeds, workers):
+            feed.stop()
+            worker.close()
+
+    def test_feed_starts_with_earlier_bookings(self, storage, seed_dir):
+        """Test that a worker started later can resume a client from another one"""
+        registry = storage.registry
+        storage.commit_booking(
+            registry.club_by_name("Simply Lift"), registry.competition_by_name("Future Open"), 1
+        )
+        broker = EventBroker()
+        feed = StorageFeed(open_storage(seed_dir), broker, interval=60).start()
+        assert [entry[0] for entry in broker.events_after(0)] == [1]
+        feed.stop()
+        feed.storage.close()
@@ -0,0 +1,70 @@
+"""
+Unit tests for the template bytecode cache and precompilation
+"""
+
+import os
+
+import pytest
+from flask import Flask
+
+from gudlft.templating import precompile, use_bytecode_cache
+
+TEMPLATES = os.path.join(os.path.dirname(__file__), "..", "..", "templates")
+
+
+def cache_files(directory):
+    """Return {file name: mtime} for the bytecode files in `directory`"""
+    return {
+        name: os.path.getmtime(os.path.join(directory, name)) for name in os.listdir(directory)
+    }
+
+
+@pytest.fixture
+def app():
+    """Create a bare app over the repository's templates"""
+    return Flask(__name__, template_folder=os.path.abspath(TEMPLATES))
+
+
+class TestBytecodeCache:
+    """Test that compiled templates are kept on disk"""
+
+    def test_compiled_template_written(self, app, tmp_path):
+        """Test that compiling a template stores its bytecode in the directory"""
+        cache_dir = tmp_path / "jinja"
+        use_bytecode_cache(app, str(cache_dir))
+        app.jinja_env.get_template("index.html")
+        assert len(os.listdir(cache_dir)) == 1
+
+    def test_second_process_loads_bytecode(self, tmp_path):
+        """Test that a fresh environment reuses what another one compiled"""
+        cache_dir = str(tmp_path / "jinja")
+        first = Flask(__name__, template_folder=os.path.abspath(TEMPLATES))
+        use_bytecode_cache(first, cache_dir)
+        precompile(first)
+        stored = cache_files(cache_dir)
+        second = Flask(__name__, template_folder=os.path.abspath(TEMPLATES))
+        use_bytecode_cache(second, cache_dir)
+        precompile(second)
+        assert len(stored) == 4
+        assert cache_files(cache_dir) == stored
+
+    def test_refused_once_environment_exists(self, app, tmp_path):
+        """Test that a cache set too late is reported instead of ignored"""
+        app.jinja_env.get_template("index.html")
+        with pytest.raises(RuntimeError):
+            use_bytecode_cache(app, str(tmp_path))
+
+
+class TestPrecompile:
+    """Test the eager compilation step run at startup"""
+
+    def test_every_template_compiled(self, app):
+        """Test that each template is timed and ends up in the in-memory cache"""
+        timings = precompile(app)
+        assert set(timings) == {
+            "_points_rows.html",
+            "booking.html",
+            "index.html",
+            "welcome.html",
+        }
+        assert len(app.jinja_env.cache) == 4
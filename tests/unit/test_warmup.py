@@ -0,0 +1,64 @@
+"""
+Unit tests for deferred data loading
+"""
+
+import threading
+
+from gudlft.warmup import FAILED, LOADING, PENDING, READY, Warmup
+
+
+class TestWarmup:
+    """Test lazy and background loading"""
+
+    def test_lazy_load_runs_once(self):
+        """Test that concurrent first callers share a single load"""
+        calls = []
+        release = threading.Event()
+
+        def load():
+            calls.append(1)
+            release.wait(5)
+
+        warmup = Warmup(load)
+        assert warmup.state == PENDING
+        threads = [threading.Thread(target=warmup.run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert calls == [1]
+        assert warmup.state == READY
+        assert warmup.seconds is not None
+
+    def test_background_load(self):
+        """Test that start() loads in a thread and run() waits for it"""
+        release = threading.Event()
+        warmup = Warmup(lambda: release.wait(5)).start()
+        assert warmup.state == LOADING
+        assert not warmup.ready
+        release.set()
+        assert warmup.run()
+
+    def test_failure_is_kept(self):
+        """Test that a failed load is reported instead of raised"""
+
+        def load():
+            raise ValueError("bad data")
+
+        warmup = Warmup(load)
+        assert warmup.run() is False
+        assert warmup.state == FAILED
+        assert str(warmup.error) == "bad data"
+        assert warmup.run() is False
+
+    def test_after_fork_forgets_interrupted_load(self):
+        """Test that a load whose thread did not survive fork() can run again"""
+        release = threading.Event()
+        calls = []
+        warmup = Warmup(lambda: calls.append(1) or release.wait(5)).start()
+        warmup.after_fork()
+        assert warmup.state == PENDING
+        release.set()
+        assert warmup.run()
+        assert len(calls) == 2